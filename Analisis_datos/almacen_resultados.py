@@ -0,0 +1,276 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from energy_consumption import (
+    CARPETA_RESULTADOS,
+    cargar_parametros,
+    obtener_parametros,
+    ruta_csv_energy,
+    ruta_csv_metricas,
+    ruta_json_parametros,
+)
+
+# Este archivo guarda los resultados de cada ejecucion (parametros y resumen por shape_id) en una base de datos
+# SQLite con indices, para comparar escenarios (variantes del bus, versiones del feed, ajustes del modelo de
+# conduccion) sin copiar CSV a mano. Opcionalmente guarda los ciclos completos comprimidos con zlib.
+# Los parametros se leen de parametros_ejecucion.json, que escriben los scripts del modelo junto a sus resultados,
+# asi que siempre son los que se usaron en el calculo.
+#
+# Ejemplos:
+#   python energy_consumption.py --parametros '{"mass_bus": 16000}' --escenario "bus 16 t"
+#   python almacen_resultados.py registrar --escenario "bus 16 t" --ciclos
+#   python almacen_resultados.py consultar --ruta 116 --ultimos 20   (las 20 ultimas ejecuciones, no escenarios)
+
+ruta_almacen = os.path.join(CARPETA_RESULTADOS, "almacen_resultados.sqlite")
+
+# Columnas de df_metricas_shape guardadas en la tabla resumen_shapes
+COLUMNAS_RESUMEN = [
+    "tot_dist_traveled", "tot_time_traveled", "tot_P_cons", "tot_E_cons", "E_regen",
+    "P_cons_max", "P_cons_mean", "E_cons_km", "pct_regen",
+]
+
+# Columnas de df_energy_consumption guardadas en los ciclos comprimidos
+COLUMNAS_CICLO = ["shape_dist_traveled", "delta_time", "inst_vel", "inst_acc", "angle_deg", "P_cons", "E_cons"]
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    ejecucion_id INTEGER PRIMARY KEY,
+    fecha TEXT NOT NULL,
+    escenario TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    origen TEXT,
+    num_shapes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS resumen_shapes (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(ejecucion_id) ON DELETE CASCADE,
+    shape_id TEXT NOT NULL,
+    route_id TEXT NOT NULL,
+    sentido TEXT NOT NULL,
+    {", ".join(f"{col} REAL" for col in COLUMNAS_RESUMEN)},
+    PRIMARY KEY (ejecucion_id, shape_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ciclos (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(ejecucion_id) ON DELETE CASCADE,
+    shape_id TEXT NOT NULL,
+    columnas TEXT NOT NULL,
+    num_puntos INTEGER NOT NULL,
+    datos BLOB NOT NULL,
+    PRIMARY KEY (ejecucion_id, shape_id)
+);
+CREATE INDEX IF NOT EXISTS idx_resumen_ruta ON resumen_shapes (route_id, ejecucion_id);
+CREATE INDEX IF NOT EXISTS idx_ejecuciones_escenario ON ejecuciones (escenario);
+"""
+
+
+def abrir_almacen(ruta=ruta_almacen):
+    """
+    Abre (o crea) la base de datos de resultados y sus tablas e índices.
+
+    Returns:
+        sqlite3.Connection: Conexión a la base de datos.
+    """
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    conexion.execute("PRAGMA foreign_keys = ON")
+    conexion.execute("PRAGMA journal_mode = WAL")
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+
+# Separar el shape_id (p. ej. 068_A) en route_id (068) y sentido (A)
+def separar_shape_id(shape_id):
+    route_id, _, sentido = shape_id.rpartition("_")
+    return route_id, sentido
+
+
+def comprimir_ciclo(df, columnas=COLUMNAS_CICLO):
+    """
+    Comprime las columnas de un ciclo como una matriz float64 con zlib.
+
+    Returns:
+        bytes: Datos comprimidos.
+    """
+    matriz = np.ascontiguousarray(df[columnas].to_numpy(dtype=np.float64))
+    return zlib.compress(matriz.tobytes(), 6)
+
+
+def descomprimir_ciclo(datos, columnas, num_puntos):
+    """
+    Reconstruye el DataFrame de un ciclo a partir de los datos comprimidos con comprimir_ciclo.
+
+    """
+    matriz = np.frombuffer(zlib.decompress(datos), dtype=np.float64).reshape(num_puntos, len(columnas))
+    return pd.DataFrame(matriz, columns=columnas)
+
+
+def registrar_ejecucion(conexion, metricas, escenario, parametros=None, ciclos=None, origen=None):
+    """
+    Guarda una ejecución en una única transacción: una fila en 'ejecuciones', una fila por
+    shape_id en 'resumen_shapes' y, si se indica, los ciclos comprimidos en 'ciclos'.
+
+    Args:
+        conexion (sqlite3.Connection): Conexión devuelta por abrir_almacen.
+        metricas (pd.DataFrame): Métricas por shape_id (df_metricas_shape).
+        escenario (str): Nombre del escenario.
+        parametros (dict): Parámetros del bus que sustituyen a los de PARAMETROS_BUS.
+        ciclos (pd.DataFrame): Datos instantáneos (df_energy_consumption) o None para no guardarlos.
+        origen (str): Descripción del origen de los datos (versión del feed, archivo...).
+
+    Returns:
+        int: Identificador de la ejecución.
+    """
+    # Verificar que las columnas necesarias existan
+    columnas = ['shape_id'] + COLUMNAS_RESUMEN
+    if not all(col in metricas.columns for col in columnas):
+        raise ValueError(f"El DataFrame de métricas debe contener las columnas {columnas}. Usa calcular_metricas_shape.")
+
+    parametros = obtener_parametros(parametros)
+    filas_resumen = [
+        (*separar_shape_id(fila[0]), fila[0], *fila[1:])
+        for fila in metricas[columnas].itertuples(index=False, name=None)
+    ]
+
+    with conexion:  # Una transacción por ejecución
+        cursor = conexion.execute(
+            "INSERT INTO ejecuciones (fecha, escenario, parametros, origen, num_shapes) VALUES (?, ?, ?, ?, ?)",
+            (datetime.now().isoformat(timespec="seconds"), escenario, json.dumps(parametros, sort_keys=True),
+             origen, len(metricas)),
+        )
+        ejecucion_id = cursor.lastrowid
+        conexion.executemany(
+            f"INSERT INTO resumen_shapes (ejecucion_id, route_id, sentido, shape_id, {', '.join(COLUMNAS_RESUMEN)}) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' * len(COLUMNAS_RESUMEN))})",
+            ((ejecucion_id, *fila) for fila in filas_resumen),
+        )
+        if ciclos is not None:
+            conexion.executemany(
+                "INSERT INTO ciclos (ejecucion_id, shape_id, columnas, num_puntos, datos) VALUES (?, ?, ?, ?, ?)",
+                ((ejecucion_id, shape_id, ",".join(COLUMNAS_CICLO), len(df), comprimir_ciclo(df))
+                 for shape_id, df in ciclos.groupby("shape_id", sort=False)),
+            )
+
+    print(f"Ejecución {ejecucion_id} ({escenario}) registrada con {len(metricas)} shapes"
+          f"{' y sus ciclos' if ciclos is not None else ''}.")
+    return ejecucion_id
+
+
+def registrar_resultados(carpeta_resultados, escenario, origen=None, ciclos=False, ruta=ruta_almacen):
+    """
+    Registra los resultados que energy_consumption.py, pipeline_streaming.py o ejecutar_lote.py
+    han guardado en 'carpeta_resultados': df_metricas_shape.csv con los parámetros del bus con
+    los que se calculó (parametros_ejecucion.json) y, si 'ciclos' es True, df_energy_consumption.csv.
+
+    Returns:
+        int: Identificador de la ejecución.
+    """
+    ruta_metricas = os.path.join(carpeta_resultados, os.path.basename(ruta_csv_metricas))
+    ruta_parametros = os.path.join(carpeta_resultados, os.path.basename(ruta_json_parametros))
+    ruta_energy = os.path.join(carpeta_resultados, os.path.basename(ruta_csv_energy))
+    for ruta_archivo in [ruta_metricas, ruta_parametros] + ([ruta_energy] if ciclos else []):
+        if not os.path.exists(ruta_archivo):
+            raise FileNotFoundError(f"No se encontró el archivo en la ruta: {ruta_archivo}. Ejecuta energy_consumption.py.")
+
+    df_metricas_shape = pd.read_csv(ruta_metricas, dtype={"shape_id": str})
+    df_ciclos = None
+    if ciclos:
+        df_ciclos = pd.read_csv(ruta_energy, dtype={"shape_id": str}, usecols=["shape_id"] + COLUMNAS_CICLO)
+
+    conexion = abrir_almacen(ruta)
+    try:
+        return registrar_ejecucion(conexion, df_metricas_shape, escenario, cargar_parametros(ruta_parametros),
+                                   df_ciclos, origen)
+    finally:
+        conexion.close()
+
+
+def consultar_ruta(conexion, route_id, ultimos=20):
+    """
+    Devuelve el consumo de una ruta en las últimas 'ultimos' ejecuciones que la incluyen,
+    sumando los dos sentidos. Se cuentan ejecuciones, no escenarios: si un escenario se ha
+    registrado varias veces, cada registro ocupa una de las 'ultimos' filas.
+
+    Returns:
+        pd.DataFrame: Una fila por ejecución con 'ejecucion_id', 'fecha', 'escenario',
+                      'tot_E_cons', 'tot_dist_km' y 'E_cons_km'.
+    """
+    consulta = """
+        SELECT e.ejecucion_id, e.fecha, e.escenario,
+               SUM(r.tot_E_cons) AS tot_E_cons,
+               SUM(r.tot_dist_traveled) / 1000.0 AS tot_dist_km,
+               SUM(r.tot_E_cons) / (SUM(r.tot_dist_traveled) / 1000.0) AS E_cons_km
+        FROM resumen_shapes r JOIN ejecuciones e ON e.ejecucion_id = r.ejecucion_id
+        WHERE r.route_id = ? AND r.ejecucion_id IN (
+            SELECT DISTINCT ejecucion_id FROM resumen_shapes WHERE route_id = ?
+            ORDER BY ejecucion_id DESC LIMIT ?
+        )
+        GROUP BY e.ejecucion_id
+        ORDER BY e.ejecucion_id DESC
+    """
+    route_id = str(route_id).zfill(3)
+    return pd.read_sql_query(consulta, conexion, params=(route_id, route_id, ultimos))
+
+
+def cargar_ciclo(conexion, ejecucion_id, shape_id):
+    """
+    Carga el ciclo guardado de un shape_id en una ejecución.
+
+    Returns:
+        pd.DataFrame: Ciclo con las columnas de COLUMNAS_CICLO, o None si no se guardó.
+    """
+    fila = conexion.execute(
+        "SELECT columnas, num_puntos, datos FROM ciclos WHERE ejecucion_id = ? AND shape_id = ?",
+        (ejecucion_id, shape_id),
+    ).fetchone()
+    if fila is None:
+        return None
+    columnas, num_puntos, datos = fila
+    return descomprimir_ciclo(datos, columnas.split(","), num_puntos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Almacén SQLite de resultados de consumo por ejecución y escenario.")
+    parser.add_argument("--almacen", default=ruta_almacen, help="Ruta de la base de datos SQLite")
+    subparsers = parser.add_subparsers(dest="accion", required=True)
+
+    parser_registrar = subparsers.add_parser("registrar", help="Guardar los resultados de una carpeta de resultados")
+    parser_registrar.add_argument("--escenario", required=True, help="Nombre del escenario")
+    parser_registrar.add_argument("--resultados", default=CARPETA_RESULTADOS,
+                                  help="Carpeta con df_metricas_shape.csv y parametros_ejecucion.json")
+    parser_registrar.add_argument("--origen", default=None, help="Descripción del origen de los datos")
+    parser_registrar.add_argument("--ciclos", action="store_true", help="Guardar también los ciclos comprimidos")
+
+    parser_consultar = subparsers.add_parser("consultar", help="Consumo de una ruta en las últimas ejecuciones")
+    parser_consultar.add_argument("--ruta", required=True, help="route_id, p. ej. 116")
+    parser_consultar.add_argument("--ultimos", type=int, default=20, help="Número de ejecuciones (no de escenarios) más recientes")
+    args = parser.parse_args()
+
+    if args.accion == "registrar":
+        inicio = time.perf_counter()
+        try:
+            registrar_resultados(args.resultados, args.escenario, args.origen, args.ciclos, args.almacen)
+        except FileNotFoundError as error:
+            print(error)
+            sys.exit(1)
+        print(f"Tiempo de registro: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    elif args.accion == "consultar":
+        conexion = abrir_almacen(args.almacen)
+        inicio = time.perf_counter()
+        df_ruta = consultar_ruta(conexion, args.ruta, args.ultimos)
+        duracion = (time.perf_counter() - inicio) * 1000
+        if df_ruta.empty:
+            print(f"No hay resultados de la ruta {args.ruta} en el almacén.")
+        else:
+            print(f"Consumo de la ruta {args.ruta} en las últimas {len(df_ruta)} ejecuciones:")
+            print(df_ruta.to_string(index=False))
+        print(f"Tiempo de consulta: {duracion:.1f} ms")
+        conexion.close()
@@ -0,0 +1,77 @@
+import argparse
+import io
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from decimacion import DPI_GUARDADO, TRAMOS_POR_PIXEL, decimar_minmax, plot_decimado, presupuesto_pixeles
+
+# Este archivo compara el tiempo de dibujo y guardado de una grafica con la serie completa y con la serie
+# reducida por decimacion.py, y mide la diferencia de pixeles entre ambas imagenes.
+#
+# Ejemplo: python benchmark_decimacion.py --puntos 500000
+
+
+def generar_serie(num_puntos, semilla=0):
+    """
+    Genera un ciclo sintético de potencia (kW) a lo largo de la distancia, con ruido y picos
+    positivos (arranques) y negativos (frenada regenerativa).
+
+    """
+    rng = np.random.default_rng(semilla)
+    x = np.linspace(0, 25000, num_puntos)
+    y = 40 + 15 * np.sin(x / 300) + rng.normal(0, 5, num_puntos)
+    picos = rng.choice(num_puntos, size=max(1, num_puntos // 2000), replace=False)
+    y[picos] += rng.choice([-1, 1], size=len(picos)) * rng.uniform(150, 400, len(picos))
+    return x, y
+
+
+def dibujar(x, y, decimar):
+    """
+    Dibuja la serie como en las gráficas de potencia de plots_generator.py y devuelve
+    la imagen en RGBA, el tiempo de dibujo + guardado en JPG y el número de puntos dibujados.
+
+    """
+    inicio = time.perf_counter()
+    fig, ax = plt.subplots(figsize=(16, 6), dpi=DPI_GUARDADO)
+    if decimar:
+        linea, = plot_decimado(ax, x, y, color="red")
+    else:
+        linea, = ax.plot(x, y, color="red")
+    ax.set_xlabel("Distancia Recorrida (m)")
+    ax.set_ylabel("Potencia Consumida (kW)")
+    ax.grid(True)
+    plt.tight_layout()
+    fig.savefig(io.BytesIO(), format="jpg", dpi=DPI_GUARDADO)
+    duracion = time.perf_counter() - inicio
+
+    fig.canvas.draw()
+    imagen = np.asarray(fig.canvas.buffer_rgba())[..., :3].astype(np.int16)
+    num_puntos = len(linea.get_xdata())
+    plt.close(fig)
+    return imagen, duracion, num_puntos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la decimación min/max de series antes de dibujar.")
+    parser.add_argument("--puntos", type=int, default=500000, help="Número de puntos de la serie sintética")
+    args = parser.parse_args()
+
+    x, y = generar_serie(args.puntos)
+
+    # Comprobar que los picos se conservan
+    fig, ax = plt.subplots(figsize=(16, 6))
+    indices = decimar_minmax(x, y, presupuesto_pixeles(ax) * TRAMOS_POR_PIXEL)
+    plt.close(fig)
+    print(f"Pico máximo conservado: {y[indices].max() == y.max()}, pico mínimo conservado: {y[indices].min() == y.min()}")
+
+    imagen_completa, t_completa, n_completa = dibujar(x, y, decimar=False)
+    imagen_decimada, t_decimada, n_decimada = dibujar(x, y, decimar=True)
+
+    diferencia = np.abs(imagen_completa - imagen_decimada).max(axis=2)
+    print(f"Serie completa: {n_completa} puntos, {t_completa:.2f} s")
+    print(f"Serie decimada: {n_decimada} puntos, {t_decimada:.2f} s")
+    print(f"Reducción del tiempo de dibujo y guardado: {t_completa / t_decimada:.1f}x")
+    print(f"Píxeles distintos: {(diferencia > 0).mean() * 100:.3f} % "
+          f"(> 32 niveles: {(diferencia > 32).mean() * 100:.3f} %), diferencia máxima: {diferencia.max()} de 255")
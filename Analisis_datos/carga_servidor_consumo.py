@@ -0,0 +1,83 @@
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlencode
+
+import numpy as np
+
+# Este archivo lanza una prueba de carga contra servidor_consumo.py y muestra el rendimiento
+# (peticiones por segundo) y la distribución de latencias.
+#
+# Ejemplo: python carga_servidor_consumo.py --peticiones 5000 --hilos 8 --variantes 50
+
+
+def lanzar_peticiones(host, puerto, consultas, latencias, errores):
+    conexion = http.client.HTTPConnection(host, puerto)
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        conexion.request("GET", consulta)
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        latencias.append(time.perf_counter() - inicio)
+        if respuesta.status != 200:
+            errores.append(respuesta.status)
+    conexion.close()
+
+
+def generar_consultas(shapes, num_peticiones, num_variantes, semilla=0):
+    """
+    Genera las URLs de consulta. Cada variante es un conjunto distinto de parámetros
+    del bus; con pocas variantes la mayoría de respuestas salen de la caché.
+
+    """
+    rng = random.Random(semilla)
+    variantes = [
+        {"mass_bus": rng.randint(12000, 20000), "Paux": rng.randint(2000, 12000), "reg_eff": round(rng.uniform(0.4, 0.7), 2)}
+        for _ in range(num_variantes)
+    ]
+    consultas = []
+    for _ in range(num_peticiones):
+        parametros = {"shape_id": rng.choice(shapes)}
+        parametros.update(rng.choice(variantes))
+        consultas.append(f"/consumo?{urlencode(parametros)}")
+    return consultas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de consumo energético.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--peticiones", type=int, default=2000, help="Número total de peticiones")
+    parser.add_argument("--hilos", type=int, default=4, help="Número de clientes concurrentes")
+    parser.add_argument("--variantes", type=int, default=20, help="Número de conjuntos distintos de parámetros")
+    args = parser.parse_args()
+
+    conexion = http.client.HTTPConnection(args.host, args.puerto)
+    conexion.request("GET", "/shapes")
+    shapes = json.loads(conexion.getresponse().read())["shapes"]
+    conexion.close()
+    print(f"Shapes disponibles en el servicio: {shapes}")
+
+    consultas = generar_consultas(shapes, args.peticiones, args.variantes)
+    latencias = []
+    errores = []
+    hilos = [
+        threading.Thread(target=lanzar_peticiones, args=(args.host, args.puerto, consultas[i::args.hilos], latencias, errores))
+        for i in range(args.hilos)
+    ]
+
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    latencias_ms = np.array(latencias) * 1000
+    print(f"Peticiones: {len(latencias)} en {duracion:.2f} s con {args.hilos} hilos ({len(errores)} errores)")
+    print(f"Rendimiento: {len(latencias) / duracion:.0f} peticiones/s")
+    print(f"Latencia (ms): media={latencias_ms.mean():.2f} p50={np.percentile(latencias_ms, 50):.2f} "
+          f"p95={np.percentile(latencias_ms, 95):.2f} p99={np.percentile(latencias_ms, 99):.2f} max={latencias_ms.max():.2f}")
@@ -0,0 +1,77 @@
+import numpy as np
+
+# Este archivo reduce el numero de puntos de una serie antes de dibujarla, sin cambiar la imagen resultante.
+# Se usa el metodo min/max por pixel (M4): la serie se divide en tantos tramos como columnas de pixeles tiene
+# el eje y de cada tramo se conservan el primer punto, el ultimo, el minimo y el maximo. Asi se mantienen
+# los picos (por ejemplo, los de potencia negativa en frenada regenerativa) con una fracción de los puntos.
+
+DPI_GUARDADO = 300  # Resolución con la que plots_generator.py guarda las gráficas
+TRAMOS_POR_PIXEL = 2  # Tramos por columna de píxeles, para cubrir el desajuste con los márgenes del eje
+
+
+def presupuesto_pixeles(ax, dpi=DPI_GUARDADO):
+    """
+    Devuelve el ancho en píxeles del eje 'ax' cuando la figura se guarda con 'dpi'.
+
+    """
+    fig = ax.get_figure()
+    return max(1, int(np.ceil(ax.get_position().width * fig.get_figwidth() * dpi)))
+
+
+def decimar_minmax(x, y, num_tramos):
+    """
+    Reduce la serie (x, y) a como máximo 4 puntos por tramo: primero, último, mínimo y máximo.
+    Los tramos tienen el mismo ancho en x y los valores NaN de y se ignoran al buscar los
+    extremos. Devuelve los índices de los puntos conservados en el orden original de la serie.
+
+    Args:
+        x (np.ndarray): Valores del eje x.
+        y (np.ndarray): Valores del eje y.
+        num_tramos (int): Número de tramos en que se divide el rango de x.
+
+    Returns:
+        np.ndarray: Índices de los puntos a dibujar.
+    """
+    n = len(x)
+    if n <= 4 * num_tramos:
+        return np.arange(n)
+
+    # Los tramos deben ser contiguos: si x no está ordenada se trabaja sobre la serie ordenada por x
+    orden = None
+    if np.any(np.diff(x) < 0):
+        orden = np.argsort(x, kind="stable")
+        x, y = x[orden], y[orden]
+
+    x_min, x_max = x[0], x[-1]
+    if x_max == x_min:
+        inicios = np.array([0])
+    else:
+        bordes = x_min + (x_max - x_min) * np.arange(1, num_tramos) / num_tramos
+        inicios = np.unique(np.r_[0, np.searchsorted(x, bordes, side="left")])
+        inicios = inicios[inicios < n]
+    longitudes = np.diff(np.r_[inicios, n])
+    finales = inicios + longitudes - 1
+
+    # Posición del mínimo y del máximo de cada tramo: primer punto que iguala el extremo del tramo
+    indices = [inicios, finales]
+    for extremo in (np.fmin.reduceat(y, inicios), np.fmax.reduceat(y, inicios)):
+        coincide = np.flatnonzero(y == np.repeat(extremo, longitudes))
+        primera = np.searchsorted(coincide, inicios, side="left")
+        valido = (primera < len(coincide))
+        valido[valido] &= coincide[primera[valido]] <= finales[valido]
+        indices.append(coincide[primera[valido]])
+
+    seleccion = np.unique(np.concatenate(indices))
+    return seleccion if orden is None else np.sort(orden[seleccion])
+
+
+def plot_decimado(ax, x, y, dpi=DPI_GUARDADO, **kwargs):
+    """
+    Dibuja la serie (x, y) en 'ax' con ax.plot, reducida al presupuesto de píxeles del eje.
+    Acepta los mismos argumentos que ax.plot.
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    indices = decimar_minmax(x, y, presupuesto_pixeles(ax, dpi) * TRAMOS_POR_PIXEL)
+    return ax.plot(x[indices], y[indices], **kwargs)
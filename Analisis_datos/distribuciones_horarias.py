@@ -0,0 +1,249 @@
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from gtfs import CARPETA_DATOS, cargar_datos, cargar_selecciones, ruta_selecciones
+from validador_gtfs import horario_a_segundos
+
+# Este archivo calcula, para todas las rutas y service_id del feed, la distribucion de las horas de salida de los
+# trips: media y desviacion de la primera y la ultima salida y un histograma de salidas por hora. Los trips de
+# frequencies.txt se expanden a una salida por intervalo. Todo se calcula con operaciones vectorizadas sobre
+# segundos enteros (groupby y np.bincount), sin bucles por ruta.
+#
+# Ejemplo: python distribuciones_horarias.py --carpeta Raw_data
+
+# Los resultados se guardan con el resto de resultados generados, sin sobrescribir los de Raw_data/Resultados_Distribuciones
+CARPETA_DISTRIBUCIONES = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "results", "distribuciones_horarias"))
+
+NUM_HORAS = 48  # Bins del histograma: los horarios GTFS pueden superar las 24:00:00 en servicios nocturnos
+
+
+def calcular_salidas(datos_dict):
+    """
+    Calcula la hora de salida (segundos desde medianoche) de cada trip. La salida de un trip es la
+    menor departure_time de sus stop_times. Los trips de frequencies.txt se sustituyen por una
+    salida cada headway_secs entre start_time (incluida) y end_time (excluida).
+
+    Returns:
+        pd.DataFrame: Una fila por salida con las columnas 'route_id', 'service_id', 'shape_id' y 'salida'.
+    """
+    trips = datos_dict["trips"]
+    stop_times = datos_dict["stop_times"]
+
+    # Salida de cada trip en una sola agrupación sobre segundos enteros
+    segundos = horario_a_segundos(stop_times["departure_time"])
+    salidas = segundos.groupby(stop_times["trip_id"]).min().dropna()
+
+    frequencies = datos_dict.get("frequencies")
+    if frequencies is not None and not frequencies.empty:
+        inicio = horario_a_segundos(frequencies["start_time"]).to_numpy()
+        fin = horario_a_segundos(frequencies["end_time"]).to_numpy()
+        headway = pd.to_numeric(frequencies["headway_secs"], errors="coerce").to_numpy(dtype=np.float64)
+        validos = ~np.isnan(inicio) & ~np.isnan(fin) & (headway > 0)
+        inicio, fin, headway = inicio[validos], fin[validos], headway[validos]
+        trip_ids = frequencies["trip_id"].to_numpy()[validos]
+
+        # Expandir cada fila de frequencies en sus salidas sin bucles: k = 0..n-1 para cada fila
+        num_salidas = np.maximum(np.ceil((fin - inicio) / headway), 0).astype(np.int64)
+        fila = np.repeat(np.arange(len(num_salidas)), num_salidas)
+        k = np.arange(len(fila)) - np.repeat(np.cumsum(num_salidas) - num_salidas, num_salidas)
+        salidas_frecuencia = pd.Series(inicio[fila] + k * headway[fila], index=trip_ids[fila])
+
+        salidas = pd.concat([salidas[~salidas.index.isin(trip_ids)], salidas_frecuencia])
+
+    salidas = salidas.rename("salida").rename_axis("trip_id").reset_index()
+    salidas = salidas.merge(trips[["trip_id", "route_id", "service_id", "shape_id"]], on="trip_id", how="inner")
+    salidas["salida"] = salidas["salida"].astype(np.int64)
+    return salidas[["route_id", "service_id", "shape_id", "salida"]]
+
+
+# Formatear segundos como HH:MM:SS (las horas pueden ser mayores que 24)
+def segundos_a_horario(segundos):
+    segundos = np.round(np.asarray(segundos, dtype=np.float64))
+    horas, resto = np.divmod(segundos, 3600)
+    minutos, segs = np.divmod(resto, 60)
+    return pd.Series([f"{h:02.0f}:{m:02.0f}:{s:02.0f}" if not np.isnan(h) else None
+                      for h, m, s in zip(horas, minutos, segs)])
+
+
+def calcular_distribuciones(salidas):
+    """
+    Calcula la primera y la última salida de cada route_id, service_id y shape_id en una sola
+    agrupación y, a partir de ellas, la media y la desviación típica por ruta y por ruta y servicio.
+
+    Returns:
+        tuple: (por_ruta, por_servicio). 'por_ruta' tiene las columnas de distribuciones_rutas.csv
+               ('route_id', 'inicio_media', 'inicio_std_min', 'fin_media', 'fin_std_min') y
+               'por_servicio' las mismas por route_id y service_id, más 'num_salidas'.
+    """
+    extremos = salidas.groupby(["route_id", "service_id", "shape_id"]).agg(
+        inicio=("salida", "min"), fin=("salida", "max"), num_salidas=("salida", "size")
+    ).reset_index()
+
+    def resumir(claves):
+        tabla = extremos.groupby(claves).agg(
+            inicio_media=("inicio", "mean"), inicio_std_min=("inicio", "std"),
+            fin_media=("fin", "mean"), fin_std_min=("fin", "std"), num_salidas=("num_salidas", "sum"),
+        ).reset_index()
+        for col in ["inicio_std_min", "fin_std_min"]:
+            tabla[col] = tabla[col] / 60  # Desviación típica en minutos
+        return tabla
+
+    por_ruta = resumir(["route_id"])
+    por_servicio = resumir(["route_id", "service_id"])
+    for tabla in (por_ruta, por_servicio):
+        tabla["inicio_media_s"] = tabla["inicio_media"]
+        tabla["fin_media_s"] = tabla["fin_media"]
+        tabla["inicio_media"] = segundos_a_horario(tabla["inicio_media_s"]).to_numpy()
+        tabla["fin_media"] = segundos_a_horario(tabla["fin_media_s"]).to_numpy()
+    return por_ruta.drop(columns="num_salidas"), por_servicio
+
+
+def calcular_histogramas(salidas, num_horas=NUM_HORAS):
+    """
+    Cuenta las salidas por hora de cada route_id y service_id con un único np.bincount
+    sobre el código del grupo y la hora.
+
+    Returns:
+        pd.DataFrame: Una fila por route_id y service_id y una columna por hora ('h00', 'h01', ...).
+    """
+    codigos, grupos = pd.MultiIndex.from_frame(salidas[["route_id", "service_id"]]).factorize(sort=True)
+    horas = np.minimum(salidas["salida"].to_numpy() // 3600, num_horas - 1)
+    conteos = np.bincount(codigos * num_horas + horas, minlength=len(grupos) * num_horas).reshape(len(grupos), num_horas)
+    histogramas = pd.DataFrame(conteos, columns=[f"h{h:02d}" for h in range(num_horas)])
+    histogramas.insert(0, "service_id", grupos.get_level_values(1))
+    histogramas.insert(0, "route_id", grupos.get_level_values(0))
+    return histogramas
+
+
+def figura_inicio_fin(por_ruta, rutas, ruta_salida):
+    """
+    Dibuja el tiempo en servicio de las rutas indicadas con la media y la desviación de la
+    primera y la última salida, junto a una tabla con los valores.
+
+    """
+    import matplotlib.pyplot as plt
+
+    tabla = por_ruta[por_ruta["route_id"].isin(rutas)]
+    if tabla.empty:
+        print("No hay salidas de las rutas seleccionadas. No se generó la gráfica de inicio y fin.")
+        return
+    y = np.arange(len(tabla))
+    inicio = tabla["inicio_media_s"].to_numpy() / 3600
+    fin = tabla["fin_media_s"].to_numpy() / 3600
+
+    fig, (ax, ax_tabla) = plt.subplots(1, 2, figsize=(12, max(4, 0.6 * len(tabla) + 2)), gridspec_kw={"width_ratios": [2.5, 1]})
+    ax.barh(y, fin - inicio, left=inicio, color="blue", alpha=0.6, label="Tiempo en servicio")
+    ax.errorbar(inicio, y, xerr=tabla["inicio_std_min"].fillna(0) / 60, fmt="o", color="black", capsize=5, label="Inicio")
+    ax.errorbar(fin, y, xerr=tabla["fin_std_min"].fillna(0) / 60, fmt="o", color="red", capsize=5, label="Fin")
+    ax.set_yticks(y)
+    ax.set_yticklabels(tabla["route_id"].astype(str))
+    ax.set_xticks(range(0, 25, 2))
+    ax.set_xticklabels([f"{h % 24:02d}:00" for h in range(0, 25, 2)], rotation=45)
+    ax.set_xlabel("Hora")
+    ax.set_ylabel("Rutas")
+    ax.grid(True, linestyle="--", alpha=0.7)
+    ax.legend(loc="upper center", bbox_to_anchor=(0.5, -0.22), ncol=3)
+
+    ax_tabla.axis("off")
+    tabla_valores = ax_tabla.table(
+        cellText=[[r, i[:5], f"{di:.2f} min", f[:5], f"{df:.2f} min"] for r, i, di, f, df in
+                  tabla[["route_id", "inicio_media", "inicio_std_min", "fin_media", "fin_std_min"]].itertuples(index=False)],
+        colLabels=["Ruta", "Inicio", "Desv. Inicio", "Fin", "Desv. Fin"], cellLoc="center", loc="center",
+    )
+    tabla_valores.auto_set_font_size(False)
+    tabla_valores.set_fontsize(7)
+    tabla_valores.scale(1, 2)
+    plt.tight_layout()
+    plt.savefig(ruta_salida, format="jpg", dpi=300, bbox_inches="tight")
+    plt.close()
+    print(f"Gráfica de inicio y fin guardada: {ruta_salida}")
+
+
+def figura_histogramas(histogramas, service_id, ruta_salida, columnas=16):
+    """
+    Dibuja un pequeño histograma de salidas por hora para cada ruta de un service_id, en una
+    rejilla con la misma escala en todos. Todos los histogramas se dibujan en un único eje como
+    una sola colección de polígonos, para que el tiempo no dependa del número de rutas.
+
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    tabla = histogramas[histogramas["service_id"] == service_id]
+    if tabla.empty:
+        return
+    conteos = tabla.filter(regex=r"^h\d+$").to_numpy()
+    # Recortar las horas sin salidas al final del día
+    ultima_hora = max(24, int(np.nonzero(conteos.sum(axis=0))[0].max()) + 1)
+    conteos = conteos[:, :ultima_hora]
+    maximo = max(int(conteos.max()), 1)
+
+    # Origen de cada celda de la rejilla (ancho = horas, alto = 1) y separación entre celdas
+    num_rutas = len(tabla)
+    filas = math.ceil(num_rutas / columnas)
+    ancho, alto = ultima_hora, 1.0
+    x0 = (np.arange(num_rutas) % columnas) * ancho * 1.15
+    y0 = -(np.arange(num_rutas) // columnas) * alto * 1.6
+
+    # Escalones de cada histograma: (hora, conteo) en los dos bordes de cada bin, cerrados sobre el eje
+    bordes = np.repeat(np.arange(ultima_hora + 1), 2)[1:-1]
+    alturas = np.repeat(conteos / maximo, 2, axis=1)
+    xs = np.concatenate([[0], bordes, [ultima_hora]])[None, :] + x0[:, None]
+    ys = np.concatenate([np.zeros((num_rutas, 1)), alturas, np.zeros((num_rutas, 1))], axis=1) + y0[:, None]
+    marcos = np.stack([
+        np.stack([x0, y0], axis=1), np.stack([x0 + ancho, y0], axis=1),
+        np.stack([x0 + ancho, y0 + alto], axis=1), np.stack([x0, y0 + alto], axis=1), np.stack([x0, y0], axis=1),
+    ], axis=1)
+
+    fig, ax = plt.subplots(figsize=(2 * columnas, 1.2 * filas + 1))
+    ax.add_collection(PolyCollection(np.stack([xs, ys], axis=2), facecolors="#1f77b4", edgecolors="none"))
+    ax.add_collection(LineCollection(marcos, colors="0.7", linewidths=0.5))
+    for x, y, route_id in zip(x0, y0, tabla["route_id"]):
+        ax.text(x + ancho / 2, y + alto * 1.05, str(route_id), ha="center", va="bottom", fontsize=8)
+    ax.set_xlim(x0.min() - 1, x0.max() + ancho + 1)
+    ax.set_ylim(y0.min() - 0.2, alto * 1.4)
+    ax.axis("off")
+    ax.set_title(f"Salidas por hora de cada ruta (service_id {service_id})\n"
+                 f"Cada celda: de 00:00 a {ultima_hora:02d}:00 en el eje horizontal y de 0 a {maximo} salidas por hora en el vertical")
+    plt.tight_layout()
+    plt.savefig(ruta_salida, format="jpg", dpi=150)
+    plt.close()
+    print(f"Histogramas de salidas guardados: {ruta_salida}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distribución horaria de las salidas de todas las rutas y servicios.")
+    parser.add_argument("--carpeta", default=CARPETA_DATOS, help="Carpeta con los archivos GTFS (.txt) o archivo .zip del feed")
+    parser.add_argument("--salida", default=CARPETA_DISTRIBUCIONES, help="Carpeta donde guardar tablas y gráficas")
+    parser.add_argument("--selecciones", default=ruta_selecciones, help="JSON con las rutas de la gráfica de inicio y fin")
+    parser.add_argument("--sin-graficas", action="store_true", help="Calcular solo las tablas")
+    args = parser.parse_args()
+
+    datos_dict = cargar_datos(args.carpeta)
+
+    inicio = time.perf_counter()
+    salidas = calcular_salidas(datos_dict)
+    por_ruta, por_servicio = calcular_distribuciones(salidas)
+    histogramas = calcular_histogramas(salidas)
+    print(f"{len(salidas)} salidas de {por_ruta.shape[0]} rutas y {salidas['service_id'].nunique()} servicios "
+          f"analizadas en {time.perf_counter() - inicio:.2f} s")
+    print(por_ruta.drop(columns=["inicio_media_s", "fin_media_s"]))
+
+    os.makedirs(args.salida, exist_ok=True)
+    por_ruta.drop(columns=["inicio_media_s", "fin_media_s"]).to_csv(os.path.join(args.salida, "distribuciones_rutas.csv"), index=False)
+    por_servicio.drop(columns=["inicio_media_s", "fin_media_s"]).to_csv(os.path.join(args.salida, "distribuciones_servicios.csv"), index=False)
+    histogramas.to_csv(os.path.join(args.salida, "histogramas_horarios.csv"), index=False)
+    print(f"Tablas de distribuciones guardadas en {args.salida}")
+
+    if not args.sin_graficas:
+        inicio = time.perf_counter()
+        rutas = cargar_selecciones(args.selecciones)[0]["rutas_seleccionadas"] if os.path.exists(args.selecciones) else []
+        figura_inicio_fin(por_ruta, rutas, os.path.join(args.salida, "distribuciones_horarios.jpg"))
+        for service_id in sorted(histogramas["service_id"].unique()):
+            figura_histogramas(histogramas, service_id, os.path.join(args.salida, f"histogramas_horarios_{service_id}.jpg"))
+        print(f"Gráficas generadas en {time.perf_counter() - inicio:.2f} s")
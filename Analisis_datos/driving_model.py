@@ -4,19 +4,11 @@ import numpy as np
 
 # Este archivo genera un modelo de conduccion basado en los datos de la ruta obtenidos en route_data.py
 
-
 # Directorio donde se encuentran los datos procesados
 CARPETA_DATOS_RUTA = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Processed_data"))
 
-
-# Cargar el DataFrame df_route_data desde el archivo CSV
 ruta_csv = os.path.join(CARPETA_DATOS_RUTA, "df_route_data.csv")
-if os.path.exists(ruta_csv):
-    df_route_data = pd.read_csv(ruta_csv)
-    print("DataFrame df_route_data cargado correctamente:")
-    print(df_route_data.head())
-else:
-    print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+output_csv = os.path.join(CARPETA_DATOS_RUTA, "df_driving_model.csv")
 
 # Calcular la columna delta_time. Esta columna es la diferencia de tiempo entre dos puntos consecutivos
 def calcular_delta_time(df):
@@ -42,13 +34,6 @@ def calcular_delta_time(df):
     print(df[['shape_id', 'shape_pt_sequence', 'delta_time']].head())
     return df
 
-if df_route_data is not None and not df_route_data.empty:
-    df_route_data = calcular_delta_time(df_route_data)
-    print("DataFrame df_route_data con delta_time:")
-    print(df_route_data)
-else:
-    print("El DataFrame df_route_data está vacío. No se pudo calcular delta_time.")
-
 # Crear la columna inst_vel e inst_acc
 def generate_instantaneous_velocity(df, max_speed_mps=13.8):
     """
@@ -138,13 +123,6 @@ def generate_instantaneous_velocity(df, max_speed_mps=13.8):
 
     return df
 
-if df_route_data is not None and not df_route_data.empty:
-    df_route_data = generate_instantaneous_velocity(df_route_data)
-    print("DataFrame df_route_data con inst_vel e inst_acc calculados:")
-    print(df_route_data)
-else:
-    print("El DataFrame df_route_data está vacío. No se pudo calcular inst_vel e inst_acc.")
-
 # Calcular la columna angle_deg
 def calcular_angulo(df):
     """
@@ -179,28 +157,41 @@ def calcular_angulo(df):
     print(df[['shape_id', 'shape_pt_sequence', 'angle_deg']].head())
     return df
 
-if df_route_data is not None and not df_route_data.empty:
-    df_route_data = calcular_angulo(df_route_data)
-    print("DataFrame df_route_data con angle_deg calculado:")
-    print(df_route_data)
-else:
-    print("El DataFrame df_route_data está vacío. No se pudo calcular angle_deg.")
-
-# Exportar el DataFrame df_route_data a un archivo CSV en la carpeta Processed_data
-output_csv = os.path.join(CARPETA_DATOS_RUTA, "df_driving_model.csv")
-if df_route_data is not None and not df_route_data.empty:
-    df_route_data.to_csv(output_csv, index=False)
-    print(f"DataFrame df_route_data exportado a {output_csv}")
-else:
-    print("El DataFrame df_route_data está vacío. No se pudo exportar.")
-
-
-
-
-
-
-
-
-
-
 
+if __name__ == "__main__":
+    # Cargar el DataFrame df_route_data desde el archivo CSV
+    df_route_data = None
+    if os.path.exists(ruta_csv):
+        df_route_data = pd.read_csv(ruta_csv)
+        print("DataFrame df_route_data cargado correctamente:")
+        print(df_route_data.head())
+    else:
+        print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+
+    if df_route_data is not None and not df_route_data.empty:
+        df_route_data = calcular_delta_time(df_route_data)
+        print("DataFrame df_route_data con delta_time:")
+        print(df_route_data)
+    else:
+        print("El DataFrame df_route_data está vacío. No se pudo calcular delta_time.")
+
+    if df_route_data is not None and not df_route_data.empty:
+        df_route_data = generate_instantaneous_velocity(df_route_data)
+        print("DataFrame df_route_data con inst_vel e inst_acc calculados:")
+        print(df_route_data)
+    else:
+        print("El DataFrame df_route_data está vacío. No se pudo calcular inst_vel e inst_acc.")
+
+    if df_route_data is not None and not df_route_data.empty:
+        df_route_data = calcular_angulo(df_route_data)
+        print("DataFrame df_route_data con angle_deg calculado:")
+        print(df_route_data)
+    else:
+        print("El DataFrame df_route_data está vacío. No se pudo calcular angle_deg.")
+
+    # Exportar el DataFrame df_route_data a un archivo CSV en la carpeta Processed_data
+    if df_route_data is not None and not df_route_data.empty:
+        df_route_data.to_csv(output_csv, index=False)
+        print(f"DataFrame df_route_data exportado a {output_csv}")
+    else:
+        print("El DataFrame df_route_data está vacío. No se pudo exportar.")
@@ -0,0 +1,148 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+import pandas as pd
+
+# Este archivo procesa varias selecciones de rutas en un mismo proceso: carga el feed GTFS y df_route_data.csv
+# una sola vez y, para cada seleccion de selecciones.json, extrae los trips (gtfs.py) y ejecuta el modelo de
+# conduccion y de consumo sobre sus shapes. Muestra el tiempo de carga y el de cada seleccion. Con --validar el feed
+# se lee una sola vez como texto, se valida y se convierte a los tipos de cargar_datos. Los modulos de las etapas
+# se importan dentro de main para medir tambien su tiempo de carga.
+# Para ver el detalle de cada import: python -X importtime ejecutar_lote.py 2> imports.txt
+#
+# Ejemplo: python ejecutar_lote.py --selecciones Raw_data/selecciones.json --validar
+
+CARPETA_DATOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Raw_data"))
+CARPETA_DATOS_RUTA = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Processed_data"))
+CARPETA_LOTE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "results", "lote"))
+ruta_selecciones = os.path.join(CARPETA_DATOS, "selecciones.json")
+ruta_csv_route_data = os.path.join(CARPETA_DATOS_RUTA, "df_route_data.csv")
+
+
+def ejecutar_modelo(df_route_data, shape_ids):
+    """
+    Ejecuta el modelo de conducción y de consumo (las etapas de driving_model.py y
+    energy_consumption.py) sobre los shapes indicados de df_route_data.
+
+    Returns:
+        tuple: (df_energy_consumption, df_metricas_shape, df_consumption_results), o None si
+               df_route_data no contiene ninguno de los shapes.
+    """
+    from energy_consumption import calcular_metricas_shape, calcular_resultados_resumen
+    from pipeline_streaming import ETAPAS
+
+    df = df_route_data[df_route_data["shape_id"].isin(shape_ids)].reset_index(drop=True)
+    if df.empty:
+        return None
+    for etapa in ETAPAS:
+        df = etapa(df)
+    metricas, _ = calcular_metricas_shape(df)
+    return df, metricas, calcular_resultados_resumen(metricas)
+
+
+def ejecutar_seleccion(datos_dict, df_route_data, seleccion, carpeta_lote=CARPETA_LOTE):
+    """
+    Procesa una selección de rutas y guarda sus resultados en una subcarpeta de 'carpeta_lote'
+    con el nombre de la selección.
+
+    Returns:
+        pd.DataFrame: Resumen de consumo por shape_id, o None si no se pudo ejecutar el modelo.
+    """
+    from energy_consumption import guardar_parametros
+    from gtfs import procesar_seleccion
+
+    carpeta_salida = os.path.join(carpeta_lote, seleccion["nombre"])
+    _, df_service_shape_summary = procesar_seleccion(
+        datos_dict, seleccion["rutas_seleccionadas"], seleccion["servicios_seleccionados"], carpeta_salida
+    )
+    if df_service_shape_summary is None or df_route_data is None:
+        return None
+
+    resultado = ejecutar_modelo(df_route_data, df_service_shape_summary["shape_id"].unique())
+    if resultado is None:
+        print(f"df_route_data.csv no contiene los shapes de la selección {seleccion['nombre']}.")
+        return None
+
+    _, df_metricas_shape, df_consumption_results = resultado
+    df_metricas_shape.to_csv(os.path.join(carpeta_salida, "df_metricas_shape.csv"), index=False)
+    df_consumption_results.to_csv(os.path.join(carpeta_salida, "df_consumption_results.csv"), index=False)
+    guardar_parametros(None, os.path.join(carpeta_salida, "parametros_ejecucion.json"))  # ETAPAS usa PARAMETROS_BUS
+    return df_consumption_results
+
+
+# Validar el feed con validador_gtfs.py y terminar si hay errores. Devuelve las tablas cargadas como texto,
+# para convertirlas con tablas_con_tipos en lugar de volver a leer el feed
+def _validar_feed(carpeta):
+    from validador_gtfs import cargar_tablas, validar_feed
+
+    datos_texto = cargar_tablas(carpeta)
+    resumen, _ = validar_feed(datos_texto)
+    if not resumen.empty:
+        print(resumen)
+    if (resumen["gravedad"] == "error").any():
+        print("El feed GTFS tiene errores. Ejecuta validador_gtfs.py para ver las filas afectadas.")
+        sys.exit(1)
+    print("Feed GTFS validado sin errores.")
+    return datos_texto
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecución por lotes de varias selecciones de rutas con el feed cargado una vez.")
+    parser.add_argument("--carpeta", default=CARPETA_DATOS, help="Carpeta con los archivos GTFS (.txt) o archivo .zip del feed")
+    parser.add_argument("--selecciones", default=ruta_selecciones, help="JSON con una selección o una lista de selecciones")
+    parser.add_argument("--route-data", default=ruta_csv_route_data, help="CSV con los datos de ruta (df_route_data.csv)")
+    parser.add_argument("--resultados", default=CARPETA_LOTE, help="Carpeta donde guardar una subcarpeta por selección")
+    parser.add_argument("--validar", action="store_true", help="Validar el feed antes de procesar las selecciones")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los mensajes de cada etapa")
+    args = parser.parse_args()
+
+    # Importar los modulos de las etapas dentro del proceso para medir su tiempo de carga
+    inicio_proceso = time.perf_counter()
+    import driving_model  # noqa: F401
+    import energy_consumption  # noqa: F401
+    import pipeline_streaming  # noqa: F401
+    import validador_gtfs  # noqa: F401
+    from gtfs import cargar_datos, cargar_selecciones, tablas_con_tipos
+    tiempo_imports = time.perf_counter() - inicio_proceso
+
+    selecciones = cargar_selecciones(args.selecciones)
+
+    datos_texto = None
+    if args.validar:
+        inicio = time.perf_counter()
+        datos_texto = _validar_feed(args.carpeta)
+        print(f"Lectura y validación del feed: {time.perf_counter() - inicio:.2f} s")
+
+    # Cargar el feed (o convertir el ya leído al validar) y los datos de ruta una sola vez para todas las selecciones
+    inicio = time.perf_counter()
+    if datos_texto is not None:
+        datos_dict = tablas_con_tipos(datos_texto)
+        del datos_texto
+    else:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(sys.stdout if args.verbose else nulo):
+            datos_dict = cargar_datos(args.carpeta)
+    df_route_data = None
+    if os.path.exists(args.route_data):
+        df_route_data = pd.read_csv(args.route_data, dtype={"shape_id": str})
+    else:
+        print(f"No se encontró el archivo CSV en la ruta: {args.route_data}. Solo se extraerán los trips.")
+    tiempo_carga = time.perf_counter() - inicio
+    print(f"Carga del feed y de df_route_data: {tiempo_carga:.2f} s (imports de las etapas: {tiempo_imports:.2f} s)")
+
+    tiempos = []
+    for seleccion in selecciones:
+        inicio = time.perf_counter()
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(sys.stdout if args.verbose else nulo):
+            df_resumen = ejecutar_seleccion(datos_dict, df_route_data, seleccion, args.resultados)
+        duracion = time.perf_counter() - inicio
+
+        num_shapes = 0 if df_resumen is None else len(df_resumen)
+        tiempos.append({"seleccion": seleccion["nombre"], "rutas": len(seleccion["rutas_seleccionadas"]),
+                        "shapes_simulados": num_shapes, "tiempo_s": round(duracion, 3)})
+        print(f"Selección {seleccion['nombre']}: {num_shapes} shapes simulados en {duracion:.2f} s")
+
+    print(pd.DataFrame(tiempos).to_string(index=False))
+    print(f"Tiempo total: {time.perf_counter() - inicio_proceso:.2f} s. Resultados guardados en {args.resultados}")
@@ -1,7 +1,12 @@
 import pandas as pd
+import argparse
+import json
+import math
 import os
 import numpy as np
 
+from decimacion import decimar_minmax
+
 # Este archivo simula el consumo de energía de un autobús eléctrico basado en el modelo de conducción de driving_model.py
 
 # Datos de entrada del modelo
@@ -16,6 +21,19 @@ conv_eff = 0.97     # Eficiencia de conversion energia bateria-motor
 reg_eff = 0.6     # Eficiencia de regeneracion de energia
 Paux = 5000    # Potencia consumida por cargas auxiliares en W. Incluye aire acondicionado, luces, etc.
 
+# Diccionario con los parametros por defecto del bus, para poder sustituirlos en cada calculo
+PARAMETROS_BUS = {
+    "mass_bus": mass_bus,
+    "Af": Af,
+    "air_density": air_density,
+    "Cd": Cd,
+    "Cr": Cr,
+    "motor_eff": motor_eff,
+    "conv_eff": conv_eff,
+    "reg_eff": reg_eff,
+    "Paux": Paux,
+}
+
 # Carpetas de datos
 CARPETA_DATOS_PROCESADOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Processed_data"))
 CARPETA_RESULTADOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "results"))
@@ -23,17 +41,96 @@ CARPETA_RESULTADOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..
 ruta_csv = os.path.join(CARPETA_DATOS_PROCESADOS, "df_driving_model.csv")
 ruta_csv_energy = os.path.join(CARPETA_RESULTADOS, "df_energy_consumption.csv")
 ruta_csv_summary = os.path.join(CARPETA_RESULTADOS, "df_consumption_results.csv")
+ruta_csv_metricas = os.path.join(CARPETA_RESULTADOS, "df_metricas_shape.csv")
+ruta_csv_curvas = os.path.join(CARPETA_RESULTADOS, "df_curvas_consumo.csv")
+ruta_json_parametros = os.path.join(CARPETA_RESULTADOS, "parametros_ejecucion.json")
+
+# Resolución de las curvas guardadas: tramos de distancia por shape_id. De cada tramo se guardan como máximo 6 puntos:
+# el primero, el último y el mínimo y el máximo de P_cons y de E_acum (ver decimacion.py).
+# Las gráficas de plots_generator.py reducen cada eje a unos 4400 tramos, así que se dibujan igual que con todas las filas
+TRAMOS_CURVA = 8192
+
+# Rangos admitidos para cada parametro del bus: (minimo, maximo, minimo incluido)
+RANGOS_PARAMETROS = {
+    "mass_bus": (0.0, math.inf, False),
+    "Af": (0.0, math.inf, True),
+    "air_density": (0.0, math.inf, True),
+    "Cd": (0.0, math.inf, True),
+    "Cr": (0.0, math.inf, True),
+    "motor_eff": (0.0, 1.0, False),
+    "conv_eff": (0.0, 1.0, False),
+    "reg_eff": (0.0, 1.0, True),  # reg_eff = 0 equivale a un bus sin frenada regenerativa
+    "Paux": (0.0, math.inf, True),
+}
+
+# Combinar los parametros por defecto con los indicados por el usuario
+def obtener_parametros(parametros=None):
+    """
+    Devuelve un diccionario con los parámetros del bus, sustituyendo los valores
+    por defecto de PARAMETROS_BUS por los indicados en 'parametros'. Lanza ValueError
+    si algún parámetro es desconocido, no es un número finito o está fuera de su rango
+    (masa y eficiencias de motor y convertidor positivas, eficiencias como máximo 1).
+
+    """
+    resultado = dict(PARAMETROS_BUS)
+    if parametros:
+        desconocidos = set(parametros) - set(PARAMETROS_BUS)
+        if desconocidos:
+            raise ValueError(f"Parámetros del bus desconocidos: {sorted(desconocidos)}. Válidos: {list(PARAMETROS_BUS)}.")
+        for clave, valor in parametros.items():
+            valor = float(valor)
+            minimo, maximo, minimo_incluido = RANGOS_PARAMETROS[clave]
+            if not math.isfinite(valor):
+                raise ValueError(f"El parámetro {clave} debe ser un número finito, no {valor}.")
+            if valor < minimo or (valor == minimo and not minimo_incluido) or valor > maximo:
+                intervalo = f"{'[' if minimo_incluido else '('}{minimo:g}, {maximo:g}]"
+                raise ValueError(f"El parámetro {clave} debe estar en el intervalo {intervalo}, no {valor:g}.")
+            resultado[clave] = valor
+    return resultado
+
+# Guardar junto a los resultados los parametros del bus usados en el calculo
+def guardar_parametros(parametros, ruta=ruta_json_parametros):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(obtener_parametros(parametros), archivo, indent=2, sort_keys=True)
+        archivo.write("\n")
+
+# Leer los parametros del bus guardados por guardar_parametros
+def cargar_parametros(ruta=ruta_json_parametros):
+    with open(ruta, encoding="utf-8") as archivo:
+        return obtener_parametros(json.load(archivo))
+
+# Calculo de las fuerzas sobre arrays de numpy (sin DataFrame), reutilizado por calcular_fuerzas
+def calcular_fuerzas_arrays(inst_vel, inst_acc, angle_rad, parametros=None):
+    """
+    Calcula las fuerzas aerodinámica, gravitacional, de rodadura y de aceleración
+    a partir de arrays de velocidad (m/s), aceleración (m/s²) y ángulo (rad).
+
+    Returns:
+        tuple: (F_aero, F_g, F_roll, F_acc) en N.
+    """
+    p = obtener_parametros(parametros)
+    F_aero = 0.5 * p["Cd"] * p["Af"] * p["air_density"] * inst_vel**2  # Fuerza aerodinámica
+    F_g = p["mass_bus"] * 9.81 * np.sin(angle_rad)                      # Fuerza gravitacional
+    F_roll = p["Cr"] * p["mass_bus"] * 9.81 * np.cos(angle_rad)         # Fuerza de rodadura
+    F_acc = p["mass_bus"] * inst_acc                                    # Fuerza de aceleración
+    return F_aero, F_g, F_roll, F_acc
+
+# Calculo de la potencia consumida sobre arrays de numpy, reutilizado por calcular_potencia_consumida
+def calcular_potencia_consumida_arrays(P_trac, parametros=None):
+    """
+    Calcula la potencia consumida (W) a partir de la potencia de tracción (W),
+    distinguiendo entre tracción y frenada regenerativa.
 
-# Importar el DataFrame desde el archivo CSV df_driving_model
-if os.path.exists(ruta_csv):
-    df_energy_consumption = pd.read_csv(ruta_csv)
-    print("DataFrame df_driving_model cargado correctamente:")
-    print(df_energy_consumption.head())
-else:
-    print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+    """
+    p = obtener_parametros(parametros)
+    return np.where(
+        P_trac > 0,
+        (P_trac / (p["conv_eff"] * p["motor_eff"])) + (p["Paux"] / p["conv_eff"]),  # Caso de consumo
+        (P_trac * p["motor_eff"] * p["reg_eff"]) + (p["Paux"] / p["conv_eff"])     # Caso de regeneración
+    )
 
 # Calcular las fuerzas que actúan sobre el bus
-def calcular_fuerzas(df):
+def calcular_fuerzas(df, parametros=None):
     print("Calculando fuerzas que actúan sobre el bus...")
 
     # Verificar que las columnas necesarias existan
@@ -44,10 +141,9 @@ def calcular_fuerzas(df):
     df['angle_rad'] = np.radians(df['angle_deg'])
 
     # Calcular las fuerzas
-    df['F_aero'] = 0.5 * Cd * Af * air_density * df['inst_vel']**2  # Fuerza aerodinámica
-    df['F_g'] = mass_bus * 9.81 * np.sin(df['angle_rad'])           # Fuerza gravitacional
-    df['F_roll'] = Cr * mass_bus * 9.81 * np.cos(df['angle_rad'])   # Fuerza de rodadura
-    df['F_acc'] = mass_bus * df['inst_acc']                         # Fuerza de aceleración
+    df['F_aero'], df['F_g'], df['F_roll'], df['F_acc'] = calcular_fuerzas_arrays(
+        df['inst_vel'], df['inst_acc'], df['angle_rad'], parametros
+    )
 
     # Calcular la fuerza de tracción
     df['F_trac'] = df['F_aero'] + df['F_g'] + df['F_roll'] + df['F_acc']
@@ -59,13 +155,6 @@ def calcular_fuerzas(df):
     print(df[['F_aero', 'F_g', 'F_roll', 'F_acc', 'F_trac']].head())
     return df
 
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_energy_consumption = calcular_fuerzas(df_energy_consumption)
-    print("DataFrame df_energy_consumption con fuerzas calculadas:")
-    print(df_energy_consumption)
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudieron calcular las fuerzas.")
-
 # Calcular la potencia de traccion
 def calcular_potencia(df):
     print("Calculando potencia de tracción (P_trac)...")
@@ -81,15 +170,8 @@ def calcular_potencia(df):
     print(df[['F_trac', 'inst_vel', 'P_trac']].head())
     return df
 
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_energy_consumption = calcular_potencia(df_energy_consumption)
-    print("DataFrame df_energy_consumption con potencia calculada:")
-    print(df_energy_consumption)
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la potencia.")
-
 # Calcular la potencia consumida por el bus
-def calcular_potencia_consumida(df):
+def calcular_potencia_consumida(df, parametros=None):
     print("Calculando potencia consumida (P_cons)...")
 
     # Verificar que las columnas necesarias existan
@@ -97,23 +179,12 @@ def calcular_potencia_consumida(df):
         raise ValueError("El DataFrame debe contener la columna 'P_trac'.")
 
     # Calcular la potencia consumida
-    df['P_cons'] = np.where(
-        df['P_trac'] > 0,
-        (df['P_trac'] / (conv_eff * motor_eff)) + (Paux / conv_eff),  # Caso de consumo
-        (df['P_trac'] * motor_eff * reg_eff) + (Paux / conv_eff)     # Caso de regeneración
-    )
+    df['P_cons'] = calcular_potencia_consumida_arrays(df['P_trac'].to_numpy(), parametros)
 
     print("Potencia consumida calculada y añadida al DataFrame:")
     print(df[['P_trac', 'P_cons']].head())
     return df
 
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_energy_consumption = calcular_potencia_consumida(df_energy_consumption)
-    print("DataFrame df_energy_consumption con potencia consumida calculada:")
-    print(df_energy_consumption)
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la potencia consumida.")
-
 # Calcular la energía consumida por instante
 def calcular_energia_instantanea(df):
     """
@@ -133,71 +204,193 @@ def calcular_energia_instantanea(df):
     print(df[['P_cons', 'delta_time', 'E_cons']].head())
     return df
 
+# Convertir una serie de tiempos HH:MM:SS a segundos de forma vectorizada
+def tiempo_a_segundos_serie(serie):
+    partes = serie.astype(str).str.split(":", expand=True).astype(int)
+    return partes[0] * 3600 + partes[1] * 60 + partes[2]
 
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_energy_consumption = calcular_energia_instantanea(df_energy_consumption)
-    print("DataFrame df_energy_consumption con energía instantánea calculada:")
-    print(df_energy_consumption)
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la energía instantánea.")
-
-#Creacion de un dataframe con los resultados finales de consumo de energia
-def calcular_resultados_resumen(df):
-    print("Calculando resultados resumen por shape_id...")
+# Calcular en una sola pasada todas las metricas por shape_id que usan el resumen y las graficas
+def calcular_metricas_shape(df):
+    """
+    Calcula en una única agregación agrupada todas las métricas por shape_id:
+    distancia y tiempo total, potencia y energía total, energía recuperada por frenada
+    regenerativa y su porcentaje, peso relativo de cada fuerza, y potencia máxima y media.
+    También calcula la curva de energía acumulada de cada shape.
+
+    Returns:
+        tuple: (metricas, curvas). 'metricas' tiene una fila por shape_id y 'curvas' las
+               columnas 'shape_id', 'shape_dist_traveled', 'P_cons' y 'E_acum', con como
+               máximo 6 * TRAMOS_CURVA puntos por curva de cada shape_id.
+    """
+    print("Calculando métricas por shape_id...")
 
     # Verificar que las columnas necesarias existan
-    if not all(col in df.columns for col in ['shape_id', 'shape_dist_traveled', 'departure_time', 'arrival_time', 'P_cons', 'E_cons']):
-        raise ValueError("El DataFrame debe contener las columnas 'shape_id', 'shape_dist_traveled', 'departure_time', 'arrival_time', 'P_cons' y 'E_cons'.")
-
-    # Convertir departure_time y arrival_time a segundos
-    def tiempo_a_segundos(tiempo):
-        h, m, s = map(int, tiempo.split(":"))
-        return h * 3600 + m * 60 + s
-
-    df['departure_time_seg'] = df['departure_time'].apply(tiempo_a_segundos)
-    df['arrival_time_seg'] = df['arrival_time'].apply(tiempo_a_segundos)
-
-    # Calcular los resultados agregados por shape_id
-    resumen = df.groupby('shape_id').agg(
+    columnas = ['shape_id', 'shape_dist_traveled', 'departure_time', 'arrival_time',
+                'F_aero', 'F_g', 'F_roll', 'F_acc', 'P_trac', 'P_cons', 'E_cons']
+    if not all(col in df.columns for col in columnas):
+        raise ValueError(f"El DataFrame debe contener las columnas {columnas}.")
+
+    # Columnas auxiliares para poder resolver todo con una sola agregación
+    fuerzas = ['F_aero', 'F_g', 'F_roll', 'F_acc']
+    aux = pd.DataFrame({
+        'shape_id': df['shape_id'],
+        'shape_dist_traveled': df['shape_dist_traveled'],
+        'departure_time_seg': tiempo_a_segundos_serie(df['departure_time']),
+        'arrival_time_seg': tiempo_a_segundos_serie(df['arrival_time']),
+        'P_cons': df['P_cons'],
+        'E_cons': df['E_cons'],
+        'E_regen': df['E_cons'].where(df['P_trac'] < 0, 0.0),  # Energía en los instantes de frenada regenerativa
+    })
+    for f in fuerzas:
+        aux[f'{f}_abs'] = df[f].abs()
+
+    metricas = aux.groupby('shape_id').agg(
         tot_dist_traveled=('shape_dist_traveled', 'max'),    # Distancia total recorrida
         tot_time_traveled=('arrival_time_seg', 'max'),       # Último arrival_time en segundos
         first_departure_time=('departure_time_seg', 'min'),  # Primer departure_time en segundos
         tot_P_cons=('P_cons', 'sum'),                        # Potencia total consumida
-        tot_E_cons=('E_cons', 'sum')                         # Energía total consumida en kWh
+        tot_E_cons=('E_cons', 'sum'),                        # Energía total consumida en kWh
+        E_regen=('E_regen', 'sum'),                          # Energía en frenada regenerativa en kWh
+        P_cons_max=('P_cons', 'max'),                        # Potencia máxima consumida
+        P_cons_mean=('P_cons', 'mean'),                      # Potencia media consumida
+        **{f'{f}_abs': (f'{f}_abs', 'sum') for f in fuerzas}
     ).reset_index()
 
     # Calcular el tiempo total recorrido como la diferencia entre el último arrival_time y el primer departure_time
-    resumen['tot_time_traveled'] = resumen['tot_time_traveled'] - resumen['first_departure_time']
+    metricas['tot_time_traveled'] = metricas['tot_time_traveled'] - metricas['first_departure_time']
+    metricas.drop(columns=['first_departure_time'], inplace=True)
 
     # Calcular los kWh consumidos por kilómetro
-    resumen['E_cons_km'] = resumen['tot_E_cons'] / (resumen['tot_dist_traveled'] / 1000)  # Convertir metros a kilómetros
+    metricas['E_cons_km'] = metricas['tot_E_cons'] / (metricas['tot_dist_traveled'] / 1000)  # Convertir metros a kilómetros
+
+    # Porcentaje de energía recuperada respecto al total (0 si el total es 0)
+    metricas['pct_regen'] = np.where(
+        metricas['tot_E_cons'] != 0,
+        metricas['E_regen'].abs() / metricas['tot_E_cons'].where(metricas['tot_E_cons'] != 0, 1) * 100,
+        0.0
+    )
+
+    # Peso relativo de cada fuerza en %
+    suma_fuerzas = metricas[[f'{f}_abs' for f in fuerzas]].sum(axis=1)
+    for f in fuerzas:
+        metricas[f'pct_{f}'] = metricas[f'{f}_abs'] / suma_fuerzas * 100
+
+    # Curvas de potencia y energía acumulada por shape_id, reducidas a TRAMOS_CURVA tramos de distancia.
+    # Se conservan el primer y último punto y los extremos de P_cons y de E_acum de cada tramo
+    curvas = aux[['shape_id', 'shape_dist_traveled', 'P_cons']].copy()
+    curvas['E_acum'] = aux.groupby('shape_id')['E_cons'].cumsum()
+    conservar = np.zeros(len(curvas), dtype=bool)
+    for posiciones in curvas.groupby('shape_id', sort=False).indices.values():
+        x = curvas['shape_dist_traveled'].to_numpy(dtype=np.float64)[posiciones]
+        for col in ['P_cons', 'E_acum']:
+            y = curvas[col].to_numpy(dtype=np.float64)[posiciones]
+            conservar[posiciones[decimar_minmax(x, y, TRAMOS_CURVA)]] = True
+    curvas = curvas[conservar].reset_index(drop=True)
+
+    print("Métricas por shape_id calculadas:")
+    print(metricas)
+    return metricas, curvas
+
+#Creacion de un dataframe con los resultados finales de consumo de energia
+def calcular_resultados_resumen(metricas):
+    print("Calculando resultados resumen por shape_id...")
+
+    # Verificar que las columnas necesarias existan
+    columnas = ['shape_id', 'tot_dist_traveled', 'tot_time_traveled', 'tot_P_cons', 'tot_E_cons', 'E_cons_km']
+    if not all(col in metricas.columns for col in columnas):
+        raise ValueError(f"El DataFrame de métricas debe contener las columnas {columnas}. Usa calcular_metricas_shape.")
 
-    # Eliminar la columna temporal 
-    resumen.drop(columns=['first_departure_time'], inplace=True)
+    # El resumen es un subconjunto de las métricas por shape_id
+    resumen = metricas[columnas].copy()
 
     print("Resultados resumen calculados:")
     print(resumen)
     return resumen
 
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_consumption_results = calcular_resultados_resumen(df_energy_consumption)
-    print("DataFrame df_consumption_results creado con éxito:")
-    print(df_consumption_results)
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudo calcular el resumen de consumo.")
-
-# Exportar los DataFrames a archivos CSV
-if not os.path.exists(CARPETA_RESULTADOS):
-    os.makedirs(CARPETA_RESULTADOS)
-
-if df_energy_consumption is not None and not df_energy_consumption.empty:
-    df_energy_consumption.to_csv(ruta_csv_energy, index=False)
-    print(f"DataFrame df_energy_consumption exportado a {ruta_csv_energy}")
-else:
-    print("El DataFrame df_energy_consumption está vacío. No se pudo exportar.")
-
-if df_consumption_results is not None and not df_consumption_results.empty:
-    df_consumption_results.to_csv(ruta_csv_summary, index=False)
-    print(f"DataFrame df_consumption_results exportado a {ruta_csv_summary}")
-else:
-    print("El DataFrame df_consumption_results está vacío. No se pudo exportar.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consumo de energía del autobús eléctrico a partir de df_driving_model.csv.")
+    parser.add_argument("--parametros", type=json.loads, default=None,
+                        help="Parámetros del bus que sustituyen a los de PARAMETROS_BUS, en JSON (p. ej. '{\"mass_bus\": 16000}')")
+    parser.add_argument("--escenario", default=None,
+                        help="Registrar la ejecución con este nombre de escenario en almacen_resultados.sqlite")
+    parser.add_argument("--ciclos", action="store_true", help="Con --escenario, guardar también los ciclos comprimidos")
+    args = parser.parse_args()
+    parametros = obtener_parametros(args.parametros)
+
+    # Importar el DataFrame desde el archivo CSV df_driving_model
+    df_energy_consumption = None
+    df_consumption_results = None
+    df_metricas_shape = None
+    if os.path.exists(ruta_csv):
+        df_energy_consumption = pd.read_csv(ruta_csv)
+        print("DataFrame df_driving_model cargado correctamente:")
+        print(df_energy_consumption.head())
+    else:
+        print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_energy_consumption = calcular_fuerzas(df_energy_consumption, parametros)
+        print("DataFrame df_energy_consumption con fuerzas calculadas:")
+        print(df_energy_consumption)
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudieron calcular las fuerzas.")
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_energy_consumption = calcular_potencia(df_energy_consumption)
+        print("DataFrame df_energy_consumption con potencia calculada:")
+        print(df_energy_consumption)
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la potencia.")
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_energy_consumption = calcular_potencia_consumida(df_energy_consumption, parametros)
+        print("DataFrame df_energy_consumption con potencia consumida calculada:")
+        print(df_energy_consumption)
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la potencia consumida.")
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_energy_consumption = calcular_energia_instantanea(df_energy_consumption)
+        print("DataFrame df_energy_consumption con energía instantánea calculada:")
+        print(df_energy_consumption)
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudo calcular la energía instantánea.")
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_metricas_shape, df_curvas_consumo = calcular_metricas_shape(df_energy_consumption)
+        df_consumption_results = calcular_resultados_resumen(df_metricas_shape)
+        print("DataFrame df_consumption_results creado con éxito:")
+        print(df_consumption_results)
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudo calcular el resumen de consumo.")
+
+    # Exportar los DataFrames a archivos CSV
+    if not os.path.exists(CARPETA_RESULTADOS):
+        os.makedirs(CARPETA_RESULTADOS)
+
+    if df_energy_consumption is not None and not df_energy_consumption.empty:
+        df_energy_consumption.to_csv(ruta_csv_energy, index=False)
+        print(f"DataFrame df_energy_consumption exportado a {ruta_csv_energy}")
+    else:
+        print("El DataFrame df_energy_consumption está vacío. No se pudo exportar.")
+
+    if df_consumption_results is not None and not df_consumption_results.empty:
+        df_consumption_results.to_csv(ruta_csv_summary, index=False)
+        print(f"DataFrame df_consumption_results exportado a {ruta_csv_summary}")
+    else:
+        print("El DataFrame df_consumption_results está vacío. No se pudo exportar.")
+
+    if df_metricas_shape is not None and not df_metricas_shape.empty:
+        df_metricas_shape.to_csv(ruta_csv_metricas, index=False)
+        df_curvas_consumo.to_csv(ruta_csv_curvas, index=False)
+        guardar_parametros(parametros)
+        print(f"Métricas por shape_id exportadas a {ruta_csv_metricas} y {ruta_csv_curvas}")
+        print(f"Parámetros del bus usados guardados en {ruta_json_parametros}")
+    else:
+        print("El DataFrame df_metricas_shape está vacío. No se pudo exportar.")
+
+    # Registrar la ejecución en el almacén de resultados con los parámetros usados
+    if args.escenario is not None and df_metricas_shape is not None and not df_metricas_shape.empty:
+        from almacen_resultados import registrar_resultados
+
+        registrar_resultados(CARPETA_RESULTADOS, args.escenario, ciclos=args.ciclos)
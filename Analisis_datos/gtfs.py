@@ -1,135 +1,245 @@
+import argparse
+import contextlib
+import json
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
+import time
+import zipfile
+
 import numpy as np
+import pandas as pd
+
+# Este archivo carga los datos GTFS de Raw_data, hace un analisis exploratorio y extrae los trips y horarios de
+# las rutas seleccionadas. Las funciones se pueden importar desde otros scripts (ver ejecutar_lote.py) para
+# cargar el feed una sola vez y procesar varias selecciones seguidas.
+#
+# Ejemplos:
+#   python gtfs.py                                   (usa Raw_data/selecciones.json)
+#   python gtfs.py --rutas 68,116 --servicios LA
+#   python gtfs.py --exploratorio
+#   python gtfs.py --carpeta feeds/google_transit_2025.zip --rutas 68
 
 # Definir carpeta usando os.path.abspath
 CARPETA_DATOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Raw_data"))
+ruta_selecciones = os.path.join(CARPETA_DATOS, "selecciones.json")
+
+ARCHIVOS_ESPERADOS = [
+    "agency.txt",
+    "calendar.txt",
+    "calendar_dates.txt",
+    "frequencies.txt",
+    "routes.txt",
+    "shapes.txt",
+    "stop_times.txt",
+    "stops.txt",
+    "trips.txt"
+]
+
+
+def miembros_zip(archivo_zip):
+    """
+    Relaciona cada archivo del feed con su miembro dentro del zip. Los archivos pueden estar en
+    una subcarpeta del zip; se ignoran las carpetas de metadatos de macOS (__MACOSX) y, si un
+    nombre se repite, se usa el que está a menos profundidad.
+
+    Returns:
+        dict: nombre del archivo (p. ej. 'stops.txt') -> zipfile.ZipInfo.
+    """
+    miembros = {}
+    for info in archivo_zip.infolist():
+        partes = info.filename.split("/")
+        if info.is_dir() or "__MACOSX" in partes or partes[-1].startswith("._"):
+            continue
+        actual = miembros.get(partes[-1])
+        if actual is None or len(partes) < actual.filename.count("/") + 1:
+            miembros[partes[-1]] = info
+    return miembros
+
+
+@contextlib.contextmanager
+def abrir_feed(ruta):
+    """
+    Abre un feed GTFS, ya sea una carpeta con los archivos .txt o un archivo .zip sin descomprimir.
 
-if not os.path.exists(CARPETA_DATOS):
-    raise FileNotFoundError(f"La carpeta especificada no existe: {CARPETA_DATOS}")
-
-print(f"Leyendo archivos GTFS desde la carpeta: {CARPETA_DATOS}")
-archivos_en_carpeta = os.listdir(CARPETA_DATOS)
-print(f"Archivos encontrados en la carpeta: {archivos_en_carpeta}")
-
-#Se crea un diccionario con toda la informacion de los datos
-datos_dict = {}
-
-def cargar_datos():
-    archivos_esperados = [
-        "agency.txt", 
-        "calendar.txt", 
-        "calendar_dates.txt", 
-        "frequencies.txt", 
-        "routes.txt", 
-        "shapes.txt", 
-        "stop_times.txt", 
-        "stops.txt", 
-        "trips.txt"
-    ]
-
-    for archivo in archivos_esperados:
-        ruta = os.path.join(CARPETA_DATOS, archivo)
-        if os.path.exists(ruta):
-            print(f"Intentando cargar: {archivo} desde {ruta}")
-            try:
-                datos_dict[archivo.replace(".txt", "")] = pd.read_csv(ruta, sep=",")  # Cambia sep si es necesario
-                print(f"Archivo cargado: {archivo} con {datos_dict[archivo.replace('.txt', '')].shape[0]} filas")
-            except pd.errors.EmptyDataError:
-                print(f"Error: El archivo {archivo} está vacío.")
-            except pd.errors.ParserError as e:
-                print(f"Error de formato en {archivo}: {e}")
-            except Exception as e:
-                print(f"Error inesperado en {archivo}: {e}")
-        else:
-            print(f"Archivo no encontrado: {archivo}")
+    Yields:
+        dict: nombre del archivo -> función sin argumentos que abre el archivo en modo binario
+              (el miembro del zip se descomprime en streaming mientras pd.read_csv lo lee).
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"La carpeta especificada no existe: {ruta}")
+
+    if os.path.isdir(ruta):
+        yield {archivo: (lambda r=os.path.join(ruta, archivo): open(r, "rb")) for archivo in os.listdir(ruta)}
+    elif zipfile.is_zipfile(ruta):
+        with zipfile.ZipFile(ruta) as archivo_zip:
+            yield {archivo: (lambda i=info: archivo_zip.open(i)) for archivo, info in miembros_zip(archivo_zip).items()}
+    else:
+        raise ValueError(f"El feed debe ser una carpeta o un archivo .zip: {ruta}")
+
+
+def cargar_datos(carpeta=CARPETA_DATOS):
+    """
+    Carga los archivos GTFS de la carpeta o del archivo .zip en un diccionario de DataFrames.
+    Los miembros del zip se leen directamente del archivo comprimido, sin extraerlos a disco.
+
+    Args:
+        carpeta (str): Carpeta con los archivos GTFS (.txt) o archivo .zip del feed.
+
+    Returns:
+        dict: Nombre del archivo sin extensión -> DataFrame. Los archivos que no existen
+              o no se pueden leer no se incluyen.
+    """
+    print(f"Leyendo archivos GTFS desde: {carpeta}")
+
+    # Se crea un diccionario con toda la informacion de los datos
+    datos_dict = {}
+    with abrir_feed(carpeta) as archivos:
+        print(f"Archivos encontrados: {sorted(archivos)}")
+        for archivo in ARCHIVOS_ESPERADOS:
+            if archivo in archivos:
+                print(f"Intentando cargar: {archivo}")
+                try:
+                    # utf-8-sig elimina el BOM que algunos feeds incluyen al principio de agency.txt
+                    with archivos[archivo]() as origen:
+                        datos_dict[archivo.replace(".txt", "")] = pd.read_csv(origen, sep=",", encoding="utf-8-sig")  # Cambia sep si es necesario
+                    print(f"Archivo cargado: {archivo} con {datos_dict[archivo.replace('.txt', '')].shape[0]} filas")
+                except pd.errors.EmptyDataError:
+                    print(f"Error: El archivo {archivo} está vacío.")
+                except pd.errors.ParserError as e:
+                    print(f"Error de formato en {archivo}: {e}")
+                except Exception as e:
+                    print(f"Error inesperado en {archivo}: {e}")
+            else:
+                print(f"Archivo no encontrado: {archivo}")
 
     if not datos_dict:
         print("El diccionario 'datos_dict' está vacío. Verifica los archivos en la carpeta especificada.")
     else:
         print(f"Archivos cargados exitosamente: {list(datos_dict.keys())}")
+    return datos_dict
+
+
+def tablas_con_tipos(datos_texto):
+    """
+    Convierte las tablas cargadas como texto (validador_gtfs.cargar_tablas) a los mismos tipos
+    que asigna cargar_datos: las columnas con todos sus valores enteros pasan a int64 y las
+    numéricas o con valores vacíos a float64. Permite validar el feed y usarlo después sin
+    leerlo dos veces.
+
+    Returns:
+        dict: Nombre del archivo sin extensión -> DataFrame, como el que devuelve cargar_datos.
+    """
+    datos_dict = {}
+    for nombre, df in datos_texto.items():
+        datos_dict[nombre] = pd.DataFrame({col: _columna_con_tipo(df[col]) for col in df.columns}, index=df.index)
+    return datos_dict
+
+
+# Convertir una columna de texto a int64 o float64 si todos sus valores lo permiten. Se prueban antes las primeras
+# filas para no recorrer entera una columna de texto (trip_id, horarios...)
+def _columna_con_tipo(serie):
+    for tipo in (np.int64, np.float64):
+        try:
+            serie.head(1000).to_numpy(dtype=object).astype(tipo)
+            return pd.Series(serie.to_numpy(dtype=object).astype(tipo), index=serie.index, name=serie.name)
+        except (ValueError, TypeError, OverflowError):
+            continue
+    return serie
+
+
+# Comprobar que una tabla del feed se cargó y no está vacía
+def _tabla_disponible(datos_dict, nombre):
+    if datos_dict.get(nombre) is None or datos_dict[nombre].empty:
+        print(f"El archivo {nombre}.txt está vacío o no se cargó correctamente.")
+        return False
+    return True
+
+
+def analisis_exploratorio(datos_dict):
+    """
+    Muestra la ruta con el shape_id de mayor distancia, la ruta con más trips, la ruta
+    con más paradas y las route_id disponibles.
+
+    """
+    # Calcular la ruta con el shape_id de mayor distancia recorrida
+    if _tabla_disponible(datos_dict, "shapes"):
+        print("Calculando la ruta con el shape_id de mayor distancia recorrida...")
+        distancias = datos_dict["shapes"].groupby('shape_id')['shape_dist_traveled'].max()
+        print(f"Shape ID con mayor distancia recorrida: {distancias.idxmax()} con {distancias.max()} unidades de distancia.")
+
+    # Calcular la ruta con el mayor número de trips (contando ambos sentidos)
+    if _tabla_disponible(datos_dict, "trips"):
+        trips = datos_dict["trips"]
+        print("Calculando la ruta con el mayor número de trips...")
+        trips_count = trips.groupby('route_id')['trip_id'].count().reset_index(name='num_trips')
+        route_max_trips = trips_count.loc[trips_count['num_trips'].idxmax()]
+        print(f"Route ID con mayor número de trips: {route_max_trips['route_id']} con {route_max_trips['num_trips']} trips.")
+
+        # Calcular la ruta con el mayor número de paradas
+        if _tabla_disponible(datos_dict, "stop_times"):
+            print("Calculando la ruta con el mayor número de paradas...")
+            stops_count = datos_dict["stop_times"].merge(trips, on="trip_id").groupby('route_id')['stop_id'].nunique().reset_index(name='num_stops')
+            route_max_stops = stops_count.loc[stops_count['num_stops'].idxmax()]
+            print(f"Route ID con mayor número de paradas: {route_max_stops['route_id']} con {route_max_stops['num_stops']} paradas.")
+
+    # Mostrar todas las route_id disponibles
+    if _tabla_disponible(datos_dict, "routes"):
+        print("Route IDs disponibles:")
+        print(datos_dict["routes"]["route_id"].unique())
+
+
+def seleccionar_rutas(datos_dict, rutas_seleccionadas, servicios_seleccionados=None):
+    """
+    Extrae los trips de las rutas seleccionadas con la hora de inicio y final de cada trip.
+
+    Args:
+        datos_dict (dict): Datos GTFS devueltos por cargar_datos.
+        rutas_seleccionadas (list): route_id de las rutas a analizar.
+        servicios_seleccionados (list): service_id a conservar. Si es None se conservan todos.
+
+    Returns:
+        pd.DataFrame: DataFrame df_gtfs_routes con las columnas de trips.txt, 'hora_inicio' y 'hora_final'.
+    """
+    routes = datos_dict["routes"]
+    trips = datos_dict["trips"]
+    stop_times = datos_dict["stop_times"]
+
+    # Filtrar las rutas seleccionadas
+    routes_filtradas = routes[routes["route_id"].isin(rutas_seleccionadas)]
+    if routes_filtradas.empty:
+        print("No se encontraron rutas con los IDs seleccionados.")
+    else:
+        print(f"Rutas seleccionadas: {routes_filtradas.shape[0]} filas.")
+        print(routes_filtradas)
+
+    # Extraer los trips de las rutas (y servicios) seleccionados
+    trips_filtrados = trips[trips["route_id"].isin(rutas_seleccionadas)]
+    if servicios_seleccionados is not None:
+        trips_filtrados = trips_filtrados[trips_filtrados["service_id"].isin(servicios_seleccionados)]
+    if trips_filtrados.empty:
+        print("No se encontraron trips para las rutas seleccionadas.")
+    else:
+        print(f"Trips encontrados: {trips_filtrados.shape[0]} filas.")
+
+    # Obtener la hora de inicio y final de cada trip desde stop_times
+    stop_times_filtrados = stop_times[stop_times["trip_id"].isin(trips_filtrados["trip_id"])]
+    horarios_trips = stop_times_filtrados.groupby("trip_id").agg(
+        hora_inicio=("departure_time", "min"),
+        hora_final=("arrival_time", "max")
+    ).reset_index()
+
+    # Combinar la información de trips, shapes y horarios
+    df_gtfs_routes = trips_filtrados.merge(horarios_trips, on="trip_id", how="left")
+
+    if df_gtfs_routes.empty:
+        print("El DataFrame df_gtfs_routes está vacío después del merge.")
+    else:
+        print(f"DataFrame df_gtfs_routes creado con éxito: {df_gtfs_routes.shape[0]} filas.")
+        print(df_gtfs_routes.head())
+    return df_gtfs_routes
 
-cargar_datos()
-
-# Calcular la ruta con el shape_id de mayor distancia recorrida
-shapes = datos_dict["shapes"]
-if shapes.empty:
-    print("El archivo shapes.txt está vacío o no se cargó correctamente.")
-else:
-    print("Calculando la ruta con el shape_id de mayor distancia recorrida...")
-    shapes['distance'] = shapes.groupby('shape_id')['shape_dist_traveled'].transform('max')
-    shape_max_distance = shapes.loc[shapes['distance'].idxmax()]
-    print(f"Shape ID con mayor distancia recorrida: {shape_max_distance['shape_id']} con {shape_max_distance['distance']} unidades de distancia.")
-
-# Calcular la ruta con el mayor número de trips (contando ambos sentidos)
-trips = datos_dict["trips"]
-if trips.empty:
-    print("El archivo trips.txt está vacío o no se cargó correctamente.")
-else:
-    print("Calculando la ruta con el mayor número de trips...")
-    trips_count = trips.groupby('route_id')['trip_id'].count().reset_index(name='num_trips')
-    route_max_trips = trips_count.loc[trips_count['num_trips'].idxmax()]
-    print(f"Route ID con mayor número de trips: {route_max_trips['route_id']} con {route_max_trips['num_trips']} trips.")
-
-# Calcular la ruta con el mayor número de paradas
-stop_times = datos_dict["stop_times"]
-if stop_times.empty:
-    print("El archivo stop_times.txt está vacío o no se cargó correctamente.")
-else:
-    print("Calculando la ruta con el mayor número de paradas...")
-    stops_count = stop_times.merge(trips, on="trip_id").groupby('route_id')['stop_id'].nunique().reset_index(name='num_stops')
-    route_max_stops = stops_count.loc[stops_count['num_stops'].idxmax()]
-    print(f"Route ID con mayor número de paradas: {route_max_stops['route_id']} con {route_max_stops['num_stops']} paradas.")
-
-# Mostrar todas las route_id disponibles
-routes = datos_dict["routes"]
-if routes.empty:
-    print("El archivo routes.txt está vacío o no se cargó correctamente.")
-else:
-    print("Route IDs disponibles:")
-    print(routes["route_id"].unique())
-
-# Seleccionar las rutas a analizar
-rutas_seleccionadas = input("Introduce las route_id seleccionadas separadas por comas: ")
-rutas_seleccionadas = [int(ruta.strip()) for ruta in rutas_seleccionadas.split(",")]
-
-# Filtrar las rutas seleccionadas
-routes_filtradas = routes[routes["route_id"].isin(rutas_seleccionadas)]
-if routes_filtradas.empty:
-    print("No se encontraron rutas con los IDs seleccionados.")
-else:
-    print(f"Rutas seleccionadas: {routes_filtradas.shape[0]} filas.")
-    print(routes_filtradas)
-
-# Extraer los trips y shapes correspondientes a las rutas seleccionadas
-trips = datos_dict["trips"]
-stop_times = datos_dict["stop_times"]
-
-trips_filtrados = trips[trips["route_id"].isin(rutas_seleccionadas)]
-if trips_filtrados.empty:
-    print("No se encontraron trips para las rutas seleccionadas.")
-else:
-    print(f"Trips encontrados: {trips_filtrados.shape[0]} filas.")
-
-# Obtener la hora de inicio y final de cada trip desde stop_times
-stop_times_filtrados = stop_times[stop_times["trip_id"].isin(trips_filtrados["trip_id"])]
-horarios_trips = stop_times_filtrados.groupby("trip_id").agg(
-    hora_inicio=("departure_time", "min"),
-    hora_final=("arrival_time", "max")
-).reset_index()
-
-# Combinar la información de trips, shapes y horarios
-df_gtfs_routes = trips_filtrados.merge(horarios_trips, on="trip_id", how="left")
-
-if df_gtfs_routes.empty:
-    print("El DataFrame df_gtfs_routes está vacío después del merge.")
-else:
-    print(f"DataFrame df_gtfs_routes creado con éxito: {df_gtfs_routes.shape[0]} filas.")
-    print(df_gtfs_routes.head())
 
 # Crear un DataFrame con información resumida por service_id y shape_id
-def calcular_resumen_service_shape(df):
+def calcular_resumen_service_shape(df, datos_dict):
     """
     Calcula un resumen con el número total de trips por service_id y shape_id,
     la duración media de los trayectos por service_id, un trip_id de ejemplo,
@@ -137,6 +247,7 @@ def calcular_resumen_service_shape(df):
 
     Args:
         df (pd.DataFrame): DataFrame con las columnas necesarias para el cálculo.
+        datos_dict (dict): Datos GTFS devueltos por cargar_datos (se usan stop_times y shapes).
 
     Returns:
         pd.DataFrame: DataFrame con las columnas 'service_id', 'shape_id', 'num_trips',
@@ -150,6 +261,9 @@ def calcular_resumen_service_shape(df):
     if not all(col in df.columns for col in required_columns):
         raise ValueError(f"El DataFrame debe contener las columnas {required_columns}.")
 
+    # Trabajar sobre una copia para no modificar df_gtfs_routes
+    df = df.copy()
+
     # Convertir hora_inicio y hora_final a formato datetime si no lo están
     df['hora_inicio'] = pd.to_datetime(df['hora_inicio'], format="%H:%M:%S", errors="coerce")
     df['hora_final'] = pd.to_datetime(df['hora_final'], format="%H:%M:%S", errors="coerce")
@@ -157,13 +271,15 @@ def calcular_resumen_service_shape(df):
     # Calcular la duración de cada trip en segundos
     df['trip_duration'] = (df['hora_final'] - df['hora_inicio']).dt.total_seconds()
 
-    # Calcular el número de paradas por trip
+    # Calcular el número de paradas por trip (solo de los trips del DataFrame)
     stop_times = datos_dict["stop_times"]
+    stop_times = stop_times[stop_times['trip_id'].isin(df['trip_id'])]
     stops_per_trip = stop_times.groupby('trip_id')['stop_id'].nunique().reset_index(name='num_stops')
     df = df.merge(stops_per_trip, on='trip_id', how='left')
 
-    # Calcular la distancia total recorrida por trip
+    # Calcular la distancia total recorrida por trip (solo de los shapes del DataFrame)
     shapes = datos_dict["shapes"]
+    shapes = shapes[shapes['shape_id'].isin(df['shape_id'])]
     distances_per_trip = shapes.groupby('shape_id')['shape_dist_traveled'].max().reset_index(name='total_distance')
     df = df.merge(distances_per_trip, on='shape_id', how='left')
 
@@ -184,33 +300,92 @@ def calcular_resumen_service_shape(df):
     print(resumen)
     return resumen
 
-# Calcular el DataFrame resumen de service_id y shape_id
-if df_gtfs_routes is not None and not df_gtfs_routes.empty:
-    # Guardar el DataFrame df_gtfs_routes como un archivo CSV en la carpeta Raw_data
-    ruta_csv_gtfs_routes = os.path.join(CARPETA_DATOS, "df_gtfs_routes.csv")
+
+def cargar_selecciones(ruta=ruta_selecciones):
+    """
+    Lee las selecciones de rutas de un archivo JSON. El archivo puede contener una selección
+    (un objeto con 'rutas_seleccionadas' y, opcionalmente, 'servicios_seleccionados' y 'nombre')
+    o una lista de selecciones.
+
+    Returns:
+        list: Lista de diccionarios con 'nombre', 'rutas_seleccionadas' y 'servicios_seleccionados'.
+    """
+    with open(ruta, encoding="utf-8") as archivo:
+        contenido = json.load(archivo)
+
+    selecciones = []
+    for i, seleccion in enumerate(contenido if isinstance(contenido, list) else [contenido]):
+        if "rutas_seleccionadas" not in seleccion:
+            raise ValueError(f"La selección {i} de {ruta} no tiene la clave 'rutas_seleccionadas'.")
+        selecciones.append({
+            "nombre": seleccion.get("nombre", f"seleccion_{i + 1}"),
+            "rutas_seleccionadas": seleccion["rutas_seleccionadas"],
+            "servicios_seleccionados": seleccion.get("servicios_seleccionados"),
+        })
+    return selecciones
+
+
+def procesar_seleccion(datos_dict, rutas_seleccionadas, servicios_seleccionados=None, carpeta_salida=CARPETA_DATOS):
+    """
+    Extrae los trips de una selección de rutas, calcula el resumen por service_id y shape_id
+    y guarda df_gtfs_routes.csv y df_service_shape_summary.csv en 'carpeta_salida'.
+
+    Returns:
+        tuple: (df_gtfs_routes, df_service_shape_summary). El resumen es None si no hay trips.
+    """
+    df_gtfs_routes = seleccionar_rutas(datos_dict, rutas_seleccionadas, servicios_seleccionados)
+    if df_gtfs_routes is None or df_gtfs_routes.empty:
+        print("El DataFrame df_gtfs_routes está vacío. No se pudo calcular el resumen.")
+        return df_gtfs_routes, None
+
+    # Guardar el DataFrame df_gtfs_routes como un archivo CSV
+    os.makedirs(carpeta_salida, exist_ok=True)
+    ruta_csv_gtfs_routes = os.path.join(carpeta_salida, "df_gtfs_routes.csv")
     df_gtfs_routes.to_csv(ruta_csv_gtfs_routes, index=False)
     print(f"DataFrame df_gtfs_routes guardado en: {ruta_csv_gtfs_routes}")
 
     # Calcular el DataFrame resumen de service_id y shape_id
-    df_service_shape_summary = calcular_resumen_service_shape(df_gtfs_routes)
+    df_service_shape_summary = calcular_resumen_service_shape(df_gtfs_routes, datos_dict)
     print("DataFrame df_service_shape_summary creado con éxito:")
     print(df_service_shape_summary)
-    
-    # Guardar el DataFrame df_service_shape_summary como un archivo CSV en la carpeta Raw_data
-    ruta_csv_service_shape_summary = os.path.join(CARPETA_DATOS, "df_service_shape_summary.csv")
+
+    # Guardar el DataFrame df_service_shape_summary como un archivo CSV
+    ruta_csv_service_shape_summary = os.path.join(carpeta_salida, "df_service_shape_summary.csv")
     df_service_shape_summary.to_csv(ruta_csv_service_shape_summary, index=False)
     print(f"Resumen guardado en: {ruta_csv_service_shape_summary}")
-else:
-    print("El DataFrame df_gtfs_routes está vacío. No se pudo calcular el resumen.")
-
-
-
-
-
-
-
-
-
-
-
-
+    return df_gtfs_routes, df_service_shape_summary
+
+
+# Convertir una lista separada por comas en una lista de route_id (enteros, como en routes.txt) o service_id
+def _lista_argumento(texto, tipo=str):
+    return [tipo(valor.strip()) for valor in texto.split(",") if valor.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Análisis de los datos GTFS y extracción de las rutas seleccionadas.")
+    parser.add_argument("--carpeta", default=CARPETA_DATOS, help="Carpeta con los archivos GTFS (.txt) o archivo .zip del feed")
+    parser.add_argument("--rutas", default=None, help="route_id separadas por comas, p. ej. 68,116")
+    parser.add_argument("--servicios", default=None, help="service_id separados por comas, p. ej. LA,SA")
+    parser.add_argument("--selecciones", default=ruta_selecciones,
+                        help="JSON con la selección de rutas, si no se indica --rutas")
+    parser.add_argument("--exploratorio", action="store_true", help="Mostrar el análisis exploratorio del feed")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    datos_dict = cargar_datos(args.carpeta)
+    print(f"Datos GTFS cargados en {time.perf_counter() - inicio:.2f} s")
+
+    if args.exploratorio:
+        analisis_exploratorio(datos_dict)
+
+    # Los resultados se guardan junto a los archivos del feed, o en Raw_data si el feed es un .zip
+    carpeta_salida = args.carpeta if os.path.isdir(args.carpeta) else CARPETA_DATOS
+
+    if args.rutas is not None:
+        servicios = _lista_argumento(args.servicios) if args.servicios is not None else None
+        procesar_seleccion(datos_dict, _lista_argumento(args.rutas, int), servicios, carpeta_salida)
+    elif not args.exploratorio:
+        # Sin --rutas se usa la primera selección del archivo JSON (ejecutar_lote.py procesa todas)
+        seleccion = cargar_selecciones(args.selecciones)[0]
+        print(f"Selección leída de {args.selecciones}: {seleccion}")
+        procesar_seleccion(datos_dict, seleccion["rutas_seleccionadas"], seleccion["servicios_seleccionados"], carpeta_salida)
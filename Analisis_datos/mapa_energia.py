@@ -0,0 +1,278 @@
+import argparse
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from matplotlib.colors import Normalize, TwoSlopeNorm
+
+# Este archivo genera un mapa de toda la red con la intensidad de consumo energetico. En lugar de dibujar
+# cada punto o linea como un objeto de matplotlib, agrega todos los puntos simulados en una rejilla fija
+# de pixeles con np.bincount, de modo que el tiempo de dibujo no depende del numero de lineas.
+
+# Definir carpetas usando os.path.abspath
+CARPETA_DATOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Processed_data"))
+CARPETA_RAW = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Raw_data"))
+CARPETA_RESULTADOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "results"))
+CARPETA_GRAFICAS_MAPA = os.path.join(CARPETA_DATOS, "Graficas_Mapa")
+
+ruta_csv_energy = os.path.join(CARPETA_RESULTADOS, "df_energy_consumption.csv")
+ruta_stops = os.path.join(CARPETA_RAW, "stops.txt")
+
+TAMANO_TESELA = 256  # Píxeles por lado de cada tesela
+COLOR_PARADAS = (0.0, 0.85, 0.3, 0.8)  # Color RGBA de los píxeles con paradas (verde, fuera de coolwarm e inferno)
+PERCENTILES_COLOR = (2, 98)  # Percentiles que fijan los límites de la escala de color
+
+# Etiqueta de la barra de color y agregación por píxel de cada magnitud
+MAGNITUDES = {
+    "E_cons": ("Energía consumida (kWh)", "suma"),
+    "P_cons": ("Potencia consumida media (kW)", "media"),
+}
+
+
+def calcular_extension(lat, lon, margen=0.02):
+    """
+    Devuelve la extensión (lon_min, lon_max, lat_min, lat_max) que contiene todos los
+    puntos, ampliada un 'margen' relativo por cada lado.
+
+    """
+    lon_min, lon_max = np.nanmin(lon), np.nanmax(lon)
+    lat_min, lat_max = np.nanmin(lat), np.nanmax(lat)
+    d_lon = (lon_max - lon_min) * margen or 1e-3
+    d_lat = (lat_max - lat_min) * margen or 1e-3
+    return lon_min - d_lon, lon_max + d_lon, lat_min - d_lat, lat_max + d_lat
+
+
+# Calcular el alto en pixeles de la rejilla manteniendo la proporcion real (proyeccion equirectangular)
+def alto_rejilla(extension, ancho):
+    lon_min, lon_max, lat_min, lat_max = extension
+    factor = np.cos(np.radians((lat_min + lat_max) / 2))
+    return max(1, int(round(ancho * (lat_max - lat_min) / ((lon_max - lon_min) * factor))))
+
+
+def rasterizar(lat, lon, pesos, extension, ancho, alto):
+    """
+    Agrega los puntos en una rejilla de alto x ancho píxeles con np.bincount.
+    La fila 0 corresponde a la latitud mínima.
+
+    Returns:
+        tuple: (suma, cuenta). 'suma' es la suma de 'pesos' por píxel (o el número de
+               puntos si pesos es None) y 'cuenta' el número de puntos por píxel.
+    """
+    lon_min, lon_max, lat_min, lat_max = extension
+    col = np.floor((lon - lon_min) / (lon_max - lon_min) * ancho).astype(np.int64)
+    fila = np.floor((lat - lat_min) / (lat_max - lat_min) * alto).astype(np.int64)
+
+    # Descartar los puntos fuera de la extensión
+    dentro = (col >= 0) & (col < ancho) & (fila >= 0) & (fila < alto)
+    indice = fila[dentro] * ancho + col[dentro]
+
+    cuenta = np.bincount(indice, minlength=ancho * alto).reshape(alto, ancho)
+    if pesos is None:
+        return cuenta.astype(np.float64), cuenta
+    suma = np.bincount(indice, weights=pesos[dentro], minlength=ancho * alto).reshape(alto, ancho)
+    return suma, cuenta
+
+
+# Valores de la magnitud por punto (P_cons en kW)
+def pesos_magnitud(df, magnitud):
+    pesos = df[magnitud].to_numpy(dtype=np.float64)
+    return pesos / 1000 if magnitud == "P_cons" else pesos
+
+
+def agregar_magnitud(df, magnitud, extension, ancho, alto):
+    """
+    Rasteriza la magnitud indicada ('E_cons' o 'P_cons') sobre la rejilla.
+    E_cons se suma por píxel y P_cons se promedia (en kW).
+
+    """
+    _, agregacion = MAGNITUDES[magnitud]
+    pesos = pesos_magnitud(df, magnitud)
+    suma, cuenta = rasterizar(
+        df["shape_pt_lat"].to_numpy(dtype=np.float64), df["shape_pt_lon"].to_numpy(dtype=np.float64),
+        pesos, extension, ancho, alto
+    )
+    if agregacion == "media":
+        suma = np.divide(suma, cuenta, out=np.zeros_like(suma), where=cuenta > 0)
+    return suma, cuenta
+
+
+# Elegir la escala de color con los límites en los percentiles PERCENTILES_COLOR, para que unos pocos píxeles
+# extremos no dejen el resto del mapa en un solo color. Si el rango incluye valores negativos (frenada
+# regenerativa) se usa una escala divergente con el 0 en el color neutro y cada lado hasta su percentil
+def escala_color(valores):
+    if valores.size == 0:
+        return Normalize(vmin=0, vmax=1.0), plt.get_cmap("inferno")
+    vmin, vmax = (float(v) for v in np.percentile(valores, PERCENTILES_COLOR))
+    if vmin < 0 < vmax:
+        return TwoSlopeNorm(vcenter=0, vmin=vmin, vmax=vmax), plt.get_cmap("coolwarm")
+    if vmax <= vmin:
+        vmax = vmin + (abs(vmin) or 1.0)
+    return Normalize(vmin=vmin, vmax=vmax), plt.get_cmap("inferno")
+
+
+def componer_imagen(valores, cuenta, cuenta_paradas, norma, cmap):
+    """
+    Convierte la rejilla agregada en una imagen RGBA: los píxeles sin puntos quedan
+    transparentes, los píxeles con paradas se pintan con COLOR_PARADAS y los píxeles con puntos
+    simulados se colorean según la escala por encima de las paradas.
+
+    """
+    rgba = np.zeros(valores.shape + (4,))
+    rgba[cuenta_paradas > 0] = COLOR_PARADAS
+    con_puntos = cuenta > 0
+    rgba[con_puntos] = cmap(norma(valores[con_puntos]))
+    return rgba
+
+
+def guardar_mapa(valores, cuenta, cuenta_paradas, extension, magnitud, ruta):
+    """
+    Guarda el mapa completo con barra de color. Se dibuja una sola imagen, por lo que el
+    tiempo de dibujo depende del tamaño de la rejilla y no del número de rutas.
+
+    """
+    etiqueta, _ = MAGNITUDES[magnitud]
+    lon_min, lon_max, lat_min, lat_max = extension
+    norma, cmap = escala_color(valores[cuenta > 0])
+
+    alto, ancho = valores.shape
+    fig, ax = plt.subplots(figsize=(12, 12 * alto / ancho + 1))
+    ax.set_facecolor("#202020")
+    ax.imshow(
+        componer_imagen(valores, cuenta, cuenta_paradas, norma, cmap),
+        extent=extension, origin="lower", interpolation="nearest",
+        aspect=1 / np.cos(np.radians((lat_min + lat_max) / 2))
+    )
+    fig.colorbar(plt.cm.ScalarMappable(norm=norma, cmap=cmap), ax=ax, label=etiqueta, shrink=0.8)
+    ax.set_xlabel("Longitud")
+    ax.set_ylabel("Latitud")
+    ax.set_title(f"Mapa de intensidad energética de la red ({magnitud}, paradas en verde)")
+    plt.tight_layout()
+    plt.savefig(ruta, format="jpg", dpi=150)
+    plt.close()
+    print(f"Mapa guardado: {ruta}")
+
+
+# Posicion en pixeles de cada punto en una rejilla de lado x lado con la fila 0 al norte, como en las teselas
+# de mapas web. Devuelve tambien la mascara de los puntos dentro de la extension
+def pixeles_nivel(lat, lon, extension, lado):
+    lon_min, lon_max, lat_min, lat_max = extension
+    col = np.floor((lon - lon_min) / (lon_max - lon_min) * lado).astype(np.int64)
+    fila = lado - 1 - np.floor((lat - lat_min) / (lat_max - lat_min) * lado).astype(np.int64)
+    dentro = (col >= 0) & (col < lado) & (fila >= 0) & (fila < lado)
+    return col[dentro], fila[dentro], dentro
+
+
+# Agrupar los puntos por tesela: devuelve el orden de los puntos agrupados y el indice de tesela ordenado
+def agrupar_por_tesela(col, fila, n):
+    tesela = (col // TAMANO_TESELA) * n + fila // TAMANO_TESELA
+    orden = np.argsort(tesela, kind="stable")
+    return orden, tesela[orden]
+
+
+# Agregar en una rejilla de TAMANO_TESELA x TAMANO_TESELA los puntos de una tesela
+def rasterizar_tesela(col, fila, pesos=None):
+    indice = (fila % TAMANO_TESELA) * TAMANO_TESELA + col % TAMANO_TESELA
+    forma = (TAMANO_TESELA, TAMANO_TESELA)
+    cuenta = np.bincount(indice, minlength=TAMANO_TESELA ** 2).reshape(forma)
+    if pesos is None:
+        return None, cuenta
+    return np.bincount(indice, weights=pesos, minlength=TAMANO_TESELA ** 2).reshape(forma), cuenta
+
+
+def generar_teselas(df, lat_paradas, lon_paradas, magnitud, extension, nivel_max, carpeta):
+    """
+    Genera teselas PNG de TAMANO_TESELA píxeles para los niveles de zoom 0..nivel_max
+    en carpeta/{z}/{x}/{y}.png. En el nivel z la extensión se divide en 2^z x 2^z teselas.
+    Cada tesela agrega solo los puntos que caen en ella, así que la memoria no crece con
+    el nivel de zoom, y las teselas sin puntos ni paradas no se calculan ni se escriben.
+
+    """
+    _, agregacion = MAGNITUDES[magnitud]
+    lat = df["shape_pt_lat"].to_numpy(dtype=np.float64)
+    lon = df["shape_pt_lon"].to_numpy(dtype=np.float64)
+    pesos = pesos_magnitud(df, magnitud)
+
+    num_teselas = 0
+    for z in range(nivel_max + 1):
+        n = 2 ** z
+        lado = TAMANO_TESELA * n
+        col, fila, dentro = pixeles_nivel(lat, lon, extension, lado)
+        pesos_nivel = pesos[dentro]
+        col_paradas, fila_paradas, _ = pixeles_nivel(lat_paradas, lon_paradas, extension, lado)
+
+        # Escala de color del nivel a partir de los píxeles con puntos, agregados sin construir la rejilla completa
+        _, pixel = np.unique(fila * lado + col, return_inverse=True)
+        valores_pixeles = np.bincount(pixel, weights=pesos_nivel)
+        if agregacion == "media":
+            valores_pixeles = valores_pixeles / np.bincount(pixel)
+        norma, cmap = escala_color(valores_pixeles)
+
+        orden, teselas = agrupar_por_tesela(col, fila, n)
+        orden_paradas, teselas_paradas = agrupar_por_tesela(col_paradas, fila_paradas, n)
+        for tesela in np.union1d(teselas, teselas_paradas):
+            x, y = divmod(int(tesela), n)
+            puntos = orden[np.searchsorted(teselas, tesela):np.searchsorted(teselas, tesela, side="right")]
+            paradas = orden_paradas[np.searchsorted(teselas_paradas, tesela):
+                                    np.searchsorted(teselas_paradas, tesela, side="right")]
+
+            valores, cuenta = rasterizar_tesela(col[puntos], fila[puntos], pesos_nivel[puntos])
+            if agregacion == "media":
+                valores = np.divide(valores, cuenta, out=np.zeros_like(valores), where=cuenta > 0)
+            _, cuenta_paradas = rasterizar_tesela(col_paradas[paradas], fila_paradas[paradas])
+
+            carpeta_tesela = os.path.join(carpeta, str(z), str(x))
+            os.makedirs(carpeta_tesela, exist_ok=True)
+            plt.imsave(os.path.join(carpeta_tesela, f"{y}.png"),
+                       componer_imagen(valores, cuenta, cuenta_paradas, norma, cmap))
+            num_teselas += 1
+    print(f"Teselas guardadas en {carpeta}: {num_teselas} (niveles 0-{nivel_max})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mapa rasterizado de intensidad energética de toda la red.")
+    parser.add_argument("--magnitud", choices=list(MAGNITUDES), default="E_cons")
+    parser.add_argument("--ancho", type=int, default=1200, help="Ancho del mapa en píxeles de la rejilla")
+    parser.add_argument("--red", action="store_true",
+                        help="Usar la extensión de todas las paradas de stops.txt en lugar de la de los puntos simulados")
+    parser.add_argument("--teselas", type=int, default=None, metavar="NIVEL_MAX",
+                        help="Generar también teselas hasta el nivel de zoom indicado")
+    args = parser.parse_args()
+
+    if not os.path.exists(ruta_csv_energy):
+        raise FileNotFoundError(f"No se encontró el archivo CSV en la ruta: {ruta_csv_energy}. Ejecuta energy_consumption.py.")
+
+    inicio = time.perf_counter()
+    df_energy = pd.read_csv(ruta_csv_energy, usecols=["shape_pt_lat", "shape_pt_lon", args.magnitud])
+    df_energy = df_energy.dropna()
+    print(f"Puntos simulados cargados: {len(df_energy)}")
+
+    if os.path.exists(ruta_stops):
+        df_stops = pd.read_csv(ruta_stops, usecols=["stop_lat", "stop_lon"], encoding="utf-8-sig").dropna()
+    else:
+        print(f"No se encontró {ruta_stops}. El mapa se genera sin paradas.")
+        df_stops = pd.DataFrame({"stop_lat": [], "stop_lon": []})
+    lat_paradas = df_stops["stop_lat"].to_numpy(dtype=np.float64)
+    lon_paradas = df_stops["stop_lon"].to_numpy(dtype=np.float64)
+
+    if args.red and not df_stops.empty:
+        extension = calcular_extension(lat_paradas, lon_paradas)
+    else:
+        extension = calcular_extension(df_energy["shape_pt_lat"].to_numpy(), df_energy["shape_pt_lon"].to_numpy())
+
+    ancho = args.ancho
+    alto = alto_rejilla(extension, ancho)
+    valores, cuenta = agregar_magnitud(df_energy, args.magnitud, extension, ancho, alto)
+    _, cuenta_paradas = rasterizar(lat_paradas, lon_paradas, None, extension, ancho, alto)
+    print(f"Rejilla de {ancho}x{alto} píxeles agregada en {time.perf_counter() - inicio:.2f} s")
+
+    os.makedirs(CARPETA_GRAFICAS_MAPA, exist_ok=True)
+    guardar_mapa(valores, cuenta, cuenta_paradas, extension, args.magnitud,
+                 os.path.join(CARPETA_GRAFICAS_MAPA, f"mapa_{args.magnitud}.jpg"))
+
+    if args.teselas is not None:
+        generar_teselas(df_energy, lat_paradas, lon_paradas, args.magnitud, extension, args.teselas,
+                        os.path.join(CARPETA_GRAFICAS_MAPA, f"teselas_{args.magnitud}"))
+
+    print(f"Tiempo total: {time.perf_counter() - inicio:.2f} s")
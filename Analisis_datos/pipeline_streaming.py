@@ -0,0 +1,241 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from functools import partial
+
+import pandas as pd
+
+from driving_model import calcular_angulo, calcular_delta_time, generate_instantaneous_velocity
+from driving_model import ruta_csv as ruta_csv_route_data
+from energy_consumption import (
+    CARPETA_RESULTADOS,
+    calcular_energia_instantanea,
+    calcular_fuerzas,
+    calcular_metricas_shape,
+    calcular_potencia,
+    calcular_potencia_consumida,
+    calcular_resultados_resumen,
+    guardar_parametros,
+    obtener_parametros,
+    ruta_csv_curvas,
+    ruta_csv_energy,
+    ruta_csv_metricas,
+    ruta_csv_summary,
+    ruta_json_parametros,
+)
+
+# Este archivo ejecuta driving_model.py y energy_consumption.py en modo streaming: lee df_route_data.csv
+# por bloques, procesa juntos los shape_id completos de cada bloque y va añadiendo los resultados a los CSV de
+# salida. La memoria maxima depende del tamaño del bloque y del shape mas largo, y no del numero de rutas.
+#
+# Ejemplos:
+#   python pipeline_streaming.py
+#   python pipeline_streaming.py --sintetico 2000 --rss-max 400
+#   python pipeline_streaming.py --parametros '{"mass_bus": 16000}' --escenario "bus 16 t"
+
+TAMANO_BLOQUE = 20000  # Filas leídas del CSV en cada bloque
+
+
+# Etapas del modelo, en orden: driving_model.py y después energy_consumption.py con los parametros del bus indicados
+def etapas_modelo(parametros=None):
+    p = obtener_parametros(parametros)
+    return [
+        calcular_delta_time,
+        generate_instantaneous_velocity,
+        calcular_angulo,
+        partial(calcular_fuerzas, parametros=p),
+        calcular_potencia,
+        partial(calcular_potencia_consumida, parametros=p),
+        calcular_energia_instantanea,
+    ]
+
+
+# Etapas con los parametros por defecto de PARAMETROS_BUS
+ETAPAS = etapas_modelo()
+
+
+def leer_bloques_shapes(ruta, tamano_bloque=TAMANO_BLOQUE):
+    """
+    Lee el CSV por bloques de 'tamano_bloque' filas y devuelve un DataFrame con los shape_id
+    completos de cada bloque. Las filas de cada shape_id deben estar contiguas en el archivo,
+    como en df_route_data.csv. El último shape_id de cada bloque se guarda hasta completarlo
+    con el bloque siguiente.
+
+    """
+    vistos = set()
+    pendiente = None
+    for bloque in pd.read_csv(ruta, chunksize=tamano_bloque, dtype={"shape_id": str}):
+        if pendiente is not None:
+            bloque = pd.concat([pendiente, bloque])
+
+        # Posición donde empieza el último shape_id del bloque, que puede continuar en el bloque siguiente
+        cambios = (bloque["shape_id"] != bloque["shape_id"].shift()).to_numpy().nonzero()[0]
+        if len(cambios) > 1:
+            yield _nuevos_shapes(bloque.iloc[:cambios[-1]], vistos)
+        pendiente = bloque.iloc[cambios[-1]:]
+
+    if pendiente is not None and not pendiente.empty:
+        yield _nuevos_shapes(pendiente, vistos)
+
+
+# Comprobar que los shape_id del bloque no han aparecido antes y reiniciar el indice (generate_instantaneous_velocity usa posiciones)
+def _nuevos_shapes(df, vistos):
+    shape_ids = df["shape_id"][df["shape_id"] != df["shape_id"].shift()]
+    repetidos = sorted(set(shape_ids[shape_ids.duplicated()]) | (set(shape_ids) & vistos))
+    if repetidos:
+        raise ValueError(f"Las filas del shape_id {repetidos[0]} no están contiguas en el archivo. Ordena el CSV por shape_id.")
+    vistos.update(shape_ids)
+    return df.reset_index(drop=True)
+
+
+def aplicar_etapa(etapa, shapes, verbose=False):
+    """
+    Aplica una etapa del modelo a cada bloque de un generador, de uno en uno.
+
+    """
+    for df in shapes:
+        yield _ejecutar(etapa, df, verbose)
+
+
+# Ejecutar una funcion del modelo ocultando sus mensajes por cada shape_id, salvo en modo verbose
+def _ejecutar(funcion, df, verbose):
+    if verbose:
+        return funcion(df)
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        return funcion(df)
+
+
+def ejecutar_streaming(ruta_entrada, carpeta_resultados=CARPETA_RESULTADOS, tamano_bloque=TAMANO_BLOQUE, verbose=False,
+                       parametros=None):
+    """
+    Ejecuta todo el modelo bloque a bloque y escribe de forma incremental los mismos
+    archivos que energy_consumption.py: df_energy_consumption.csv, df_metricas_shape.csv,
+    df_curvas_consumo.csv y, al final, df_consumption_results.csv y parametros_ejecucion.json
+    con los parámetros del bus usados.
+
+    Returns:
+        pd.DataFrame: Resumen de consumo por shape_id (df_consumption_results).
+    """
+    os.makedirs(carpeta_resultados, exist_ok=True)
+    rutas_salida = {
+        "energia": os.path.join(carpeta_resultados, os.path.basename(ruta_csv_energy)),
+        "metricas": os.path.join(carpeta_resultados, os.path.basename(ruta_csv_metricas)),
+        "curvas": os.path.join(carpeta_resultados, os.path.basename(ruta_csv_curvas)),
+        "resumen": os.path.join(carpeta_resultados, os.path.basename(ruta_csv_summary)),
+        "parametros": os.path.join(carpeta_resultados, os.path.basename(ruta_json_parametros)),
+    }
+    for ruta in rutas_salida.values():
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+    # Encadenar las etapas como generadores: cada bloque recorre todo el modelo antes de leer el siguiente
+    bloques = leer_bloques_shapes(ruta_entrada, tamano_bloque)
+    for etapa in etapas_modelo(parametros):
+        bloques = aplicar_etapa(etapa, bloques, verbose)
+
+    num_shapes = 0
+    num_filas = 0
+    tot_E_cons = 0.0
+    tot_dist_traveled = 0.0
+    for df in bloques:
+        metricas, curvas = _ejecutar(calcular_metricas_shape, df, verbose)
+        cabecera = num_shapes == 0
+        df.to_csv(rutas_salida["energia"], mode="a", header=cabecera, index=False)
+        metricas.to_csv(rutas_salida["metricas"], mode="a", header=cabecera, index=False)
+        curvas.to_csv(rutas_salida["curvas"], mode="a", header=cabecera, index=False)
+
+        # Agregados de toda la ejecución, actualizados con cada bloque
+        puntos = df["shape_id"].value_counts()
+        for fila in metricas.itertuples():
+            num_shapes += 1
+            print(f"[{num_shapes}] {fila.shape_id}: {puntos[fila.shape_id]} puntos, "
+                  f"{fila.tot_E_cons:.2f} kWh, {fila.E_cons_km:.3f} kWh/km")
+        num_filas += len(df)
+        tot_E_cons += metricas["tot_E_cons"].sum()
+        tot_dist_traveled += metricas["tot_dist_traveled"].sum()
+
+    if num_shapes == 0:
+        print("No se encontraron datos de ruta. No se generaron resultados.")
+        return None
+
+    # El resumen se obtiene de las métricas ya escritas (una fila por shape_id)
+    resumen = calcular_resultados_resumen(pd.read_csv(rutas_salida["metricas"], dtype={"shape_id": str}))
+    resumen.to_csv(rutas_salida["resumen"], index=False)
+    guardar_parametros(parametros, rutas_salida["parametros"])
+    print(f"Procesados {num_shapes} shapes y {num_filas} puntos: {tot_E_cons:.2f} kWh en "
+          f"{tot_dist_traveled / 1000:.1f} km ({tot_E_cons / (tot_dist_traveled / 1000):.3f} kWh/km de media)")
+    print(f"Resultados exportados a {carpeta_resultados}")
+    return resumen
+
+
+def generar_datos_sinteticos(ruta_origen, ruta_destino, num_shapes):
+    """
+    Genera un df_route_data.csv sintético con 'num_shapes' shapes, repitiendo los shapes
+    del archivo de origen con nuevos identificadores. Se escribe shape a shape para no
+    cargar el archivo sintético en memoria.
+
+    """
+    base = [df for _, df in pd.read_csv(ruta_origen, dtype={"shape_id": str}).groupby("shape_id", sort=False)]
+    for i in range(num_shapes):
+        df = base[i % len(base)].copy()
+        df["shape_id"] = f"{i:05d}_{df['shape_id'].iloc[0][-1]}"
+        df.to_csv(ruta_destino, mode="a" if i else "w", header=(i == 0), index=False)
+
+
+# Memoria residente maxima del proceso en MB. En Linux se lee VmHWM, porque ru_maxrss conserva el maximo del proceso padre tras fork/exec
+def rss_maximo_mb():
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for linea in f:
+                if linea.startswith("VmHWM:"):
+                    return int(linea.split()[1]) / 1024
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modelo de conducción y consumo en modo streaming, por bloques de shape_id completos.")
+    parser.add_argument("--entrada", default=ruta_csv_route_data, help="CSV con los datos de ruta (df_route_data.csv)")
+    parser.add_argument("--resultados", default=CARPETA_RESULTADOS, help="Carpeta de resultados")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="Filas leídas en cada bloque")
+    parser.add_argument("--sintetico", type=int, default=None, metavar="NUM_SHAPES",
+                        help="Procesar un archivo sintético con NUM_SHAPES shapes generado a partir de --entrada")
+    parser.add_argument("--rss-max", type=float, default=None, metavar="MB",
+                        help="Terminar con error si la memoria residente máxima supera este valor")
+    parser.add_argument("--parametros", type=json.loads, default=None,
+                        help="Parámetros del bus que sustituyen a los de PARAMETROS_BUS, en JSON")
+    parser.add_argument("--escenario", default=None,
+                        help="Registrar la ejecución con este nombre de escenario en almacen_resultados.sqlite")
+    parser.add_argument("--verbose", action="store_true", help="Mostrar los mensajes de cada etapa")
+    args = parser.parse_args()
+    obtener_parametros(args.parametros)  # Comprobar los parámetros antes de empezar
+
+    inicio = time.perf_counter()
+    rss_inicial = rss_maximo_mb()
+    if args.sintetico is not None:
+        with tempfile.TemporaryDirectory() as carpeta_temporal:
+            ruta_sintetica = os.path.join(carpeta_temporal, "df_route_data_sintetico.csv")
+            generar_datos_sinteticos(args.entrada, ruta_sintetica, args.sintetico)
+            print(f"Archivo sintético generado con {args.sintetico} shapes: {os.path.getsize(ruta_sintetica) / 1e6:.1f} MB")
+            ejecutar_streaming(ruta_sintetica, os.path.join(carpeta_temporal, "results"), args.bloque, args.verbose,
+                               args.parametros)
+    else:
+        resumen = ejecutar_streaming(args.entrada, args.resultados, args.bloque, args.verbose, args.parametros)
+
+        # Registrar la ejecución en el almacén de resultados con los parámetros usados
+        if args.escenario is not None and resumen is not None:
+            from almacen_resultados import registrar_resultados
+
+            registrar_resultados(args.resultados, args.escenario, origen=args.entrada)
+
+    rss = rss_maximo_mb()
+    print(f"Tiempo total: {time.perf_counter() - inicio:.1f} s. Memoria residente máxima: {rss:.0f} MB "
+          f"(al arrancar: {rss_inicial:.0f} MB)")
+    if args.rss_max is not None and rss > args.rss_max:
+        print(f"Error: la memoria residente máxima ({rss:.0f} MB) supera el límite de {args.rss_max:.0f} MB")
+        sys.exit(1)
@@ -1,6 +1,11 @@
+import argparse
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
+
+from decimacion import plot_decimado
+
+# matplotlib se importa dentro de cada función de gráficas, para que importar este archivo sea rápido
 
 # Definir carpetas usando os.path.abspath
 CARPETA_DATOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Processed_data"))
@@ -8,21 +13,21 @@ CARPETA_RESULTADOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..
 
 # Directorio donde se encuentra el archivo df_driving_model.csv
 # CARPETA_DATOS = r"C:\Users\JaimeCartonPerea\Documents\Development\python\tfg\Analisis_datos\Processed_data"
-
-# Cargar el DataFrame df_driving_model desde el archivo CSV
 ruta_csv = os.path.join(CARPETA_DATOS, "df_driving_model.csv")
-if os.path.exists(ruta_csv):
-    df_driving_model = pd.read_csv(ruta_csv)
-    print("DataFrame df_driving_model cargado correctamente:")
-    print(df_driving_model.head())
-else:
-    print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
-    df_driving_model = None
+
+# Las gráficas de consumo usan las tablas de métricas y curvas por shape_id que genera energy_consumption.py,
+# sin volver a recorrer df_energy_consumption.csv
+# CARPETA_RESULTADOS = r"C:\Users\JaimeCartonPerea\Documents\Development\python\tfg\Analisis_datos\results"
+ruta_csv_metricas = os.path.join(CARPETA_RESULTADOS, "df_metricas_shape.csv")
+ruta_csv_curvas = os.path.join(CARPETA_RESULTADOS, "df_curvas_consumo.csv")
+
 
 # Generar gráficas agrupadas para cada shape_id
-if df_driving_model is not None and not df_driving_model.empty:
+def graficas_shape(df_driving_model, carpeta=CARPETA_DATOS):
+    import matplotlib.pyplot as plt
+
     # Crear carpeta para guardar las gráficas
-    CARPETA_GRAFICAS = os.path.join(CARPETA_DATOS, "Graficas")
+    CARPETA_GRAFICAS = os.path.join(carpeta, "Graficas")
     os.makedirs(CARPETA_GRAFICAS, exist_ok=True)
 
     # Iterar por cada shape_id único
@@ -31,13 +36,13 @@ if df_driving_model is not None and not df_driving_model.empty:
         fig, axes = plt.subplots(1, 2, figsize=(16, 6))
 
         # Gráfica de inst_vel vs. shape_dist_traveled
-        axes[0].plot(group["shape_dist_traveled"], group["inst_vel"], color="blue")
+        plot_decimado(axes[0], group["shape_dist_traveled"], group["inst_vel"], color="blue")
         axes[0].set_xlabel("Distancia Recorrida (m)")
         axes[0].set_ylabel("Velocidad Instantánea (m/s)")
         axes[0].grid(True)
 
         # Gráfica de inst_acc vs. shape_dist_traveled
-        axes[1].plot(group["shape_dist_traveled"], group["inst_acc"], color="green")
+        plot_decimado(axes[1], group["shape_dist_traveled"], group["inst_acc"], color="green")
         axes[1].set_xlabel("Distancia Recorrida (m)")
         axes[1].set_ylabel("Aceleración Instantánea (m/s²)")
         axes[1].grid(True)
@@ -47,20 +52,21 @@ if df_driving_model is not None and not df_driving_model.empty:
         plt.savefig(ruta_grafica, format="jpg", dpi=300)
         plt.close()
         print(f"Gráfica guardada: {ruta_grafica}")
-else:
-    print("El DataFrame df_driving_model está vacío. No se generaron gráficas.")
+
 
 # Generar gráficas agrupadas por ruta
-if df_driving_model is not None and not df_driving_model.empty:
+def graficas_rutas(df_driving_model, carpeta=CARPETA_DATOS):
+    import matplotlib.pyplot as plt
+
     # Crear carpeta para guardar las gráficas agrupadas por ruta
-    CARPETA_GRAFICAS_RUTAS = os.path.join(CARPETA_DATOS, "Graficas_Rutas")
+    CARPETA_GRAFICAS_RUTAS = os.path.join(carpeta, "Graficas_Rutas")
     os.makedirs(CARPETA_GRAFICAS_RUTAS, exist_ok=True)
 
     # Extraer el identificador de ruta (sin la letra final A/B)
-    df_driving_model["route_id"] = df_driving_model["shape_id"].str[:-1]
+    route_ids = df_driving_model["shape_id"].str[:-1]
 
     # Iterar por cada route_id único
-    for route_id, group in df_driving_model.groupby("route_id"):
+    for route_id, group in df_driving_model.groupby(route_ids):
         # Crear una figura con cuatro subgráficas (dos por cada sentido A y B)
         fig, axes = plt.subplots(2, 2, figsize=(16, 12))
 
@@ -72,14 +78,14 @@ if df_driving_model is not None and not df_driving_model.empty:
                 sentido = f"Sentido {suffix}"  # Determinar el sentido (A o B)
 
                 # Gráfica de inst_vel vs. shape_dist_traveled
-                axes[i, 0].plot(shape_group["shape_dist_traveled"], shape_group["inst_vel"], color="blue")
+                plot_decimado(axes[i, 0], shape_group["shape_dist_traveled"], shape_group["inst_vel"], color="blue")
                 axes[i, 0].set_xlabel("Distancia Recorrida (m)")
                 axes[i, 0].set_ylabel("Velocidad Instantánea (m/s)")
                 axes[i, 0].grid(True)
                 axes[i, 0].set_title(f"Velocidad Instantánea ({sentido})")
 
                 # Gráfica de inst_acc vs. shape_dist_traveled
-                axes[i, 1].plot(shape_group["shape_dist_traveled"], shape_group["inst_acc"], color="green")
+                plot_decimado(axes[i, 1], shape_group["shape_dist_traveled"], shape_group["inst_acc"], color="green")
                 axes[i, 1].set_xlabel("Distancia Recorrida (m)")
                 axes[i, 1].set_ylabel("Aceleración Instantánea (m/s²)")
                 axes[i, 1].grid(True)
@@ -95,32 +101,30 @@ if df_driving_model is not None and not df_driving_model.empty:
         plt.savefig(ruta_grafica_ruta, format="jpg", dpi=300)
         plt.close()
         print(f"Gráfica agrupada guardada: {ruta_grafica_ruta}")
-else:
-    print("El DataFrame df_driving_model está vacío. No se generaron gráficas agrupadas por ruta.")
+
 
 # Generar gráficas agrupadas por ruta para el consumo de energía
-# CARPETA_RESULTADOS = r"C:\Users\JaimeCartonPerea\Documents\Development\python\tfg\Analisis_datos\results"
-ruta_csv_energy = os.path.join(CARPETA_RESULTADOS, "df_energy_consumption.csv")
+def graficas_consumo(df_metricas, df_curvas, carpeta=CARPETA_DATOS):
+    import matplotlib.pyplot as plt
 
-if os.path.exists(ruta_csv_energy):
-    df_energy = pd.read_csv(ruta_csv_energy)
-    print("DataFrame df_energy_consumption cargado correctamente para gráficas de consumo.")
+    df_metricas = df_metricas.set_index("shape_id")
     # Extraer el identificador de ruta (sin la letra final A/B)
-    df_energy["route_id"] = df_energy["shape_id"].str[:-1]
+    rutas_consumo = sorted(df_metricas.index.str[:-1].unique())
+    curvas_por_shape = dict(tuple(df_curvas.groupby("shape_id")))
 
     # Crear carpeta para guardar las gráficas agrupadas por ruta de consumo de energía
-    CARPETA_GRAFICAS_CONSUMO = os.path.join(CARPETA_DATOS, "Graficas_Consumo")
+    CARPETA_GRAFICAS_CONSUMO = os.path.join(carpeta, "Graficas_Consumo")
     os.makedirs(CARPETA_GRAFICAS_CONSUMO, exist_ok=True)
 
     # --- Gráficas de potencia consumida ---
-    for route_id, group in df_energy.groupby("route_id"):
+    for route_id in rutas_consumo:
         fig, axes = plt.subplots(1, 2, figsize=(16, 6))
         for i, suffix in enumerate(["A", "B"]):
             shape_id = f"{route_id}{suffix}"
-            shape_group = group[group["shape_id"] == shape_id]
-            if not shape_group.empty:
+            if shape_id in curvas_por_shape:
+                curva = curvas_por_shape[shape_id]
                 sentido = f"Sentido {suffix}"
-                axes[i].plot(shape_group["shape_dist_traveled"], shape_group["P_cons"] / 1000, color="red")
+                plot_decimado(axes[i], curva["shape_dist_traveled"], curva["P_cons"] / 1000, color="red")
                 axes[i].set_xlabel("Distancia Recorrida (m)")
                 axes[i].set_ylabel("Potencia Consumida (kW)")
                 axes[i].grid(True)
@@ -134,16 +138,15 @@ if os.path.exists(ruta_csv_energy):
         print(f"Gráfica de potencia consumida guardada: {ruta_grafica_consumo}")
 
     # --- Gráficas de energía acumulada ---
-    for route_id, group in df_energy.groupby("route_id"):
+    for route_id in rutas_consumo:
         fig, axes = plt.subplots(1, 2, figsize=(16, 6))
         for i, suffix in enumerate(["A", "B"]):
             shape_id = f"{route_id}{suffix}"
-            shape_group = group[group["shape_id"] == shape_id]
-            if not shape_group.empty:
+            if shape_id in curvas_por_shape:
+                curva = curvas_por_shape[shape_id]
                 sentido = f"Sentido {suffix}"
                 # Energía acumululada en kWh
-                energia_acumulada = shape_group["E_cons"].cumsum()
-                axes[i].plot(shape_group["shape_dist_traveled"], energia_acumulada, color="purple")
+                plot_decimado(axes[i], curva["shape_dist_traveled"], curva["E_acum"], color="purple")
                 axes[i].set_xlabel("Distancia Recorrida (m)")
                 axes[i].set_ylabel("Energía Acumulada (kWh)")
                 axes[i].grid(True)
@@ -161,14 +164,13 @@ if os.path.exists(ruta_csv_energy):
     etiquetas = ["Aerodinámica", "Gravedad", "Rodadura", "Aceleración"]
     colores = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728"]
 
-    if all(f in df_energy.columns for f in fuerzas):
-        for route_id, group in df_energy.groupby("route_id"):
+    if all(f"pct_{f}" in df_metricas.columns for f in fuerzas):
+        for route_id in rutas_consumo:
             fig, axes = plt.subplots(1, 2, figsize=(16, 8))
             for i, suffix in enumerate(["A", "B"]):
                 shape_id = f"{route_id}{suffix}"
-                shape_group = group[group["shape_id"] == shape_id]
-                if not shape_group.empty:
-                    pesos = [shape_group[f].abs().sum() for f in fuerzas]
+                if shape_id in df_metricas.index:
+                    pesos = df_metricas.loc[shape_id, [f"pct_{f}" for f in fuerzas]].tolist()
                     wedges, texts, autotexts = axes[i].pie(
                         pesos, labels=None, autopct='%1.1f%%', colors=colores, startangle=90
                     )
@@ -188,36 +190,21 @@ if os.path.exists(ruta_csv_energy):
         print("No se encontraron todas las columnas de fuerzas necesarias para el gráfico circular.")
 
     # --- Diagrama de barras: porcentaje de energía recuperada por frenada regenerativa por ruta y sentido ---
-    if "P_trac" in df_energy.columns and "E_cons" in df_energy.columns and "route_id" in df_energy.columns:
-        porcentajes = []
-        rutas = []
-        sentidos = []
-        for route_id, group in df_energy.groupby("route_id"):
-            for suffix in ["A", "B"]:
-                shape_id = f"{route_id}{suffix}"
-                shape_group = group[group["shape_id"] == shape_id]
-                if not shape_group.empty:
-                    energia_recup = shape_group.loc[shape_group["P_trac"] < 0, "E_cons"].sum()
-                    energia_total = shape_group["E_cons"].sum()
-                    # Evitar división por cero
-                    if energia_total != 0:
-                        porcentaje = abs(energia_recup) / energia_total * 100
-                    else:
-                        porcentaje = 0
-                    rutas.append(route_id)
-                    sentidos.append(suffix)
-                    porcentajes.append(porcentaje)
+    if "pct_regen" in df_metricas.columns:
+        # Tabla ruta x sentido con el porcentaje de energía recuperada
+        porcentajes = df_metricas["pct_regen"].groupby(
+            [df_metricas.index.str[:-1], df_metricas.index.str[-1]]
+        ).first().unstack(fill_value=0)
 
         # Crear el gráfico de barras agrupadas
-        import numpy as np
-        rutas_unicas = list(sorted(set(rutas)))
+        rutas_unicas = list(porcentajes.index)
         x = np.arange(len(rutas_unicas))
         width = 0.35
 
         fig, ax = plt.subplots(figsize=(10, 6))
         # Obtener los porcentajes para cada sentido alineados por ruta
-        porcentajes_A = [porcentajes[i] for i in range(len(porcentajes)) if sentidos[i] == "A"]
-        porcentajes_B = [porcentajes[i] for i in range(len(porcentajes)) if sentidos[i] == "B"]
+        porcentajes_A = porcentajes.get("A", pd.Series(0, index=porcentajes.index)).tolist()
+        porcentajes_B = porcentajes.get("B", pd.Series(0, index=porcentajes.index)).tolist()
 
         bars_A = ax.bar(x - width/2, porcentajes_A, width, label='Sentido A', color="#4daf4a")
         bars_B = ax.bar(x + width/2, porcentajes_B, width, label='Sentido B', color="#377eb8")
@@ -241,15 +228,19 @@ if os.path.exists(ruta_csv_energy):
         print(f"Gráfico de barras de porcentaje de energía recuperada guardado: {ruta_grafico_barras}")
     else:
         print("No se encontraron las columnas necesarias para el gráfico de energía recuperada por ruta.")
-else:
-    print("No se encontró el archivo df_energy_consumption.csv. No se generaron gráficas de consumo.")
+
 
 # --- Gráficas de perfiles de altitud agrupados por ruta (ambos sentidos en una imagen) ---
-if df_driving_model is not None and not df_driving_model.empty and "altitude" in df_driving_model.columns:
-    CARPETA_GRAFICAS_ALTITUD = os.path.join(CARPETA_DATOS, "Graficas_Altitud")
+def graficas_altitud(df_driving_model, carpeta=CARPETA_DATOS):
+    import matplotlib.pyplot as plt
+
+    CARPETA_GRAFICAS_ALTITUD = os.path.join(carpeta, "Graficas_Altitud")
     os.makedirs(CARPETA_GRAFICAS_ALTITUD, exist_ok=True)
 
-    for route_id, group in df_driving_model.groupby("route_id"):
+    # Extraer el identificador de ruta (sin la letra final A/B)
+    route_ids = df_driving_model["shape_id"].str[:-1]
+
+    for route_id, group in df_driving_model.groupby(route_ids):
         fig, ax = plt.subplots(figsize=(16, 6))
         plotted = False
         for suffix, color in zip(["A", "B"], ["#1f77b4", "#ff7f0e"]):
@@ -258,7 +249,8 @@ if df_driving_model is not None and not df_driving_model.empty and "altitude" in
             # Filtrar NaN en altitude y shape_dist_traveled
             shape_group = shape_group.dropna(subset=["altitude", "shape_dist_traveled"])
             if not shape_group.empty:
-                ax.plot(
+                plot_decimado(
+                    ax,
                     shape_group["shape_dist_traveled"],
                     shape_group["altitude"],
                     label=f"Sentido {suffix}",
@@ -278,5 +270,50 @@ if df_driving_model is not None and not df_driving_model.empty and "altitude" in
             print(f"Gráfica de perfil de altitud guardada: {ruta_grafica_altitud}")
         else:
             plt.close()
-else:
-    print("No se generaron gráficas de altitud: el DataFrame está vacío o falta la columna 'altitude'.")
+
+
+def generar_graficas(df_driving_model, df_metricas=None, df_curvas=None, carpeta=CARPETA_DATOS):
+    """
+    Genera todas las gráficas: velocidad y aceleración por shape_id y por ruta, consumo
+    (si se pasan las métricas y curvas de energy_consumption.py) y perfiles de altitud.
+
+    """
+    if df_driving_model is not None and not df_driving_model.empty:
+        graficas_shape(df_driving_model, carpeta)
+        graficas_rutas(df_driving_model, carpeta)
+    else:
+        print("El DataFrame df_driving_model está vacío. No se generaron gráficas.")
+
+    if df_metricas is not None and df_curvas is not None:
+        graficas_consumo(df_metricas, df_curvas, carpeta)
+    else:
+        print("No se encontraron df_metricas_shape.csv y df_curvas_consumo.csv. Ejecuta energy_consumption.py. No se generaron gráficas de consumo.")
+
+    if df_driving_model is not None and not df_driving_model.empty and "altitude" in df_driving_model.columns:
+        graficas_altitud(df_driving_model, carpeta)
+    else:
+        print("No se generaron gráficas de altitud: el DataFrame está vacío o falta la columna 'altitude'.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generación de las gráficas de conducción, consumo y altitud.")
+    parser.add_argument("--salida", default=CARPETA_DATOS, help="Carpeta donde crear las subcarpetas de gráficas")
+    args = parser.parse_args()
+
+    # Cargar el DataFrame df_driving_model desde el archivo CSV
+    if os.path.exists(ruta_csv):
+        df_driving_model = pd.read_csv(ruta_csv)
+        print("DataFrame df_driving_model cargado correctamente:")
+        print(df_driving_model.head())
+    else:
+        print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+        df_driving_model = None
+
+    df_metricas = None
+    df_curvas = None
+    if os.path.exists(ruta_csv_metricas) and os.path.exists(ruta_csv_curvas):
+        df_metricas = pd.read_csv(ruta_csv_metricas)
+        df_curvas = pd.read_csv(ruta_csv_curvas)
+        print("Tablas df_metricas_shape y df_curvas_consumo cargadas correctamente para gráficas de consumo.")
+
+    generar_graficas(df_driving_model, df_metricas, df_curvas, args.salida)
@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from energy_consumption import (
+    CARPETA_RESULTADOS,
+    PARAMETROS_BUS,
+    RANGOS_PARAMETROS,
+    calcular_fuerzas_arrays,
+    calcular_potencia_consumida_arrays,
+    obtener_parametros,
+    ruta_csv,
+)
+
+# Este archivo calcula las derivadas exactas del consumo por shape_id (tot_E_cons y E_cons_km) respecto a cada
+# parametro del bus de energy_consumption.py, en la misma pasada vectorizada que el calculo del consumo.
+# El resultado se expresa tambien como elasticidad: variacion relativa del consumo por variacion relativa
+# del parametro (una elasticidad de 0.8 en mass_bus indica que +1 % de masa supone +0.8 % de consumo).
+
+ruta_csv_sensibilidades = os.path.join(CARPETA_RESULTADOS, "df_sensibilidades.csv")
+
+G = 9.81  # Aceleración de la gravedad en m/s2, la misma que en calcular_fuerzas_arrays
+
+
+def calcular_energia_y_derivadas(inst_vel, inst_acc, angle_rad, delta_time, parametros=None):
+    """
+    Calcula la energía consumida por instante (kWh) y su derivada respecto a cada parámetro
+    del bus. En los instantes con P_trac > 0 se deriva la rama de tracción y en el resto la
+    rama de regeneración, igual que en calcular_potencia_consumida_arrays.
+
+    Returns:
+        tuple: (E_cons, derivadas). 'derivadas' es un diccionario parámetro -> array dE_cons/dparámetro.
+    """
+    p = obtener_parametros(parametros)
+    m, Cd, Cr, Af, rho = p["mass_bus"], p["Cd"], p["Cr"], p["Af"], p["air_density"]
+    me, ce, re, Paux = p["motor_eff"], p["conv_eff"], p["reg_eff"], p["Paux"]
+
+    # Paso directo del modelo
+    F_aero, F_g, F_roll, F_acc = calcular_fuerzas_arrays(inst_vel, inst_acc, angle_rad, p)
+    P_trac = (F_aero + F_g + F_roll + F_acc) * inst_vel
+    P_cons = calcular_potencia_consumida_arrays(P_trac, p)
+    k = delta_time / 3600 / 1000  # Conversión de W a kWh en cada instante
+    E_cons = P_cons * k
+
+    # Derivadas de P_trac respecto a los parámetros de las fuerzas
+    v3 = inst_vel**3
+    dP_trac = {
+        "mass_bus": (G * np.sin(angle_rad) + Cr * G * np.cos(angle_rad) + inst_acc) * inst_vel,
+        "Af": 0.5 * Cd * rho * v3,
+        "air_density": 0.5 * Cd * Af * v3,
+        "Cd": 0.5 * Af * rho * v3,
+        "Cr": m * G * np.cos(angle_rad) * inst_vel,
+    }
+
+    # dP_cons/dP_trac en cada rama y derivadas de P_cons respecto a las eficiencias y cargas auxiliares
+    traccion = P_trac > 0
+    factor = np.where(traccion, 1 / (ce * me), me * re)
+    derivadas = {nombre: k * factor * d for nombre, d in dP_trac.items()}
+    derivadas["motor_eff"] = k * np.where(traccion, -P_trac / (ce * me**2), P_trac * re)
+    derivadas["conv_eff"] = k * (np.where(traccion, -P_trac / (ce**2 * me), 0.0) - Paux / ce**2)
+    derivadas["reg_eff"] = k * np.where(traccion, 0.0, P_trac * me)
+    derivadas["Paux"] = k / ce
+
+    return E_cons, {nombre: derivadas[nombre] for nombre in PARAMETROS_BUS}
+
+
+# Extraer del DataFrame los arrays de entrada de calcular_energia_y_derivadas
+def _arrays_modelo(df):
+    return (
+        df['inst_vel'].to_numpy(dtype=np.float64), df['inst_acc'].to_numpy(dtype=np.float64),
+        np.radians(df['angle_deg'].to_numpy(dtype=np.float64)), df['delta_time'].to_numpy(dtype=np.float64)
+    )
+
+
+def calcular_sensibilidades(df, parametros=None):
+    """
+    Calcula por shape_id el consumo total y las derivadas y elasticidades de tot_E_cons y
+    E_cons_km respecto a cada parámetro del bus.
+
+    Args:
+        df (pd.DataFrame): DataFrame del modelo de conducción (df_driving_model).
+        parametros (dict): Parámetros del bus que sustituyen a los de PARAMETROS_BUS.
+
+    Returns:
+        pd.DataFrame: Una fila por shape_id y parámetro con las columnas 'shape_id', 'parametro',
+                      'valor', 'tot_E_cons', 'E_cons_km', 'dE_cons', 'dE_cons_km' y 'elasticidad'.
+    """
+    print("Calculando sensibilidades del consumo por shape_id...")
+
+    # Verificar que las columnas necesarias existan
+    columnas = ['shape_id', 'shape_dist_traveled', 'inst_vel', 'inst_acc', 'angle_deg', 'delta_time']
+    if not all(col in df.columns for col in columnas):
+        raise ValueError(f"El DataFrame debe contener las columnas {columnas}.")
+
+    p = obtener_parametros(parametros)
+    E_cons, derivadas = calcular_energia_y_derivadas(*_arrays_modelo(df), p)
+
+    # Sumas por shape_id con np.bincount sobre los códigos de shape_id
+    codigos, shapes = pd.factorize(df['shape_id'], sort=True)
+    tot_E_cons = np.bincount(codigos, weights=E_cons, minlength=len(shapes))
+    tot_km = df.groupby(codigos)['shape_dist_traveled'].max().to_numpy() / 1000
+
+    filas = []
+    for nombre, derivada in derivadas.items():
+        dE = np.bincount(codigos, weights=derivada, minlength=len(shapes))
+        filas.append(pd.DataFrame({
+            'shape_id': shapes,
+            'parametro': nombre,
+            'valor': p[nombre],
+            'tot_E_cons': tot_E_cons,
+            'E_cons_km': tot_E_cons / tot_km,
+            'dE_cons': dE,                                   # kWh por unidad del parámetro
+            'dE_cons_km': dE / tot_km,                       # kWh/km por unidad del parámetro
+            'elasticidad': dE * p[nombre] / tot_E_cons,      # Igual para tot_E_cons y E_cons_km
+        }))
+    sensibilidades = pd.concat(filas, ignore_index=True)
+
+    print("Elasticidades del consumo por shape_id:")
+    print(sensibilidades.pivot(index='shape_id', columns='parametro', values='elasticidad')[list(PARAMETROS_BUS)])
+    return sensibilidades
+
+
+def comprobar_sensibilidades(df, parametros=None, paso_relativo=1e-6):
+    """
+    Compara las derivadas analíticas de tot_E_cons con diferencias finitas, perturbando cada
+    parámetro un 'paso_relativo' de su valor (o de su valor por defecto si es mayor, para
+    los parámetros que valen 0). Las diferencias son centradas salvo en los límites del
+    intervalo admitido del parámetro (p. ej. reg_eff = 1), donde son de un solo lado.
+
+    Returns:
+        pd.DataFrame: Error relativo máximo entre shapes para cada parámetro. Si la derivada o la
+                      diferencia no son finitas el error es infinito, para que cuente como fallo.
+    """
+    print("Comprobando sensibilidades con diferencias finitas...")
+    p = obtener_parametros(parametros)
+    arrays = _arrays_modelo(df)
+    codigos, shapes = pd.factorize(df['shape_id'], sort=True)
+
+    # Energía total por shape_id con los parámetros indicados
+    def tot_E_cons(parametros_perturbados):
+        E_cons, _ = calcular_energia_y_derivadas(*arrays, parametros_perturbados)
+        return np.bincount(codigos, weights=E_cons, minlength=len(shapes))
+
+    _, derivadas = calcular_energia_y_derivadas(*arrays, p)
+    base = tot_E_cons(p)
+
+    errores = []
+    for nombre in PARAMETROS_BUS:
+        h = max(paso_relativo * abs(p[nombre]), paso_relativo * abs(PARAMETROS_BUS[nombre]))
+        minimo, maximo, minimo_incluido = RANGOS_PARAMETROS[nombre]
+        arriba = p[nombre] + h <= maximo
+        abajo = p[nombre] - h > minimo or (minimo_incluido and p[nombre] - h == minimo)
+        if arriba and abajo:
+            numerica = (tot_E_cons({**p, nombre: p[nombre] + h}) - tot_E_cons({**p, nombre: p[nombre] - h})) / (2 * h)
+        else:
+            # Diferencia de un solo lado de segundo orden, hacia dentro del intervalo
+            signo = 1 if arriba else -1
+            numerica = signo * (4 * tot_E_cons({**p, nombre: p[nombre] + signo * h})
+                                - tot_E_cons({**p, nombre: p[nombre] + 2 * signo * h}) - 3 * base) / (2 * h)
+        analitica = np.bincount(codigos, weights=derivadas[nombre], minlength=len(shapes))
+        escala = np.maximum(np.abs(analitica), 1e-12)
+        error = np.abs(analitica - numerica) / escala
+        errores.append({'parametro': nombre, 'error_relativo_max': float(np.where(np.isnan(error), np.inf, error).max())})
+
+    errores = pd.DataFrame(errores)
+    print("Error relativo máximo entre la derivada analítica y la numérica:")
+    print(errores)
+    return errores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensibilidades del consumo por shape_id respecto a los parámetros del bus.")
+    parser.add_argument("--parametros", type=json.loads, default=None,
+                        help="Parámetros del bus que sustituyen a los de PARAMETROS_BUS, en JSON (p. ej. '{\"reg_eff\": 0}')")
+    parser.add_argument("--comprobar", action="store_true",
+                        help="Comprobar las derivadas con diferencias finitas y terminar con error si no coinciden")
+    parser.add_argument("--tolerancia", type=float, default=1e-4, help="Error relativo máximo admitido en la comprobación")
+    args = parser.parse_args()
+    parametros = obtener_parametros(args.parametros)
+
+    if not os.path.exists(ruta_csv):
+        print(f"No se encontró el archivo CSV en la ruta: {ruta_csv}")
+        sys.exit(1)
+    df_driving_model = pd.read_csv(ruta_csv)
+
+    df_sensibilidades = calcular_sensibilidades(df_driving_model, parametros)
+    os.makedirs(CARPETA_RESULTADOS, exist_ok=True)
+    df_sensibilidades.to_csv(ruta_csv_sensibilidades, index=False)
+    print(f"DataFrame df_sensibilidades exportado a {ruta_csv_sensibilidades}")
+
+    if args.comprobar:
+        errores = comprobar_sensibilidades(df_driving_model, parametros)
+        if not (errores['error_relativo_max'] <= args.tolerancia).all():
+            print(f"Error: hay derivadas con un error relativo mayor que {args.tolerancia}")
+            sys.exit(1)
+        print("Las derivadas analíticas coinciden con las diferencias finitas.")
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from energy_consumption import (
+    CARPETA_DATOS_PROCESADOS,
+    PARAMETROS_BUS,
+    calcular_fuerzas_arrays,
+    calcular_potencia_consumida_arrays,
+    obtener_parametros,
+    tiempo_a_segundos_serie,
+)
+
+# Este archivo levanta un servicio HTTP local que mantiene en memoria los ciclos de conduccion de
+# df_driving_model.csv y responde consultas de consumo (kWh/km) con parametros del bus por peticion.
+#
+# Ejemplos de consulta:
+#   GET /shapes
+#   GET /consumo?shape_id=068_A
+#   GET /consumo?route_id=116&sentido=B&mass_bus=16000&Paux=8000
+
+HOST = "127.0.0.1"
+PUERTO = 8765
+TAMANO_CACHE = 4096  # Número de respuestas recientes guardadas en memoria
+
+ruta_csv = os.path.join(CARPETA_DATOS_PROCESADOS, "df_driving_model.csv")
+
+
+def cargar_ciclos(ruta):
+    """
+    Carga df_driving_model.csv una sola vez y lo convierte en un diccionario
+    shape_id -> arrays contiguos de numpy con las columnas necesarias para el cálculo
+    de consumo, junto con la distancia y el tiempo total de cada shape.
+
+    """
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No se encontró el archivo CSV en la ruta: {ruta}")
+
+    print(f"Cargando ciclos de conducción desde {ruta}...")
+    df = pd.read_csv(ruta, usecols=[
+        "shape_id", "shape_dist_traveled", "arrival_time", "departure_time",
+        "delta_time", "inst_vel", "inst_acc", "angle_deg"
+    ])
+    df["arrival_time_seg"] = tiempo_a_segundos_serie(df["arrival_time"])
+    df["departure_time_seg"] = tiempo_a_segundos_serie(df["departure_time"])
+
+    ciclos = {}
+    for shape_id, group in df.groupby("shape_id", sort=True):
+        ciclos[shape_id] = {
+            "inst_vel": np.ascontiguousarray(group["inst_vel"].to_numpy(dtype=np.float64)),
+            "inst_acc": np.ascontiguousarray(group["inst_acc"].to_numpy(dtype=np.float64)),
+            "angle_rad": np.radians(group["angle_deg"].to_numpy(dtype=np.float64)),
+            "delta_time": np.ascontiguousarray(group["delta_time"].to_numpy(dtype=np.float64)),
+            "tot_dist_traveled": float(group["shape_dist_traveled"].max()),
+            "tot_time_traveled": float(group["arrival_time_seg"].max() - group["departure_time_seg"].min()),
+        }
+    print(f"Ciclos cargados: {len(ciclos)} shapes, {len(df)} puntos.")
+    return ciclos
+
+
+def calcular_consumo_ciclo(ciclo, parametros):
+    """
+    Aplica el modelo de energy_consumption.py sobre los arrays de un ciclo y devuelve
+    los mismos totales que df_consumption_results.csv. Si el shape no recorre distancia,
+    E_cons_km es None (null en la respuesta JSON).
+
+    """
+    F_aero, F_g, F_roll, F_acc = calcular_fuerzas_arrays(
+        ciclo["inst_vel"], ciclo["inst_acc"], ciclo["angle_rad"], parametros
+    )
+    P_trac = (F_aero + F_g + F_roll + F_acc) * ciclo["inst_vel"]
+    P_cons = calcular_potencia_consumida_arrays(P_trac, parametros)
+    tot_E_cons = float(np.dot(P_cons, ciclo["delta_time"])) / 3600 / 1000  # kWh
+    tot_dist_km = ciclo["tot_dist_traveled"] / 1000
+
+    return {
+        "tot_dist_traveled": ciclo["tot_dist_traveled"],
+        "tot_time_traveled": ciclo["tot_time_traveled"],
+        "tot_P_cons": float(P_cons.sum()),
+        "tot_E_cons": tot_E_cons,
+        "E_cons_km": tot_E_cons / tot_dist_km if tot_dist_km > 0 else None,
+    }
+
+
+class ServicioConsumo:
+    """
+    Mantiene los ciclos en memoria y una caché LRU de las respuestas recientes,
+    indexada por shape_id y el conjunto completo de parámetros del bus.
+
+    """
+
+    def __init__(self, ciclos, tamano_cache=TAMANO_CACHE):
+        self.ciclos = ciclos
+        self.tamano_cache = tamano_cache
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consultar(self, shape_id, parametros=None):
+        if shape_id not in self.ciclos:
+            raise KeyError(shape_id)
+
+        p = obtener_parametros(parametros)
+        clave = (shape_id, tuple(p[nombre] for nombre in PARAMETROS_BUS))
+
+        with self._lock:
+            if clave in self._cache:
+                self._cache.move_to_end(clave)
+                return self._cache[clave]
+
+        respuesta = {"shape_id": shape_id, "parametros": p}
+        respuesta.update(calcular_consumo_ciclo(self.ciclos[shape_id], p))
+
+        with self._lock:
+            self._cache[clave] = respuesta
+            if len(self._cache) > self.tamano_cache:
+                self._cache.popitem(last=False)
+        return respuesta
+
+
+# Obtener el shape_id a partir de los parametros de la consulta (shape_id o route_id + sentido)
+def resolver_shape_id(consulta):
+    if "shape_id" in consulta:
+        return consulta["shape_id"]
+    if "route_id" in consulta and "sentido" in consulta:
+        return f"{consulta['route_id'].zfill(3)}_{consulta['sentido'].upper()}"
+    raise ValueError("La consulta debe incluir 'shape_id' o 'route_id' y 'sentido'.")
+
+
+class ManejadorConsumo(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Mantener la conexión abierta entre peticiones
+    disable_nagle_algorithm = True  # Evitar el retardo de ~40 ms entre cabeceras y cuerpo
+    servicio = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(url.query).items()}
+
+        if url.path == "/shapes":
+            self._responder(200, {"shapes": list(self.servicio.ciclos), "parametros": PARAMETROS_BUS})
+        elif url.path == "/consumo":
+            try:
+                shape_id = resolver_shape_id(consulta)
+                parametros = {clave: valor for clave, valor in consulta.items()
+                              if clave not in ("shape_id", "route_id", "sentido")}
+                self._responder(200, self.servicio.consultar(shape_id, parametros))
+            except KeyError as e:
+                self._responder(404, {"error": f"shape_id no encontrado: {e.args[0]}"})
+            except ValueError as e:
+                self._responder(400, {"error": str(e)})
+        else:
+            self._responder(404, {"error": f"Ruta no encontrada: {url.path}"})
+
+    def _responder(self, estado, cuerpo):
+        datos = json.dumps(cuerpo, allow_nan=False).encode("utf-8")  # NaN/Infinity no son JSON válido
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def log_message(self, format, *args):
+        # No escribir una línea por petición, penaliza la latencia
+        pass
+
+
+def crear_servidor(ciclos, host=HOST, puerto=PUERTO, tamano_cache=TAMANO_CACHE):
+    manejador = type("Manejador", (ManejadorConsumo,), {"servicio": ServicioConsumo(ciclos, tamano_cache)})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de consultas de consumo energético.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--csv", default=ruta_csv, help="Ruta a df_driving_model.csv")
+    parser.add_argument("--cache", type=int, default=TAMANO_CACHE, help="Número de respuestas en caché")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    ciclos = cargar_ciclos(args.csv)
+    servidor = crear_servidor(ciclos, args.host, args.puerto, args.cache)
+    print(f"Servicio listo en {time.perf_counter() - inicio:.2f} s: http://{args.host}:{args.puerto}/consumo?shape_id=...")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Deteniendo el servicio...")
+    finally:
+        servidor.server_close()
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Los scripts de Analisis_datos se importan entre si como modulos hermanos (from energy_consumption import ...),
+# igual que cuando se ejecutan desde esa carpeta
+CARPETA_SCRIPTS = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if CARPETA_SCRIPTS not in sys.path:
+    sys.path.insert(0, CARPETA_SCRIPTS)
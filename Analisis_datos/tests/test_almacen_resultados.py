@@ -0,0 +1,72 @@
+import contextlib
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from almacen_resultados import cargar_ciclo, consultar_ruta, abrir_almacen, registrar_resultados
+from driving_model import ruta_csv as ruta_csv_route_data
+from energy_consumption import obtener_parametros
+from pipeline_streaming import ejecutar_streaming, generar_datos_sinteticos
+
+pytestmark = pytest.mark.skipif(not os.path.exists(ruta_csv_route_data),
+                                reason="No existe df_route_data.csv. Ejecuta driving_model.py.")
+
+
+@pytest.fixture(scope="module")
+def resultados(tmp_path_factory):
+    # Dos ejecuciones del modelo sobre el mismo feed: con los parámetros por defecto y con un bus más pesado
+    carpeta = tmp_path_factory.mktemp("almacen")
+    ruta_entrada = str(carpeta / "df_route_data.csv")
+    generar_datos_sinteticos(ruta_csv_route_data, ruta_entrada, 2)
+    carpetas = {}
+    for nombre, parametros in (("base", None), ("bus 16 t", {"mass_bus": 16000})):
+        carpetas[nombre] = str(carpeta / nombre)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ejecutar_streaming(ruta_entrada, carpetas[nombre], parametros=parametros)
+    return carpeta, carpetas
+
+
+def test_registro_con_los_parametros_de_la_ejecucion(resultados):
+    carpeta, carpetas = resultados
+    ruta = str(carpeta / "almacen_resultados.sqlite")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ids = {nombre: registrar_resultados(c, nombre, ciclos=True, ruta=ruta) for nombre, c in carpetas.items()}
+
+    conexion = abrir_almacen(ruta)
+    guardados = dict(conexion.execute("SELECT escenario, parametros FROM ejecuciones").fetchall())
+    assert json.loads(guardados["base"]) == obtener_parametros()
+    assert json.loads(guardados["bus 16 t"]) == obtener_parametros({"mass_bus": 16000})
+
+    # El resumen guardado es el de la ejecución y el bus más pesado consume más
+    metricas = pd.read_csv(os.path.join(carpetas["bus 16 t"], "df_metricas_shape.csv"), dtype={"shape_id": str})
+    route_id = metricas["shape_id"].iloc[0].rpartition("_")[0]
+    consumo = consultar_ruta(conexion, route_id).set_index("escenario")
+    assert consumo.loc["bus 16 t", "tot_E_cons"] == pytest.approx(metricas.loc[metricas["shape_id"].str.startswith(route_id), "tot_E_cons"].sum())
+    assert consumo.loc["bus 16 t", "tot_E_cons"] > consumo.loc["base", "tot_E_cons"]
+    assert cargar_ciclo(conexion, ids["bus 16 t"], metricas["shape_id"].iloc[0]) is not None
+    conexion.close()
+
+
+def test_registro_sin_parametros_guardados(resultados, tmp_path):
+    _, carpetas = resultados
+    metricas = pd.read_csv(os.path.join(carpetas["base"], "df_metricas_shape.csv"), dtype={"shape_id": str})
+    metricas.to_csv(tmp_path / "df_metricas_shape.csv", index=False)
+    with pytest.raises(FileNotFoundError, match="parametros_ejecucion.json"):
+        registrar_resultados(str(tmp_path), "sin parametros", ruta=str(tmp_path / "almacen_resultados.sqlite"))
+
+
+def test_ultimos_cuenta_ejecuciones_y_no_escenarios(resultados, tmp_path):
+    _, carpetas = resultados
+    ruta = str(tmp_path / "almacen_resultados.sqlite")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ids = [registrar_resultados(carpetas[nombre], nombre, ruta=ruta) for nombre in ("bus 16 t", "base", "base")]
+
+    conexion = abrir_almacen(ruta)
+    metricas = pd.read_csv(os.path.join(carpetas["base"], "df_metricas_shape.csv"), dtype={"shape_id": str})
+    consumo = consultar_ruta(conexion, metricas["shape_id"].iloc[0].rpartition("_")[0], ultimos=2)
+    conexion.close()
+    assert consumo["ejecucion_id"].tolist() == ids[:0:-1]
+    assert consumo["escenario"].tolist() == ["base", "base"]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from decimacion import decimar_minmax
+
+NUM_TRAMOS = 50
+
+
+# Tramo de cada punto con los mismos bordes que decimar_minmax (un punto en un borde pertenece al tramo siguiente)
+def tramos(x, num_tramos=NUM_TRAMOS):
+    x_min, x_max = np.min(x), np.max(x)
+    bordes = x_min + (x_max - x_min) * np.arange(1, num_tramos) / num_tramos
+    return np.searchsorted(bordes, x, side="right")
+
+
+@pytest.fixture
+def serie():
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 1000, 20000))
+    y = np.cumsum(rng.normal(0, 1, len(x)))
+    y[7345] = 500.0  # Pico aislado, como los de potencia en frenada regenerativa
+    return x, y
+
+
+def comprobar_decimado(x, y, indices):
+    # Índices crecientes, sin repetir, con como máximo 4 puntos por tramo
+    assert np.all(np.diff(indices) > 0)
+    assert np.bincount(tramos(x[indices]), minlength=NUM_TRAMOS).max() <= 4
+
+    # Se conservan los extremos de x y el mínimo y el máximo de y de cada tramo
+    assert {np.argmin(x), np.argmax(x)} <= set(indices)
+    tramo = tramos(x)
+    for t in np.unique(tramo):
+        valores = y[tramo == t]
+        if np.all(np.isnan(valores)):
+            continue
+        conservados = y[indices][tramo[indices] == t]
+        assert np.nanmin(valores) in conservados
+        assert np.nanmax(valores) in conservados
+
+
+def test_conserva_extremos_y_como_maximo_4_puntos_por_tramo(serie):
+    x, y = serie
+    indices = decimar_minmax(x, y, NUM_TRAMOS)
+    comprobar_decimado(x, y, indices)
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert y[indices].min() == y.min()
+    assert y[indices].max() == y.max() == 500.0
+    assert len(indices) <= 4 * NUM_TRAMOS
+
+
+def test_serie_corta_sin_cambios():
+    x = np.arange(4 * NUM_TRAMOS, dtype=np.float64)
+    np.testing.assert_array_equal(decimar_minmax(x, np.sin(x), NUM_TRAMOS), np.arange(len(x)))
+    np.testing.assert_array_equal(decimar_minmax(x[:3], np.sin(x[:3]), NUM_TRAMOS), np.arange(3))
+
+
+def test_x_desordenada(serie):
+    x, y = serie
+    permutacion = np.random.default_rng(1).permutation(len(x))
+    indices = decimar_minmax(x[permutacion], y[permutacion], NUM_TRAMOS)
+
+    # Los índices se refieren a la serie desordenada y son los mismos puntos que con la serie ordenada
+    comprobar_decimado(x[permutacion], y[permutacion], indices)
+    np.testing.assert_array_equal(np.sort(permutacion[indices]), decimar_minmax(x, y, NUM_TRAMOS))
+
+
+def test_valores_nan(serie):
+    x, y = serie
+    y = y.copy()
+    y[::7] = np.nan
+    y[(x >= 100) & (x < 140)] = np.nan  # Dos tramos completos sin valores
+    indices = decimar_minmax(x, y, NUM_TRAMOS)
+
+    comprobar_decimado(x, y, indices)
+    assert np.nanmin(y[indices]) == np.nanmin(y)
+    assert np.nanmax(y[indices]) == np.nanmax(y)
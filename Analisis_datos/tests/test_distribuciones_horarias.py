@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from distribuciones_horarias import NUM_HORAS, calcular_distribuciones, calcular_histogramas, calcular_salidas
+
+
+def horas(*horarios):
+    return [int(h) * 3600 + int(m) * 60 + int(s) for h, m, s in (horario.split(":") for horario in horarios)]
+
+
+@pytest.fixture
+def salidas():
+    trips = pd.DataFrame({
+        "route_id": ["R1", "R1", "R1", "R2", "R2"],
+        "service_id": ["LA", "LA", "SA", "LA", "LA"],
+        "trip_id": ["T1", "T2", "T3", "F1", "T4"],
+        "shape_id": ["R1_A", "R1_B", "R1_A", "R2_A", "R2_A"],
+    })
+    # La salida de cada trip es la menor departure_time; T3 sale después de las 24:00:00
+    stop_times = pd.DataFrame({
+        "trip_id": ["T1", "T1", "T2", "T3", "T3", "F1", "T4"],
+        "departure_time": ["06:10:00", "06:00:00", "07:30:00", "25:15:00", "25:20:00", "10:00:00", "12:00:00"],
+    })
+    # F1 sale cada 20 min de 08:00 a 09:00 y cada 10 min de 23:50 a 24:10 (end_time excluida)
+    frequencies = pd.DataFrame({
+        "trip_id": ["F1", "F1"],
+        "start_time": ["08:00:00", "23:50:00"],
+        "end_time": ["09:00:00", "24:10:00"],
+        "headway_secs": [1200, 600],
+    })
+    return calcular_salidas({"trips": trips, "stop_times": stop_times, "frequencies": frequencies})
+
+
+def test_salidas_con_frequencies_y_horarios_despues_de_24(salidas):
+    obtenido = sorted(salidas.itertuples(index=False, name=None))
+    esperado = sorted(
+        [("R1", "LA", "R1_A", s) for s in horas("06:00:00")]
+        + [("R1", "LA", "R1_B", s) for s in horas("07:30:00")]
+        + [("R1", "SA", "R1_A", s) for s in horas("25:15:00")]
+        + [("R2", "LA", "R2_A", s) for s in horas("08:00:00", "08:20:00", "08:40:00", "23:50:00", "24:00:00", "12:00:00")]
+    )
+    assert obtenido == esperado
+    assert salidas["salida"].dtype == np.int64
+
+
+def test_media_y_desviacion_de_la_primera_y_la_ultima_salida(salidas):
+    por_ruta, por_servicio = calcular_distribuciones(salidas)
+
+    # Primera y última salida de cada shape: R1_A (LA) 06:00, R1_B 07:30, R1_A (SA) 25:15, R2_A 08:00 y 24:00
+    r1 = por_ruta.set_index("route_id").loc["R1"]
+    extremos_r1 = horas("06:00:00", "07:30:00", "25:15:00")
+    assert r1["inicio_media_s"] == pytest.approx(np.mean(extremos_r1))
+    assert r1["inicio_std_min"] == pytest.approx(np.std(extremos_r1, ddof=1) / 60)
+    assert r1["fin_media_s"] == pytest.approx(np.mean(extremos_r1))
+    assert r1["inicio_media"] == "12:55:00"
+
+    servicios = por_servicio.set_index(["route_id", "service_id"])
+    r1_la = servicios.loc[("R1", "LA")]
+    assert r1_la["inicio_media_s"] == pytest.approx(np.mean(horas("06:00:00", "07:30:00")))
+    assert r1_la["inicio_std_min"] == pytest.approx(np.std(horas("06:00:00", "07:30:00"), ddof=1) / 60)
+    assert r1_la["num_salidas"] == 2
+
+    r1_sa = servicios.loc[("R1", "SA")]
+    assert r1_sa["inicio_media"] == r1_sa["fin_media"] == "25:15:00"
+    assert np.isnan(r1_sa["inicio_std_min"])
+
+    r2_la = servicios.loc[("R2", "LA")]
+    assert (r2_la["inicio_media"], r2_la["fin_media"], r2_la["num_salidas"]) == ("08:00:00", "24:00:00", 6)
+    assert "num_salidas" not in por_ruta.columns
+
+
+def test_histograma_de_salidas_por_hora(salidas):
+    histogramas = calcular_histogramas(salidas).set_index(["route_id", "service_id"])
+    assert list(histogramas.columns) == [f"h{h:02d}" for h in range(NUM_HORAS)]
+
+    esperado = {
+        ("R1", "LA"): {6: 1, 7: 1},
+        ("R1", "SA"): {25: 1},
+        ("R2", "LA"): {8: 3, 12: 1, 23: 1, 24: 1},
+    }
+    assert sorted(histogramas.index) == sorted(esperado)
+    for grupo, conteos in esperado.items():
+        fila = np.zeros(NUM_HORAS, dtype=np.int64)
+        fila[list(conteos)] = list(conteos.values())
+        np.testing.assert_array_equal(histogramas.loc[grupo].to_numpy(), fila, err_msg=str(grupo))
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from energy_consumption import TRAMOS_CURVA, calcular_metricas_shape
+
+
+def ciclo_sintetico(shape_id, num_puntos, semilla=0):
+    rng = np.random.default_rng(semilla)
+    segundos = np.arange(num_puntos)
+    horario = pd.Series(segundos).map(lambda s: f"{6 + s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}")
+    P_cons = rng.normal(20000, 40000, num_puntos)
+    return pd.DataFrame({
+        "shape_id": shape_id,
+        "shape_dist_traveled": np.cumsum(rng.uniform(0, 10, num_puntos)),
+        "departure_time": horario,
+        "arrival_time": horario,
+        "F_aero": rng.uniform(0, 500, num_puntos),
+        "F_g": rng.normal(0, 2000, num_puntos),
+        "F_roll": np.full(num_puntos, 1400.0),
+        "F_acc": rng.normal(0, 5000, num_puntos),
+        "P_trac": P_cons,
+        "P_cons": P_cons,
+        "E_cons": P_cons / 3.6e6,
+    })
+
+
+def test_curvas_con_resolucion_fija_por_shape():
+    largo = ciclo_sintetico("001_A", 20 * TRAMOS_CURVA)
+    corto = ciclo_sintetico("001_B", 500, semilla=1)
+    _, curvas = calcular_metricas_shape(pd.concat([largo, corto], ignore_index=True))
+
+    curva_larga = curvas[curvas["shape_id"] == "001_A"]
+    assert len(curva_larga) <= 6 * TRAMOS_CURVA
+    # Se conservan los extremos de la serie, de la potencia y la energía acumulada final
+    assert curva_larga["shape_dist_traveled"].iloc[[0, -1]].tolist() == largo["shape_dist_traveled"].iloc[[0, -1]].tolist()
+    assert curva_larga["P_cons"].max() == largo["P_cons"].max()
+    assert curva_larga["P_cons"].min() == largo["P_cons"].min()
+    E_acum = largo["E_cons"].cumsum()
+    np.testing.assert_allclose([curva_larga["E_acum"].min(), curva_larga["E_acum"].max(), curva_larga["E_acum"].iloc[-1]],
+                               [E_acum.min(), E_acum.max(), E_acum.iloc[-1]])
+
+    # Los shapes con menos puntos que la resolución se guardan completos
+    curva_corta = curvas[curvas["shape_id"] == "001_B"]
+    np.testing.assert_allclose(curva_corta["P_cons"], corto["P_cons"])
+    np.testing.assert_allclose(curva_corta["E_acum"], corto["E_cons"].cumsum())
@@ -0,0 +1,60 @@
+import contextlib
+import io
+import zipfile
+
+import pandas as pd
+
+from gtfs import cargar_datos, tablas_con_tipos
+from validador_gtfs import cargar_tablas
+
+
+# Enteros con ceros a la izquierda, decimales, valores vacíos y texto que empieza por números
+ARCHIVOS = {
+    "routes.txt": "route_id,route_short_name,route_type,route_color\n068,68,3,FF0000\n116,116,3,00AA00\n",
+    "trips.txt": "route_id,service_id,trip_id,shape_id\n068,LA,1001,068_A\n116,SA,T-2,116_B\n",
+    "stop_times.txt": "trip_id,arrival_time,departure_time,stop_id,stop_sequence,shape_dist_traveled\n"
+                      "1001,08:00:00,08:00:00,4,1,0\n1001,,,7,2,350.5\nT-2,25:10:00,25:10:30,4,1,\n",
+    "shapes.txt": "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+                  "068_A,40.41,-3.70,1,0\n068_A,40.42,-3.71,2,1200\n",
+}
+
+
+def test_tablas_con_tipos_igual_que_cargar_datos(tmp_path):
+    for nombre, texto in ARCHIVOS.items():
+        (tmp_path / nombre).write_text(texto, encoding="utf-8")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        esperado = cargar_datos(str(tmp_path))
+    obtenido = tablas_con_tipos(cargar_tablas(str(tmp_path)))
+
+    assert sorted(obtenido) == sorted(esperado)
+    for nombre in esperado:
+        pd.testing.assert_frame_equal(obtenido[nombre], esperado[nombre])
+
+
+def test_zip_igual_que_carpeta(tmp_path):
+    # agency.txt con BOM, como en algunos feeds publicados
+    archivos = {**ARCHIVOS, "agency.txt": "\ufeffagency_id,agency_name,agency_url,agency_timezone\n"
+                                          "1,EMT,https://www.emtmadrid.es,Europe/Madrid\n"}
+    carpeta = tmp_path / "feed"
+    carpeta.mkdir()
+    for nombre, texto in archivos.items():
+        (carpeta / nombre).write_text(texto, encoding="utf-8")
+
+    # Archivos dentro de una subcarpeta del zip y metadatos de macOS que se deben ignorar
+    ruta_zip = tmp_path / "feed.zip"
+    with zipfile.ZipFile(ruta_zip, "w") as archivo_zip:
+        for nombre, texto in archivos.items():
+            archivo_zip.writestr(f"gtfs/madrid/{nombre}", texto.encode("utf-8"))
+        archivo_zip.writestr("__MACOSX/gtfs/madrid/agency.txt", b"\x00\x05\x16\x07")
+        archivo_zip.writestr("__MACOSX/gtfs/madrid/._routes.txt", b"\x00\x05\x16\x07")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        esperado = cargar_datos(str(carpeta))
+        obtenido = cargar_datos(str(ruta_zip))
+
+    assert sorted(obtenido) == sorted(esperado) == sorted(nombre.replace(".txt", "") for nombre in archivos)
+    for nombre in esperado:
+        pd.testing.assert_frame_equal(obtenido[nombre], esperado[nombre])
+        assert not any("\ufeff" in columna for columna in obtenido[nombre].columns)
+    assert obtenido["agency"].columns[0] == "agency_id"
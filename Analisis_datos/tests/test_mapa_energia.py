@@ -0,0 +1,75 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from mapa_energia import (
+    COLOR_PARADAS,
+    TAMANO_TESELA,
+    agregar_magnitud,
+    calcular_extension,
+    componer_imagen,
+    escala_color,
+    generar_teselas,
+    rasterizar,
+)
+
+
+@pytest.fixture
+def puntos():
+    # Dos rutas separadas para que haya teselas vacías en los niveles con zoom
+    rng = np.random.default_rng(0)
+    t = rng.uniform(0, 1, 5000)
+    lat = np.r_[40.40 + 0.02 * t[:2500], 40.45 - 0.01 * t[2500:]]
+    lon = np.r_[-3.70 + 0.01 * t[:2500], -3.62 + 0.01 * t[2500:]]
+    return pd.DataFrame({"shape_pt_lat": lat, "shape_pt_lon": lon,
+                         "E_cons": rng.normal(0.01, 0.02, 5000), "P_cons": rng.normal(20000, 40000, 5000)})
+
+
+@pytest.mark.parametrize("magnitud", ["E_cons", "P_cons"])
+def test_teselas_iguales_a_la_rejilla_completa(tmp_path, puntos, magnitud):
+    lat_paradas, lon_paradas = np.array([40.41, 40.30]), np.array([-3.695, -3.80])  # La segunda, fuera de la extensión
+    extension = calcular_extension(puntos["shape_pt_lat"].to_numpy(), puntos["shape_pt_lon"].to_numpy())
+    generar_teselas(puntos, lat_paradas, lon_paradas, magnitud, extension, 2, str(tmp_path))
+
+    for z in range(3):
+        n = 2 ** z
+        lado = TAMANO_TESELA * n
+        valores, cuenta = agregar_magnitud(puntos, magnitud, extension, lado, lado)
+        _, cuenta_paradas = rasterizar(lat_paradas, lon_paradas, None, extension, lado, lado)
+        norma, cmap = escala_color(valores[cuenta > 0])
+        referencia = np.flipud(componer_imagen(valores, cuenta, cuenta_paradas, norma, cmap))
+        ocupacion = np.flipud((cuenta > 0) | (cuenta_paradas > 0))
+
+        for x in range(n):
+            for y in range(n):
+                filas = slice(y * TAMANO_TESELA, (y + 1) * TAMANO_TESELA)
+                columnas = slice(x * TAMANO_TESELA, (x + 1) * TAMANO_TESELA)
+                ruta = tmp_path / str(z) / str(x) / f"{y}.png"
+                assert ruta.exists() == ocupacion[filas, columnas].any()
+                if ruta.exists():
+                    np.testing.assert_allclose(plt.imread(ruta), referencia[filas, columnas], atol=1 / 255 + 1e-6)
+    assert len(list(tmp_path.glob("2/*/*.png"))) < 16
+
+
+def test_escala_color_con_percentiles():
+    valores = np.r_[np.linspace(-1, 10, 1000), -500.0, 1e6]
+    norma, cmap = escala_color(valores)
+    assert norma.vmin == pytest.approx(np.percentile(valores, 2))
+    assert norma.vmax == pytest.approx(np.percentile(valores, 98))
+    assert cmap.name == "coolwarm" and norma(0) == pytest.approx(0.5)
+
+    norma, cmap = escala_color(np.r_[np.linspace(1, 2, 1000), 1e6])
+    assert cmap.name == "inferno" and norma.vmax < 3
+    norma, _ = escala_color(np.full(10, 3.0))
+    assert norma.vmax > norma.vmin
+
+
+@pytest.mark.parametrize("nombre", ["coolwarm", "inferno"])
+def test_color_paradas_fuera_de_las_escalas(nombre):
+    colores = plt.get_cmap(nombre)(np.linspace(0, 1, 256))[:, :3]
+    assert np.min(np.linalg.norm(colores - np.array(COLOR_PARADAS[:3]), axis=1)) > 0.3
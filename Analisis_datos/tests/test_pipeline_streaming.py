@@ -0,0 +1,103 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from driving_model import ruta_csv as ruta_csv_route_data
+from energy_consumption import calcular_metricas_shape
+from pipeline_streaming import ETAPAS, ejecutar_streaming, generar_datos_sinteticos
+
+CARPETA_SCRIPTS = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+NUM_SHAPES = 8  # Shapes de la comparación con el modelo por lotes
+NUM_SHAPES_MEMORIA = 500  # Tamaño pequeño de la prueba de memoria; el grande es FACTOR_SHAPES veces mayor
+FACTOR_SHAPES = 4
+CRECIMIENTO_MAXIMO_MB = 10  # Diferencia admitida entre el caso pequeño y el grande
+FRACCION_MAXIMA_LOTES = 0.75  # Memoria del streaming respecto a la del modelo por lotes con la misma entrada
+
+pytestmark = pytest.mark.skipif(not os.path.exists(ruta_csv_route_data),
+                                reason="No existe df_route_data.csv. Ejecuta driving_model.py.")
+
+# En la prueba de memoria generate_instantaneous_velocity (bucle fila a fila de driving_model.py) se sustituye por
+# una versión vectorizada para que miles de shapes se procesen en segundos. La memoria depende del tamaño de los
+# DataFrame y no de cómo se calcula la velocidad; la equivalencia con las etapas reales se comprueba aparte.
+CODIGO_MEMORIA = (
+    "import contextlib, io, json, sys\n"
+    "import pandas as pd\n"
+    "import pipeline_streaming\n"
+    "def velocidad(df):\n"
+    "    dt = df['delta_time'].where(df['delta_time'] > 0, 1)\n"
+    "    df['inst_vel'] = df['shape_dist_traveled'].diff().fillna(0).clip(lower=0) / dt\n"
+    "    df['inst_acc'] = df['inst_vel'].diff().fillna(0) / dt\n"
+    "    return df\n"
+    "pipeline_streaming.generate_instantaneous_velocity = velocidad\n"
+    "with contextlib.redirect_stdout(io.StringIO()):\n"
+    "    if sys.argv[1] == 'streaming':\n"
+    "        pipeline_streaming.ejecutar_streaming(sys.argv[2], sys.argv[3])\n"
+    "    else:\n"
+    "        df = pd.read_csv(sys.argv[2], dtype={'shape_id': str})\n"
+    "        for etapa in pipeline_streaming.etapas_modelo():\n"
+    "            df = etapa(df)\n"
+    "print(json.dumps({'rss_mb': pipeline_streaming.rss_maximo_mb()}))\n"
+)
+
+
+# Ejecutar el modelo en un proceso nuevo para medir su memoria residente maxima sin la de pytest
+def rss_en_subproceso(modo, ruta_entrada, carpeta_resultados=""):
+    salida = subprocess.run([sys.executable, "-c", CODIGO_MEMORIA, modo, ruta_entrada, carpeta_resultados],
+                            cwd=CARPETA_SCRIPTS, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])["rss_mb"]
+
+
+def test_memoria_no_crece_con_el_numero_de_shapes(tmp_path):
+    rss = {}
+    for num_shapes in (NUM_SHAPES_MEMORIA, NUM_SHAPES_MEMORIA * FACTOR_SHAPES):
+        ruta_entrada = str(tmp_path / f"df_route_data_{num_shapes}.csv")
+        generar_datos_sinteticos(ruta_csv_route_data, ruta_entrada, num_shapes)
+        rss[num_shapes] = rss_en_subproceso("streaming", ruta_entrada, str(tmp_path / f"results_{num_shapes}"))
+    rss_lotes = rss_en_subproceso("lotes", ruta_entrada)
+
+    rss_pequeno, rss_grande = rss[NUM_SHAPES_MEMORIA], rss[NUM_SHAPES_MEMORIA * FACTOR_SHAPES]
+    assert rss_grande - rss_pequeno < CRECIMIENTO_MAXIMO_MB
+    assert rss_grande < FRACCION_MAXIMA_LOTES * rss_lotes
+
+
+@pytest.fixture(scope="module")
+def ejecucion(tmp_path_factory):
+    carpeta = tmp_path_factory.mktemp("streaming")
+    ruta_entrada = str(carpeta / "df_route_data.csv")
+    generar_datos_sinteticos(ruta_csv_route_data, ruta_entrada, NUM_SHAPES)
+    carpeta_resultados = str(carpeta / "results")
+    # Bloques pequeños para que los shapes queden repartidos entre varios bloques
+    with contextlib.redirect_stdout(io.StringIO()):
+        ejecutar_streaming(ruta_entrada, carpeta_resultados, tamano_bloque=1000)
+    return ruta_entrada, carpeta_resultados
+
+
+def test_streaming_igual_que_por_lotes(ejecucion):
+    ruta_entrada, carpeta_resultados = ejecucion
+
+    # Etapas por lotes sobre todo el archivo, como en driving_model.py y energy_consumption.py
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = pd.read_csv(ruta_entrada, dtype={"shape_id": str})
+        for etapa in ETAPAS:
+            df = etapa(df)
+        metricas, curvas = calcular_metricas_shape(df)
+
+    for nombre, esperado in [("df_energy_consumption.csv", df), ("df_metricas_shape.csv", metricas),
+                             ("df_curvas_consumo.csv", curvas)]:
+        obtenido = pd.read_csv(os.path.join(carpeta_resultados, nombre), dtype={"shape_id": str})
+        assert list(obtenido.columns) == list(esperado.columns)
+        assert len(obtenido) == len(esperado)
+        for col in esperado.columns:
+            if pd.api.types.is_numeric_dtype(esperado[col]):
+                np.testing.assert_allclose(obtenido[col].to_numpy(dtype=np.float64), esperado[col].to_numpy(dtype=np.float64),
+                                           rtol=1e-9, atol=1e-9, err_msg=f"{nombre}: {col}")
+            else:
+                assert obtenido[col].astype(str).tolist() == esperado[col].astype(str).tolist(), f"{nombre}: {col}"
@@ -0,0 +1,54 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from energy_consumption import PARAMETROS_BUS, calcular_fuerzas_arrays
+from sensibilidades import _arrays_modelo, comprobar_sensibilidades
+
+TOLERANCIA = 1e-6
+
+
+@pytest.fixture
+def ciclo():
+    # Tres shapes: solo tracción (acelerando en llano), solo regeneración (frenando en bajada) y mixto.
+    # Las aceleraciones se eligen lejos de P_trac = 0 para que la perturbación no cambie de rama
+    vel = np.linspace(3, 15, 40)
+    traccion = pd.DataFrame({"inst_vel": vel, "inst_acc": 0.6, "angle_deg": 1.0, "delta_time": 2.0})
+    regeneracion = pd.DataFrame({"inst_vel": vel[::-1], "inst_acc": -1.2, "angle_deg": -2.0, "delta_time": 1.5})
+    mixto = pd.concat([traccion, regeneracion]).iloc[np.r_[0:40, 40:80].reshape(2, -1).T.ravel()]
+    return pd.concat([traccion.assign(shape_id="001_A"), regeneracion.assign(shape_id="001_B"),
+                      mixto.assign(shape_id="002_A")], ignore_index=True)
+
+
+def test_ciclo_con_traccion_y_regeneracion(ciclo):
+    inst_vel, inst_acc, angle_rad, _ = _arrays_modelo(ciclo)
+    P_trac = sum(calcular_fuerzas_arrays(inst_vel, inst_acc, angle_rad)) * inst_vel
+    for shape_id in ciclo["shape_id"].unique():
+        P_shape = P_trac[(ciclo["shape_id"] == shape_id).to_numpy()]
+        assert np.abs(P_shape).min() > 1e3  # Ningún instante cerca del cambio de rama
+    assert (P_trac > 0).any() and (P_trac < 0).any()
+    assert ((P_trac > 0) & (ciclo["shape_id"] == "002_A")).any() and ((P_trac < 0) & (ciclo["shape_id"] == "002_A")).any()
+
+
+# Parámetros en los límites de su intervalo: los que valen 0 necesitan un paso absoluto y reg_eff = 1 una diferencia de un lado
+@pytest.mark.parametrize("parametros", [
+    None, {"mass_bus": 18000, "reg_eff": 0.7, "Paux": 12000}, {"reg_eff": 0, "Paux": 0, "Cr": 0},
+    {"reg_eff": 1, "motor_eff": 1, "conv_eff": 1},
+])
+def test_derivadas_iguales_a_diferencias_finitas(ciclo, parametros):
+    with contextlib.redirect_stdout(io.StringIO()):
+        errores = comprobar_sensibilidades(ciclo, parametros)
+    assert errores["parametro"].tolist() == list(PARAMETROS_BUS)
+    for fila in errores.itertuples():
+        assert fila.error_relativo_max < TOLERANCIA, fila.parametro
+
+
+def test_error_no_finito_cuenta_como_fallo(ciclo):
+    ciclo.loc[5, "inst_vel"] = np.nan
+    with contextlib.redirect_stdout(io.StringIO()):
+        errores = comprobar_sensibilidades(ciclo)
+    assert np.isinf(errores["error_relativo_max"]).all()
+    assert not (errores["error_relativo_max"] <= TOLERANCIA).any()
@@ -0,0 +1,121 @@
+import contextlib
+import http.client
+import io
+import json
+import threading
+
+import pandas as pd
+import pytest
+
+from energy_consumption import (
+    PARAMETROS_BUS,
+    calcular_energia_instantanea,
+    calcular_fuerzas,
+    calcular_metricas_shape,
+    calcular_potencia,
+    calcular_potencia_consumida,
+    obtener_parametros,
+    ruta_csv,
+)
+from servidor_consumo import cargar_ciclos, crear_servidor
+
+
+# Servidor en un hilo con los ciclos indicados, en un puerto libre
+@contextlib.contextmanager
+def servidor_en_hilo(ciclos):
+    servidor = crear_servidor(ciclos, puerto=0)
+    hilo = threading.Thread(target=servidor.serve_forever, daemon=True)
+    hilo.start()
+    try:
+        yield servidor.server_address
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+@pytest.fixture(scope="module")
+def ciclos():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return cargar_ciclos(ruta_csv)
+
+
+@pytest.fixture(scope="module")
+def servidor(ciclos):
+    with servidor_en_hilo(ciclos) as direccion:
+        yield direccion
+
+
+def consultar(direccion, consulta):
+    conexion = http.client.HTTPConnection(*direccion)
+    conexion.request("GET", consulta)
+    respuesta = conexion.getresponse()
+    cuerpo = respuesta.read().decode("utf-8")
+    conexion.close()
+    # parse_constant falla con NaN/Infinity, que no son JSON válido
+    return respuesta.status, json.loads(cuerpo, parse_constant=lambda valor: pytest.fail(f"JSON no válido: {valor}"))
+
+
+# Etapas de energy_consumption.py sobre el DataFrame, para comparar con la respuesta del servidor
+def consumo_por_dataframe(shape_id, parametros):
+    df = pd.read_csv(ruta_csv)
+    df = df[df["shape_id"] == shape_id].reset_index(drop=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = calcular_fuerzas(df, parametros)
+        df = calcular_potencia(df)
+        df = calcular_potencia_consumida(df, parametros)
+        df = calcular_energia_instantanea(df)
+        metricas, _ = calcular_metricas_shape(df)
+    return metricas.iloc[0]
+
+
+@pytest.mark.parametrize("parametros", [
+    {"mass_bus": "nan"}, {"mass_bus": "inf"}, {"Paux": "-inf"}, {"mass_bus": 0}, {"motor_eff": 0},
+    {"conv_eff": -0.5}, {"reg_eff": 1.5}, {"Cd": -1}, {"mass_bus": "pesado"},
+])
+def test_obtener_parametros_rechaza_valores_no_validos(parametros):
+    with pytest.raises(ValueError):
+        obtener_parametros(parametros)
+
+
+def test_obtener_parametros_acepta_valores_validos():
+    p = obtener_parametros({"mass_bus": "16000", "reg_eff": 0})
+    assert p["mass_bus"] == 16000.0 and p["reg_eff"] == 0.0
+    assert {k: v for k, v in p.items() if k not in ("mass_bus", "reg_eff")} == \
+        {k: v for k, v in PARAMETROS_BUS.items() if k not in ("mass_bus", "reg_eff")}
+
+
+@pytest.mark.parametrize("parametros", ["mass_bus=nan", "mass_bus=inf", "motor_eff=0", "mass_bus=-1"])
+def test_consumo_con_parametros_no_validos_devuelve_400(servidor, parametros):
+    estado, cuerpo = consultar(servidor, f"/consumo?shape_id=068_A&{parametros}")
+    assert estado == 400
+    assert "error" in cuerpo
+
+
+def test_consumo_valido_devuelve_json_estricto(servidor):
+    estado, cuerpo = consultar(servidor, "/consumo?route_id=68&sentido=a&mass_bus=16000")
+    assert estado == 200
+    assert cuerpo["shape_id"] == "068_A"
+    esperado = consumo_por_dataframe("068_A", obtener_parametros({"mass_bus": 16000}))
+    assert cuerpo["tot_E_cons"] == pytest.approx(esperado["tot_E_cons"], rel=1e-9)
+    assert cuerpo["E_cons_km"] == pytest.approx(esperado["E_cons_km"], rel=1e-9)
+
+
+@pytest.mark.parametrize("parametros", [{}, {"mass_bus": 16000, "Paux": 8000, "reg_eff": 0.4, "Cr": 0.01}])
+def test_consumo_igual_que_energy_consumption(servidor, parametros):
+    consulta = "".join(f"&{clave}={valor}" for clave, valor in parametros.items())
+    estado, cuerpo = consultar(servidor, f"/consumo?shape_id=116_B{consulta}")
+    assert estado == 200
+
+    esperado = consumo_por_dataframe("116_B", obtener_parametros(parametros))
+    assert cuerpo["tot_E_cons"] == pytest.approx(esperado["tot_E_cons"], rel=1e-9)
+    assert cuerpo["E_cons_km"] == pytest.approx(esperado["E_cons_km"], rel=1e-9)
+    assert cuerpo["tot_dist_traveled"] == esperado["tot_dist_traveled"]
+
+
+def test_shape_sin_distancia_devuelve_e_cons_km_null(ciclos):
+    ciclo = dict(ciclos["068_A"], tot_dist_traveled=0.0)
+    with servidor_en_hilo({"000_A": ciclo}) as direccion:
+        estado, cuerpo = consultar(direccion, "/consumo?shape_id=000_A")
+    assert estado == 200
+    assert cuerpo["tot_dist_traveled"] == 0
+    assert cuerpo["E_cons_km"] is None
@@ -0,0 +1,140 @@
+import pandas as pd
+import pytest
+
+from validador_gtfs import validar_feed
+
+
+def tabla(texto):
+    filas = [linea.split(",") for linea in texto.strip().splitlines()]
+    return pd.DataFrame(filas[1:], columns=filas[0]).replace("", None)
+
+
+@pytest.fixture
+def datos():
+    # Feed mínimo válido: dos viajes de cuatro paradas con todos los horarios
+    return {
+        "agency": tabla("agency_name,agency_url,agency_timezone\nEMT,https://www.emtmadrid.es,Europe/Madrid"),
+        "routes": tabla("route_id,route_type\n1,3"),
+        "trips": tabla("route_id,service_id,trip_id,shape_id\n1,LA,T1,001_A\n1,LA,T2,001_A"),
+        "stops": tabla("stop_id,stop_lat,stop_lon\n" + "\n".join(f"S{i},40.4{i},-3.7{i}" for i in range(4))),
+        "shapes": tabla("shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+                        "001_A,40.40,-3.70,1,0\n001_A,40.43,-3.73,2,900"),
+        "calendar": tabla("service_id,start_date,end_date\nLA,20240101,20241231"),
+        "stop_times": tabla(
+            "trip_id,arrival_time,departure_time,stop_id,stop_sequence,timepoint\n"
+            + "\n".join(f"{trip},{h}:0{i}:00,{h}:0{i}:30,S{i},{i + 1},{'1' if trip == 'T2' else '0'}"
+                        for trip, h in (("T1", "08"), ("T2", "09")) for i in range(4))
+        ),
+    }
+
+
+def resumen_horarios(datos):
+    resumen, filas = validar_feed(datos)
+    resumen = resumen[resumen["comprobacion"].str.startswith("valor_vacio")]
+    return {(fila.comprobacion, fila.gravedad): fila.num_filas for fila in resumen.itertuples()}, filas
+
+
+def test_feed_sin_horarios_vacios(datos):
+    resumen, _ = validar_feed(datos)
+    assert resumen.empty
+
+
+def test_horario_vacio_en_parada_intermedia_es_aviso(datos):
+    st = datos["stop_times"]
+    st.loc[(st["trip_id"] == "T1") & st["stop_sequence"].isin(["2", "3"]), ["arrival_time", "departure_time"]] = None
+    resumen, filas = resumen_horarios(datos)
+    assert resumen == {("valor_vacio:arrival_time", "aviso"): 2, ("valor_vacio:departure_time", "aviso"): 2}
+    assert sorted(filas["linea"].unique().tolist()) == [3, 4]
+
+
+def test_horario_vacio_obligatorio_es_error(datos):
+    st = datos["stop_times"]
+    primera_y_ultima = (st["trip_id"] == "T1") & st["stop_sequence"].isin(["1", "4"])
+    con_timepoint = (st["trip_id"] == "T2") & (st["stop_sequence"] == "2")
+    st.loc[primera_y_ultima | con_timepoint, "arrival_time"] = None
+    resumen, _ = resumen_horarios(datos)
+    assert resumen == {("valor_vacio:arrival_time", "error"): 3}
+
+
+def test_horario_vacio_sin_timepoint(datos):
+    datos["stop_times"] = datos["stop_times"].drop(columns="timepoint")
+    datos["stop_times"].loc[5, "departure_time"] = None  # Parada intermedia de T2
+    resumen, _ = resumen_horarios(datos)
+    assert resumen == {("valor_vacio:departure_time", "aviso"): 1}
+
+
+def problemas(datos):
+    resumen, filas = validar_feed(datos)
+    return {(fila.comprobacion, fila.gravedad): fila.num_filas for fila in resumen.itertuples()}, filas
+
+
+def lineas(filas, comprobacion):
+    return sorted(filas.loc[filas["comprobacion"] == comprobacion, "linea"].tolist())
+
+
+def test_llegada_decreciente(datos):
+    datos["stop_times"].loc[2, "arrival_time"] = "08:00:10"  # T1, parada 3 antes que la parada 2
+    resumen, filas = problemas(datos)
+    assert resumen == {("no_monotono:llegada", "error"): 1}
+    assert lineas(filas, "no_monotono:llegada") == [4]
+
+
+def test_llegada_decreciente_separada_por_horario_vacio(datos):
+    st = datos["stop_times"]
+    st.loc[1, ["arrival_time", "departure_time"]] = None  # T1, parada 2 sin horario
+    st.loc[2, ["arrival_time", "departure_time"]] = ["07:59:00", "07:59:30"]  # T1, parada 3 antes que la parada 1
+    resumen, filas = problemas(datos)
+    assert resumen[("no_monotono:llegada", "error")] == 1
+    assert lineas(filas, "no_monotono:llegada") == [4]
+    assert resumen[("valor_vacio:arrival_time", "aviso")] == 1
+
+
+def test_distancia_decreciente_en_stop_times_y_shapes(datos):
+    datos["stop_times"]["shape_dist_traveled"] = ["0", "300", None, "250", "0", "300", "600", "900"]
+    datos["shapes"] = tabla("shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence,shape_dist_traveled\n"
+                            "001_A,40.40,-3.70,1,0\n001_A,40.41,-3.71,2,500\n"
+                            "001_A,40.42,-3.72,3,450\n001_A,40.43,-3.73,4,900")
+    resumen, filas = validar_feed(datos)
+    assert resumen[["archivo", "comprobacion", "num_filas"]].values.tolist() == [
+        ["stop_times.txt", "no_monotono:distancia", 1], ["shapes.txt", "no_monotono:distancia", 1]]
+    # T1, parada 4 (después de una distancia vacía) y el tercer punto del shape
+    assert filas[["archivo", "linea"]].values.tolist() == [["stop_times.txt", 5], ["shapes.txt", 4]]
+
+
+def test_referencias_huerfanas(datos):
+    datos["trips"].loc[len(datos["trips"])] = ["9", "LA", "T3", "999_A"]
+    datos["stop_times"].loc[3, "stop_id"] = "S9"
+    datos["stop_times"].loc[len(datos["stop_times"])] = ["T9", "10:00:00", "10:00:00", "S0", "1", "1"]
+    resumen, filas = problemas(datos)
+    assert resumen == {
+        ("referencia:route_id->routes.txt", "error"): 1,
+        ("referencia:shape_id->shapes.txt", "error"): 1,
+        ("referencia:trip_id->trips.txt", "error"): 1,
+        ("referencia:stop_id->stops.txt", "error"): 1,
+        ("trip_sin_stop_times", "aviso"): 1,  # T3 no tiene paradas
+    }
+    assert filas.loc[filas["comprobacion"] == "referencia:stop_id->stops.txt", "valor"].tolist() == ["S9"]
+
+
+def test_claves_duplicadas(datos):
+    datos["stops"].loc[len(datos["stops"])] = ["S1", "40.50", "-3.60"]
+    datos["stop_times"].loc[5, "stop_sequence"] = "1"  # T2 con dos paradas con stop_sequence 1
+    resumen, _ = problemas(datos)
+    assert resumen[("clave_duplicada:stop_id", "error")] == 1
+    assert resumen[("clave_duplicada:trip_id+stop_sequence", "error")] == 1
+
+
+def test_horarios_mal_formados_y_fuera_de_rango(datos):
+    st = datos["stop_times"]
+    st.loc[4, ["arrival_time", "departure_time"]] = ["9:00:00", "09:00:00"]  # Horas de un dígito: válido
+    st.loc[5, "arrival_time"] = "09:61:00"
+    st.loc[6, "departure_time"] = "9h02"
+    st.loc[7, ["arrival_time", "departure_time"]] = ["48:00:00", "48:00:30"]
+    resumen, filas = problemas(datos)
+    assert resumen[("formato_horario:arrival_time", "error")] == 1
+    assert resumen[("formato_horario:departure_time", "error")] == 1
+    assert resumen[("rango_horario:arrival_time", "error")] == 1
+    assert resumen[("rango_horario:departure_time", "error")] == 1
+    assert lineas(filas, "formato_horario:arrival_time") == [7]
+    assert lineas(filas, "formato_horario:departure_time") == [8]
+    assert lineas(filas, "rango_horario:arrival_time") == [9]
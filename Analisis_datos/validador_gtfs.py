@@ -0,0 +1,349 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from gtfs import abrir_feed
+
+# Este archivo valida un conjunto de datos GTFS antes de ejecutar el resto de scripts. Todas las comprobaciones
+# son vectorizadas (isin, duplicated, comparaciones con shift), por lo que se puede ejecutar sobre el feed
+# completo de la EMT en pocos segundos. Devuelve un codigo de error si encuentra algun problema grave.
+
+# Definir carpeta usando os.path.abspath
+CARPETA_DATOS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "Analisis_datos", "Raw_data"))
+ruta_csv_validacion = os.path.join(CARPETA_DATOS, "validacion_gtfs.csv")
+
+MAX_FILAS_POR_COMPROBACION = 1000  # Filas de ejemplo guardadas en el informe por cada comprobación
+HORA_MAXIMA = 47  # Los horarios GTFS pueden superar las 24:00:00 en servicios nocturnos
+
+# Columnas obligatorias de cada archivo (incluye las que usan los scripts del proyecto)
+COLUMNAS_OBLIGATORIAS = {
+    "agency": ["agency_name", "agency_url", "agency_timezone"],
+    "routes": ["route_id", "route_type"],
+    "trips": ["route_id", "service_id", "trip_id", "shape_id"],
+    "stop_times": ["trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"],
+    "stops": ["stop_id", "stop_lat", "stop_lon"],
+    "shapes": ["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence", "shape_dist_traveled"],
+    "calendar": ["service_id", "start_date", "end_date"],
+    "calendar_dates": ["service_id", "date", "exception_type"],
+    "frequencies": ["trip_id", "start_time", "end_time", "headway_secs"],
+}
+ARCHIVOS_OBLIGATORIOS = ["agency", "routes", "trips", "stop_times", "stops", "shapes"]
+
+# Columnas que pueden estar vacías en algunas filas: los horarios de stop_times solo son obligatorios en la primera
+# y la última parada de cada viaje y en las filas con timepoint=1. Se comprueban en comprobar_horarios
+VACIOS_CONDICIONALES = {"stop_times": ["arrival_time", "departure_time"]}
+
+# Claves que no pueden repetirse en cada archivo
+CLAVES_UNICAS = {
+    "routes": ["route_id"],
+    "trips": ["trip_id"],
+    "stops": ["stop_id"],
+    "calendar": ["service_id"],
+    "calendar_dates": ["service_id", "date"],
+    "stop_times": ["trip_id", "stop_sequence"],
+    "shapes": ["shape_id", "shape_pt_sequence"],
+}
+
+
+def cargar_tablas(carpeta):
+    """
+    Carga los archivos .txt del feed (carpeta o archivo .zip) como texto (dtype=str), para validar
+    los identificadores tal como aparecen en el archivo. Elimina el BOM UTF-8 si existe.
+
+    Returns:
+        dict: nombre del archivo sin extensión -> DataFrame.
+    """
+    datos = {}
+    with abrir_feed(carpeta) as archivos:
+        for nombre in COLUMNAS_OBLIGATORIAS:
+            if f"{nombre}.txt" in archivos:
+                with archivos[f"{nombre}.txt"]() as origen:
+                    datos[nombre] = pd.read_csv(origen, dtype=str, encoding="utf-8-sig", keep_default_na=False, na_values=[""])
+    return datos
+
+
+class Informe:
+    """
+    Acumula los problemas encontrados. Guarda el número total de filas afectadas por cada
+    comprobación y como máximo MAX_FILAS_POR_COMPROBACION filas de ejemplo.
+
+    """
+
+    def __init__(self, max_filas=MAX_FILAS_POR_COMPROBACION):
+        self.max_filas = max_filas
+        self.resumen = []
+        self.filas = []
+
+    def registrar(self, archivo, comprobacion, gravedad, df=None, columna=None, mensaje=None):
+        num_filas = 0 if df is None else len(df)
+        if df is not None and num_filas == 0:
+            return
+        self.resumen.append({
+            "archivo": archivo, "comprobacion": comprobacion, "gravedad": gravedad,
+            "num_filas": num_filas, "detalle": mensaje or "",
+        })
+        if df is not None:
+            ejemplo = df.head(self.max_filas)
+            valores = ejemplo[columna].astype(str) if columna else pd.Series("", index=ejemplo.index)
+            self.filas.append(pd.DataFrame({
+                "archivo": archivo, "comprobacion": comprobacion, "gravedad": gravedad,
+                "linea": ejemplo.index.to_numpy() + 2,  # Línea en el archivo (la 1 es la cabecera)
+                "valor": valores.to_numpy(),
+            }))
+
+    def tabla_resumen(self):
+        return pd.DataFrame(self.resumen, columns=["archivo", "comprobacion", "gravedad", "num_filas", "detalle"])
+
+    def tabla_filas(self):
+        if not self.filas:
+            return pd.DataFrame(columns=["archivo", "comprobacion", "gravedad", "linea", "valor"])
+        return pd.concat(self.filas, ignore_index=True)
+
+
+def horario_a_segundos(serie):
+    """
+    Convierte una serie de horarios H:MM:SS o HH:MM:SS a segundos. Los valores vacíos o con
+    formato incorrecto quedan como NaN. Los textos se tratan como una matriz de bytes de ancho
+    fijo, sin expresiones regulares por fila.
+
+    """
+    texto = np.char.strip(serie.fillna("").to_numpy(dtype="U9"))
+    longitud = np.char.str_len(texto)
+    try:
+        b = np.char.zfill(texto, 8).astype("S9").view(np.uint8).reshape(-1, 9)[:, :8].astype(np.int64)
+    except UnicodeEncodeError:
+        # Algún valor tiene caracteres no ASCII: se convierte con una expresión regular
+        partes = serie.str.extract(r"^\s*(\d{1,2}):([0-5]\d):([0-5]\d)\s*$").astype(float)
+        return partes[0] * 3600 + partes[1] * 60 + partes[2]
+
+    digitos = b[:, [0, 1, 3, 4, 6, 7]] - ord("0")
+    valido = (
+        ((longitud == 7) | (longitud == 8))
+        & (b[:, 2] == ord(":")) & (b[:, 5] == ord(":"))
+        & ((digitos >= 0) & (digitos <= 9)).all(axis=1)
+        & (digitos[:, 2] <= 5) & (digitos[:, 4] <= 5)
+    )
+    segundos = (
+        (digitos[:, 0] * 10 + digitos[:, 1]) * 3600
+        + (digitos[:, 2] * 10 + digitos[:, 3]) * 60
+        + digitos[:, 4] * 10 + digitos[:, 5]
+    ).astype(np.float64)
+    return pd.Series(np.where(valido, segundos, np.nan), index=serie.index)
+
+
+def comprobar_archivos_y_columnas(datos, informe):
+    for nombre in ARCHIVOS_OBLIGATORIOS:
+        if nombre not in datos:
+            informe.registrar(f"{nombre}.txt", "archivo_obligatorio", "error", mensaje="No se encontró el archivo")
+    if "calendar" not in datos and "calendar_dates" not in datos:
+        informe.registrar("calendar.txt", "archivo_obligatorio", "error",
+                          mensaje="Se necesita calendar.txt o calendar_dates.txt")
+
+    for nombre, df in datos.items():
+        faltan = [col for col in COLUMNAS_OBLIGATORIAS[nombre] if col not in df.columns]
+        if faltan:
+            informe.registrar(f"{nombre}.txt", "columnas_obligatorias", "error", mensaje=f"Faltan las columnas {faltan}")
+        for col in COLUMNAS_OBLIGATORIAS[nombre]:
+            if col in df.columns and col not in VACIOS_CONDICIONALES.get(nombre, []):
+                informe.registrar(f"{nombre}.txt", f"valor_vacio:{col}", "error", df[df[col].isna()], col)
+
+
+def comprobar_duplicados(datos, informe):
+    for nombre, clave in CLAVES_UNICAS.items():
+        df = datos.get(nombre)
+        if df is None or not all(col in df.columns for col in clave):
+            continue
+        duplicados = df[df.duplicated(subset=clave, keep="first")]
+        informe.registrar(f"{nombre}.txt", f"clave_duplicada:{'+'.join(clave)}", "error", duplicados, clave[0])
+
+
+def comprobar_referencias(datos, informe):
+    """
+    Comprueba con isin que los identificadores referenciados existen en su tabla de origen.
+
+    """
+    def referencia(origen, columna, destino, columna_destino, gravedad="error"):
+        if origen not in datos or columna not in datos[origen].columns:
+            return
+        if destino not in datos or columna_destino not in datos[destino].columns:
+            return
+        df = datos[origen]
+        validos = pd.Index(datos[destino][columna_destino].dropna().unique())
+        huerfanos = df[df[columna].notna() & ~df[columna].isin(validos)]
+        informe.registrar(f"{origen}.txt", f"referencia:{columna}->{destino}.txt", gravedad, huerfanos, columna)
+
+    referencia("trips", "route_id", "routes", "route_id")
+    referencia("trips", "shape_id", "shapes", "shape_id")
+    referencia("stop_times", "trip_id", "trips", "trip_id")
+    referencia("stop_times", "stop_id", "stops", "stop_id")
+    referencia("frequencies", "trip_id", "trips", "trip_id")
+
+    # service_id puede estar definido en calendar.txt o en calendar_dates.txt
+    if "trips" in datos and "service_id" in datos["trips"].columns:
+        servicios = set()
+        for nombre in ("calendar", "calendar_dates"):
+            if nombre in datos and "service_id" in datos[nombre].columns:
+                servicios.update(datos[nombre]["service_id"].dropna().unique())
+        if servicios:
+            trips = datos["trips"]
+            huerfanos = trips[~trips["service_id"].isin(servicios)]
+            informe.registrar("trips.txt", "referencia:service_id->calendar.txt", "error", huerfanos, "service_id")
+
+    # Viajes sin horarios: se pierden al combinar trips con stop_times
+    if "trips" in datos and "stop_times" in datos and "trip_id" in datos["stop_times"].columns:
+        trips = datos["trips"]
+        sin_horarios = trips[~trips["trip_id"].isin(pd.Index(datos["stop_times"]["trip_id"].unique()))]
+        informe.registrar("trips.txt", "trip_sin_stop_times", "aviso", sin_horarios, "trip_id")
+
+
+def comprobar_horarios(datos, informe):
+    """
+    Comprueba el formato H:MM:SS y el rango de los horarios, que la salida no sea anterior a
+    la llegada y que los horarios no disminuyan a lo largo de cada viaje. Un horario vacío es
+    un error en la primera y la última parada del viaje y en las filas con timepoint=1, y un
+    aviso en el resto (horarios aproximados que se interpolan entre las paradas con horario).
+
+    """
+    if "stop_times" in datos:
+        st = datos["stop_times"]
+        obligatorio = _horario_obligatorio(st)
+        segundos = {}
+        for col in ("arrival_time", "departure_time"):
+            if col not in st.columns:
+                continue
+            vacio = st[col].isna()
+            informe.registrar("stop_times.txt", f"valor_vacio:{col}", "error", st[vacio & obligatorio], col,
+                              "Obligatorio en la primera y la última parada del viaje y con timepoint=1")
+            informe.registrar("stop_times.txt", f"valor_vacio:{col}", "aviso", st[vacio & ~obligatorio], col,
+                              "Horario aproximado: se interpola entre las paradas con horario")
+            segundos[col] = horario_a_segundos(st[col])
+            informe.registrar("stop_times.txt", f"formato_horario:{col}", "error",
+                              st[st[col].notna() & segundos[col].isna()], col)
+            informe.registrar("stop_times.txt", f"rango_horario:{col}", "error",
+                              st[segundos[col] >= (HORA_MAXIMA + 1) * 3600], col)
+
+        if len(segundos) == 2:
+            informe.registrar("stop_times.txt", "salida_anterior_a_llegada", "error",
+                              st[segundos["departure_time"] < segundos["arrival_time"]], "trip_id")
+
+        if "arrival_time" in segundos and {"trip_id", "stop_sequence"} <= set(st.columns):
+            secuencia = pd.to_numeric(st["stop_sequence"], errors="coerce")
+            informe.registrar("stop_times.txt", "formato_numerico:stop_sequence", "error",
+                              st[secuencia.isna()], "stop_sequence")
+            columnas = {"llegada": segundos["arrival_time"]}
+            if "shape_dist_traveled" in st.columns:
+                columnas["distancia"] = pd.to_numeric(st["shape_dist_traveled"], errors="coerce")
+            _comprobar_monotonia(informe, "stop_times.txt", st, "trip_id", secuencia, columnas)
+
+    if "frequencies" in datos and {"start_time", "end_time", "headway_secs"} <= set(datos["frequencies"].columns):
+        fr = datos["frequencies"]
+        inicio = horario_a_segundos(fr["start_time"])
+        fin = horario_a_segundos(fr["end_time"])
+        informe.registrar("frequencies.txt", "formato_horario:start_time", "error", fr[inicio.isna()], "start_time")
+        informe.registrar("frequencies.txt", "formato_horario:end_time", "error", fr[fin.isna()], "end_time")
+        informe.registrar("frequencies.txt", "fin_no_posterior_a_inicio", "error", fr[fin <= inicio], "trip_id")
+        intervalo = pd.to_numeric(fr["headway_secs"], errors="coerce")
+        informe.registrar("frequencies.txt", "rango:headway_secs", "error", fr[~(intervalo > 0)], "headway_secs")
+
+
+# Filas de stop_times en las que los horarios son obligatorios: primera y ultima parada de cada viaje y timepoint=1.
+# Sin trip_id o stop_sequence no se pueden identificar las paradas extremas y se consideran todas obligatorias
+def _horario_obligatorio(st):
+    if not {"trip_id", "stop_sequence"} <= set(st.columns):
+        return pd.Series(True, index=st.index)
+    secuencia = pd.to_numeric(st["stop_sequence"], errors="coerce")
+    por_viaje = secuencia.groupby(st["trip_id"])
+    extremo = (secuencia == por_viaje.transform("min")) | (secuencia == por_viaje.transform("max"))
+    if "timepoint" in st.columns:
+        extremo |= st["timepoint"].str.strip() == "1"
+    return extremo | secuencia.isna()
+
+
+def comprobar_coordenadas_y_shapes(datos, informe):
+    for nombre, lat, lon in (("stops", "stop_lat", "stop_lon"), ("shapes", "shape_pt_lat", "shape_pt_lon")):
+        if nombre not in datos or not {lat, lon} <= set(datos[nombre].columns):
+            continue
+        df = datos[nombre]
+        valores_lat = pd.to_numeric(df[lat], errors="coerce")
+        valores_lon = pd.to_numeric(df[lon], errors="coerce")
+        informe.registrar(f"{nombre}.txt", f"rango:{lat}", "error", df[~valores_lat.between(-90, 90)], lat)
+        informe.registrar(f"{nombre}.txt", f"rango:{lon}", "error", df[~valores_lon.between(-180, 180)], lon)
+
+    if "shapes" in datos and {"shape_id", "shape_pt_sequence", "shape_dist_traveled"} <= set(datos["shapes"].columns):
+        shapes = datos["shapes"]
+        secuencia = pd.to_numeric(shapes["shape_pt_sequence"], errors="coerce")
+        informe.registrar("shapes.txt", "formato_numerico:shape_pt_sequence", "error",
+                          shapes[secuencia.isna()], "shape_pt_sequence")
+        distancia = pd.to_numeric(shapes["shape_dist_traveled"], errors="coerce")
+        _comprobar_monotonia(informe, "shapes.txt", shapes, "shape_id", secuencia, {"distancia": distancia})
+
+
+def _comprobar_monotonia(informe, archivo, df, columna_grupo, secuencia, columnas):
+    """
+    Ordena por grupo y secuencia y marca las filas cuyo valor es menor que el máximo de las
+    filas anteriores del mismo grupo (máximo acumulado con cummax y shift, sin bucles por grupo).
+    Así también se detecta una disminución separada por valores vacíos (10:00, vacío, 09:00).
+
+    """
+    orden = np.lexsort((secuencia.to_numpy(), df[columna_grupo].to_numpy()))
+    grupo = df[columna_grupo].to_numpy()[orden]
+    codigo_grupo = np.cumsum(np.r_[True, grupo[1:] != grupo[:-1]])
+    for nombre, valores in columnas.items():
+        v = pd.Series(valores.to_numpy(dtype=np.float64)[orden])
+        # Máximo de los valores no vacíos hasta cada fila, propagado sobre las filas vacías
+        maximo = v.groupby(codigo_grupo).cummax().groupby(codigo_grupo).ffill()
+        anterior = maximo.groupby(codigo_grupo).shift().to_numpy()
+        disminuye = v.to_numpy() < anterior
+        informe.registrar(archivo, f"no_monotono:{nombre}", "error", df.iloc[orden[disminuye]], columna_grupo)
+
+
+def validar_feed(datos, max_filas=MAX_FILAS_POR_COMPROBACION):
+    """
+    Ejecuta todas las comprobaciones sobre un diccionario de tablas GTFS.
+
+    Args:
+        datos (dict): nombre del archivo sin extensión -> DataFrame, como el que devuelve cargar_tablas.
+        max_filas (int): Filas de ejemplo guardadas por cada comprobación.
+
+    Returns:
+        tuple: (resumen, filas). 'resumen' tiene una fila por comprobación fallida con el número de
+               filas afectadas, y 'filas' las líneas del archivo afectadas con el valor problemático.
+    """
+    informe = Informe(max_filas)
+    comprobar_archivos_y_columnas(datos, informe)
+    comprobar_duplicados(datos, informe)
+    comprobar_referencias(datos, informe)
+    comprobar_horarios(datos, informe)
+    comprobar_coordenadas_y_shapes(datos, informe)
+    return informe.tabla_resumen(), informe.tabla_filas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validación de un conjunto de datos GTFS.")
+    parser.add_argument("--carpeta", default=CARPETA_DATOS, help="Carpeta con los archivos GTFS (.txt) o archivo .zip del feed")
+    parser.add_argument("--informe", default=ruta_csv_validacion, help="CSV donde guardar las filas con problemas")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    datos = cargar_tablas(args.carpeta)
+    print(f"Archivos cargados: {[f'{nombre} ({len(df)} filas)' for nombre, df in datos.items()]} "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+    inicio_validacion = time.perf_counter()
+    resumen, filas = validar_feed(datos)
+    print(f"Validación completada en {time.perf_counter() - inicio_validacion:.1f} s")
+
+    if resumen.empty:
+        print("No se encontraron problemas en el feed GTFS.")
+    else:
+        with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200, "display.max_colwidth", 80):
+            print(resumen)
+        filas.to_csv(args.informe, index=False)
+        print(f"Filas con problemas guardadas en {args.informe}")
+
+    if (resumen["gravedad"] == "error").any():
+        sys.exit(1)